@@ -0,0 +1,483 @@
+#region imports
+import math
+import warnings
+import numpy as np
+import FourBarLinkage_Kinematics as kin
+#endregion
+
+#region headless four bar linkage
+"""
+Qt-free core of the four bar linkage.  Everything the model needs to move the linkage (link end points, lengths,
+angles, spring/dashpot state and tracer histories) is stored here as plain floats, so the linkage can be run in a
+batch job without PyQt5 or a QApplication.  The QGraphicsItems in FourBarLinkage_MVC are thin views that read their
+geometry from these objects when they paint.
+"""
+class LinkCore():
+    __slots__ = ('stX', 'stY', 'enX', 'enY', 'length', 'angle', 'mass', 'DX', 'DY')
+
+    def __init__(self, stX=0.0, stY=0.0, enX=1.0, enY=1.0, mass=10):
+        """
+        Geometry of a rigid link from (stX, stY) to (enX, enY) in scene coordinates.
+        :param mass: mass of the link, assumed uniformly distributed
+        """
+        self.mass = mass
+        self.place(stX, stY, enX, enY)
+
+    def place(self, stX, stY, enX, enY):
+        """
+        Move both end points and recompute the length and angle of the link.
+        """
+        self.stX = float(stX)
+        self.stY = float(stY)
+        self.enX = float(enX)
+        self.enY = float(enY)
+        self.linkAngle()
+
+    def setStart(self, x, y):
+        self.stX = x
+        self.stY = y
+
+    def setEnd(self, x, y):
+        self.enX = x
+        self.enY = y
+
+    def deltaX(self):
+        self.DX = self.enX - self.stX
+        return self.DX
+
+    def deltaY(self):
+        self.DY = self.enY - self.stY
+        return self.DY
+
+    def linkLength(self):
+        self.length = math.hypot(self.deltaX(), self.deltaY())
+        return self.length
+
+    def linkAngle(self):
+        self.linkLength()
+        # y is flipped so the angle is counter-clockwise on screen; wrap into [0,2pi)
+        self.angle = 0.0 if self.length == 0 else kin.wrapAngle(math.atan2(-self.DY, self.DX))
+        return self.angle
+
+    def AngleDeg(self):
+        return self.angle * 180.0 / math.pi
+
+
+class SpringCore():
+    __slots__ = ('stX', 'stY', 'enX', 'enY', 'length', 'freeLength', 'DL', 'force', 'k')
+
+    def __init__(self, stX=0.0, stY=0.0, enX=1.0, enY=1.0, k=10):
+        """
+        State of a linear spring.  The spring is assumed to be free when it is placed.
+        :param k: the spring constant
+        """
+        self.k = k
+        self.force = 0.0
+        self.place(stX, stY, enX, enY)
+
+    def place(self, stX, stY, enX, enY):
+        self.stX = float(stX)
+        self.stY = float(stY)
+        self.setEnd(enX, enY)
+        self.freeLength = self.length
+        self.getDL()
+
+    def setEnd(self, x, y):
+        self.enX = float(x)
+        self.enY = float(y)
+        self.getLength()
+
+    def getLength(self):
+        self.length = math.hypot(self.enX - self.stX, self.enY - self.stY)
+        return self.length
+
+    def getDL(self):
+        self.DL = self.length - self.freeLength
+        return self.DL
+
+    def getForce(self):
+        self.force = self.k * self.getDL()
+        return self.force
+
+    def getAngleDeg(self):
+        return math.degrees(math.atan2(self.enY - self.stY, self.enX - self.stX))
+
+
+class DashPotCore(SpringCore):
+    __slots__ = ('c',)
+
+    def __init__(self, stX=0.0, stY=0.0, enX=1.0, enY=1.0, c=10):
+        """
+        State of a dashpot.  The geometry is the same as for the spring, the coefficient is c instead of k.
+        :param c: the dashpot coefficient
+        """
+        self.c = c
+        super().__init__(stX, stY, enX, enY, k=0)
+
+
+class TracerCore():
+    __slots__ = ('xs', 'ys', 'capacity', 'head', 'count', 'total', 'version')
+
+    def __init__(self, x=0.0, y=0.0, capacity=1000):
+        """
+        History of a point on the linkage in a preallocated ring buffer, so appending a point is O(1) and allocates
+        nothing.  Once capacity points are stored, each new point overwrites the oldest one.
+        total counts every point ever appended and version changes whenever the history is replaced, so a view can
+        tell which points are new since it last looked.
+        :param capacity: number of points kept
+        """
+        self.version = 0
+        self.capacity = capacity
+        self.xs = np.empty(capacity)
+        self.ys = np.empty(capacity)
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        self.head = 0  # where the next point goes
+        self.count = 0
+        self.total = 0
+        self.version += 1
+        self.append(x, y)
+
+    def append(self, x, y):
+        h = self.head
+        self.xs[h] = x
+        self.ys[h] = y
+        h += 1
+        self.head = 0 if h == self.capacity else h
+        self.total += 1
+        if self.count < self.capacity:
+            self.count += 1
+
+    def lastPt(self):
+        i = self.head - 1  # -1 wraps around to the end of the buffer
+        return float(self.xs[i]), float(self.ys[i])
+
+    def segments(self):
+        """
+        The stored points, oldest first, as at most two contiguous (xs, ys) views into the buffer.
+        """
+        h = self.head
+        if self.count < self.capacity:
+            return ((self.xs[:h], self.ys[:h]),)
+        return ((self.xs[h:], self.ys[h:]), (self.xs[:h], self.ys[:h]))
+
+    def points(self):
+        """
+        Copy of the stored points, oldest first.
+        :return: (xs, ys) arrays
+        """
+        segs = self.segments()
+        return np.concatenate([s[0] for s in segs]), np.concatenate([s[1] for s in segs])
+
+    def setCapacity(self, capacity):
+        """
+        Resize the buffer, keeping the newest points.
+        """
+        xs, ys = self.points()
+        self.capacity = capacity
+        self.xs = np.empty(capacity)
+        self.ys = np.empty(capacity)
+        n = min(capacity, len(xs))
+        self.xs[:n] = xs[len(xs) - n:]
+        self.ys[:n] = ys[len(ys) - n:]
+        self.count = n
+        self.head = 0 if n == capacity else n
+        self.version += 1
+
+    def __len__(self):
+        return self.count
+
+
+class FourBarLinkage_Core():
+    """
+    Headless four bar linkage.  See FourBarLinkage_Model for the description of the linkage.
+
+    Solver modes (self.solver):
+        'analytic': closed form solution, fsolve is only used as a fallback when the closed form has no answer.
+        'fsolve':   find the output angle with fsolve of scipy using the constraint that the lengths of all the links
+                    must remain fixed (i.e., rigid links).
+        'verify':   closed form solution checked against fsolve on every step.
+        'table':    interpolation in a PositionTable that is rebuilt whenever a link length or a pivot changes, with
+                    the closed form solution near positions that cannot be assembled.  Used for interactive dragging.
+    """
+    __slots__ = ('GroundLink', 'InputLink', 'DragLink', 'OutputLink', 'Spring', 'DashPot',
+                 'Tracer0', 'Tracer1', 'Tracer2', 'Tracer3',
+                 'solver', 'branch', 'verifyTol', 'angle1', 'angle2', 'prevAlpha', 'prevBeta', 'lTest', 'table',
+                 'reachable', 'angleLimits', 'limited')
+
+    def __init__(self, tracerCapacity=1000):
+        """
+        :param tracerCapacity: number of points each tracer keeps
+        """
+        self.GroundLink = LinkCore()
+        self.InputLink = LinkCore()
+        self.DragLink = LinkCore()
+        self.OutputLink = LinkCore()
+        self.Spring = SpringCore()
+        self.DashPot = DashPotCore()
+        self.Tracer0 = TracerCore(capacity=tracerCapacity)
+        self.Tracer1 = TracerCore(capacity=tracerCapacity)
+        self.Tracer2 = TracerCore(capacity=tracerCapacity)
+        self.Tracer3 = TracerCore(capacity=tracerCapacity)
+        self.solver = 'analytic'
+        self.branch = None
+        self.verifyTol = 1e-6
+        self.angle1 = self.prevAlpha = 0.0
+        self.angle2 = self.prevBeta = 0.0
+        self.table = None
+        self.reachable = None
+        self.angleLimits = None  # (lower, upper) input angles (rad) a drag keeps the input link between
+        self.limited = None
+
+    def setup(self, p0x, p0y, p1x, p1y, bx, by, cx, cy):
+        """
+        Place the linkage from the two fixed pivots and the two moving joints.  Link lengths are taken from this pose,
+        and the spring and dashpot (from the output pivot to Tracer3) are free in it.
+        :param p0x, p0y: input pivot (Pivot0)
+        :param p1x, p1y: output pivot (Pivot1)
+        :param bx, by: moving end of the input link
+        :param cx, cy: moving end of the output link
+        """
+        self.GroundLink.place(p0x, p0y, p1x, p1y)
+        self.InputLink.place(p0x, p0y, bx, by)
+        self.DragLink.place(bx, by, cx, cy)
+        self.OutputLink.place(p1x, p1y, cx, cy)
+        midX = (bx + cx) / 2
+        midY = (by + cy) / 2
+        self.Tracer0.reset(cx, cy)
+        self.Tracer1.reset(bx, by)
+        self.Tracer2.reset(midX, midY)
+        self.Tracer3.reset((midX + cx) / 2, (midY + cy) / 2)
+        self.Spring.place(p1x, p1y, *self.Tracer3.lastPt())
+        self.DashPot.place(p1x, p1y, *self.Tracer3.lastPt())
+        self.branch = None
+        self.detectBranch()
+
+    def setTracerCapacity(self, capacity):
+        """
+        Change how many points each tracer keeps.
+        """
+        for tracer in (self.Tracer0, self.Tracer1, self.Tracer2, self.Tracer3):
+            tracer.setCapacity(capacity)
+
+    def detectBranch(self):
+        """
+        Take the assembly branch (open or crossed) from the current pose of the links.
+        """
+        self.angle1 = self.prevAlpha = self.InputLink.linkAngle()
+        self.angle2 = self.prevBeta = self.OutputLink.linkAngle()
+        self.branch = kin.branchOf(self.prevAlpha, self.prevBeta, self.InputLink.length, self.OutputLink.length,
+                                   self.InputLink.stX, self.InputLink.stY, self.OutputLink.stX, self.OutputLink.stY)
+
+    def solveOutputAngle(self, angle1):
+        """
+        Find the output angle for input angle angle1 using the current solver mode.
+        :param angle1: input angle (rad)
+        :return: the output angle (rad) or None if the linkage cannot be assembled at angle1
+        """
+        if self.branch is None:
+            self.detectBranch()
+        if self.solver == 'fsolve':
+            return self.fsolveOutputAngle(angle1)
+        if self.solver == 'table':
+            angle2 = self.positionTable().lookup(angle1)
+            if angle2 is not None:
+                return angle2
+        result = kin.solveOutputAngle(angle1, self.InputLink.length, self.DragLink.length, self.OutputLink.length,
+                                      self.InputLink.stX, self.InputLink.stY, self.OutputLink.stX,
+                                      self.OutputLink.stY, self.branch)
+        if result is None:
+            return self.fsolveOutputAngle(angle1)
+        angle2 = result[0]
+        if self.solver == 'verify':
+            check = self.fsolveOutputAngle(angle1)
+            err = abs(math.remainder(check - angle2, 2 * math.pi)) if check is not None else math.inf
+            if err > self.verifyTol:
+                warnings.warn("closed form and fsolve output angles differ by {:0.3g} rad".format(err))
+        return angle2
+
+    def positionTable(self):
+        """
+        The PositionTable for the current link lengths, pivots and branch, rebuilt only when one of them changed.
+        """
+        inp = self.InputLink
+        out = self.OutputLink
+        key = (inp.length, self.DragLink.length, out.length, inp.stX, inp.stY, out.stX, out.stY, self.branch)
+        if self.table is None or self.table.key != key:
+            self.table = kin.PositionTable(*key)
+        return self.table
+
+    def reachableRange(self):
+        """
+        The FourBarLinkage_Kinematics.ReachableRange (Grashof class, feasible input intervals, limit and toggle
+        positions) of the current link lengths, pivots and branch, recomputed only when one of them changed.
+        """
+        if self.branch is None:
+            self.detectBranch()
+        inp = self.InputLink
+        out = self.OutputLink
+        key = (inp.length, self.DragLink.length, out.length, inp.stX, inp.stY, out.stX, out.stY, self.branch)
+        if self.reachable is None or self.reachable.key != key:
+            self.reachable = kin.ReachableRange(*key)
+        return self.reachable
+
+    def limitedRange(self):
+        """
+        The reachable range narrowed to the angle limits (see setAngleLimits), recomputed only when the geometry or
+        the limits changed.  Without limits it is reachableRange().
+        """
+        reachable = self.reachableRange()
+        if self.angleLimits is None:
+            return reachable
+        if self.limited is None or self.limited.key != reachable.key or self.limited.angleLimits != self.angleLimits:
+            self.limited = kin.ReachableRange(*reachable.key, angleLimits=self.angleLimits)
+        return self.limited
+
+    def setAngleLimits(self, lower=None, upper=None):
+        """
+        Keep dragged input angles between lower and upper.  They are applied with the reachable range before the
+        solve, so an input angle outside them costs no extra solve.  If the input link is outside the new limits, it
+        is moved to the nearest one.
+        :param lower: smallest input angle (rad, in [0, 2pi]), None for 0
+        :param upper: largest input angle (rad, in [0, 2pi]), None for 2pi;  lower > upper allows no angle at all,
+                      so the linkage stays where it is
+        :return: True if the linkage was moved
+        """
+        lower = 0.0 if lower is None else lower
+        upper = 2.0 * math.pi if upper is None else upper
+        self.angleLimits = None if lower <= 0.0 and upper >= 2.0 * math.pi else (lower, upper)
+        limited = self.limitedRange()
+        if not limited.intervals or limited.contains(self.angle1):
+            return False
+        self.setInputAngle(self.angle1, limited=True)
+        return True
+
+    def fsolveOutputAngle(self, angle1, guess=None):
+        """
+        Find the output angle by root finding on the coupler length.
+        :param angle1: input angle (rad)
+        :param guess: initial guess for the output angle, defaults to the previous output angle
+        :return: the output angle (rad) or None if fsolve did not close the loop
+        """
+        from scipy import optimize  # only the fallback needs scipy, keep it out of headless imports
+        l2 = self.DragLink.length
+        l3 = self.OutputLink.length
+        x1, y1 = kin.inputJoint(angle1, self.InputLink.length, self.InputLink.stX, self.InputLink.stY)
+        self.lTest = l2
+
+        def fn1(angles):
+            angle2 = float(angles[0])
+            x2 = self.OutputLink.stX + l3 * math.cos(angle2)
+            y2 = self.OutputLink.stY - l3 * math.sin(angle2)
+            self.lTest = math.sqrt(math.pow(x2 - x1, 2) + math.pow(y2 - y1, 2))
+            return l2 - self.lTest
+        result = optimize.fsolve(fn1, [self.prevBeta if guess is None else guess])
+        fn1(result)
+        if abs(self.lTest - l2) > 0.001:
+            return None
+        return kin.wrapAngle(result[0])
+
+    def solvePositions(self, angles):
+        """
+        Solve the linkage for an array of input angles without changing its state.
+        :param angles: array of input angles (rad)
+        :return: a FourBarLinkage_Kinematics.LinkagePositions tuple of arrays
+        """
+        if self.branch is None:
+            self.detectBranch()
+        return kin.solvePositions(angles, self.InputLink.length, self.DragLink.length, self.OutputLink.length,
+                                  self.InputLink.stX, self.InputLink.stY, self.OutputLink.stX, self.OutputLink.stY,
+                                  self.branch)
+
+    def analyzeCycle(self, step=0.5, omega=1.0, alpha=0.0):
+        """
+        Velocities, accelerations, transmission angle and mechanical advantage over a full revolution of the input link
+        without changing the state of the linkage.
+        :param step: input angle increment (deg)
+        :param omega: input angular velocity (rad/s)
+        :param alpha: input angular acceleration (rad/s^2)
+        :return: a FourBarLinkage_Kinematics.CycleAnalysis tuple of arrays
+        """
+        if self.branch is None:
+            self.detectBranch()
+        return kin.analyzeCycle(self.InputLink.length, self.DragLink.length, self.OutputLink.length,
+                                self.InputLink.stX, self.InputLink.stY, self.OutputLink.stX, self.OutputLink.stY,
+                                self.branch, step, omega=omega, alpha=alpha)
+
+    def setInputLength(self, L=10):
+        link = self.InputLink
+        link.setEnd(link.stX + math.cos(link.angle) * L, link.stY - math.sin(link.angle) * L)
+        link.linkLength()
+        self.DragLink.setStart(link.enX, link.enY)
+
+    def setOutputLength(self, L=10):
+        link = self.OutputLink
+        link.setEnd(link.stX + math.cos(link.angle) * L, link.stY - math.sin(link.angle) * L)
+        link.linkLength()
+        self.DragLink.setEnd(link.enX, link.enY)
+
+    def moveLinkage(self, x, y):
+        """
+        Point the input link at (x, y) and move the rest of the linkage to match, within the angle limits.
+        :return: True if the angle was reached, False if it was clamped to the reachable range or the angle limits
+        """
+        link = self.InputLink
+        return self.setInputAngle(kin.wrapAngle(math.atan2(-(y - link.stY), x - link.stX)), limited=True)
+
+    def setInputAngle(self, angle1, limited=False):
+        """
+        Set the input angle, solve for the output angle and update all joints, tracers, the spring and the dashpot.
+        An input angle the linkage cannot reach is first clamped to the nearest limit position of the reachable range
+        around the current input angle, so the solve does not fail.
+        :param angle1: input angle (rad)
+        :param limited: also clamp to the angle limits (see setAngleLimits), as for a drag;  simulations and playback
+                        leave them out, since the dynamics do not know them
+        :return: True if angle1 was reached, False if it was clamped (or the linkage was left at the previous pose)
+        """
+        if self.branch is None:
+            self.detectBranch()
+        reachable = (self.limitedRange() if limited else self.reachableRange()).clamp(angle1, self.prevAlpha)
+        clamped = reachable != angle1
+        angle1 = self.prevAlpha if reachable is None else reachable
+        angle2 = self.solveOutputAngle(angle1)
+        if angle2 is None:
+            self.angle1 = self.prevAlpha
+            self.angle2 = self.prevBeta
+        else:
+            self.angle1 = self.prevAlpha = angle1
+            self.angle2 = self.prevBeta = angle2
+        self.updatePositions()
+        return angle2 is not None and not clamped
+
+    def updatePositions(self):
+        """
+        Write the joint positions for angle1/angle2 into the links and record the tracer points.
+        """
+        inp = self.InputLink
+        out = self.OutputLink
+        bx = inp.stX + math.cos(self.angle1) * inp.length
+        by = inp.stY - math.sin(self.angle1) * inp.length
+        cx = out.stX + math.cos(self.angle2) * out.length
+        cy = out.stY - math.sin(self.angle2) * out.length
+        inp.setEnd(bx, by)
+        inp.angle = self.angle1
+        out.setEnd(cx, cy)
+        out.angle = self.angle2
+        self.DragLink.setStart(bx, by)
+        self.DragLink.setEnd(cx, cy)
+        self.DragLink.angle = kin.wrapAngle(math.atan2(by - cy, cx - bx))
+
+        midX = (bx + cx) / 2
+        midY = (by + cy) / 2
+        self.Tracer0.append(cx, cy)
+        self.Tracer1.append(bx, by)
+        self.Tracer2.append(midX, midY)
+        tx = (midX + cx) / 2
+        ty = (midY + cy) / 2
+        self.Tracer3.append(tx, ty)
+        self.Spring.setEnd(tx, ty)
+        self.Spring.getForce()
+        self.DashPot.setEnd(tx, ty)
+        self.DashPot.getDL()
+#endregion
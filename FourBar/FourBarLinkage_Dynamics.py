@@ -0,0 +1,489 @@
+#region imports
+import math
+import numpy as np
+from scipy import integrate
+import FourBarLinkage_Kinematics as kin
+#endregion
+
+#region single degree of freedom Lagrangian dynamics
+IMPLICIT_METHODS = ('Radau', 'BDF', 'LSODA')  # solve_ivp methods that use the Jacobian
+"""
+Dynamics of the four bar linkage with the input angle theta1 as the single generalized coordinate.
+
+The links are uniform rods:  the input and output links rotate about their fixed pivots, the coupler moves in general
+plane motion.  With K2 = dtheta2/dtheta1 and K3 = dtheta3/dtheta1 from the velocity analysis, the kinetic energy is
+T = 1/2 I(theta1) omega1^2 with the effective (configuration dependent) inertia
+
+    I = m1 L1^2/3 + m2 (L1^2 + L1 L2 K2 cos(theta2 - theta1) + L2^2 K2^2/3) + m3 L3^2 K3^2/3
+
+and Lagrange's equation gives
+
+    I(theta1) alpha1 + 1/2 dI/dtheta1 omega1^2 = Q(theta1, omega1)
+
+where Q is the generalized force of the linear spring and the dashpot that connect the output pivot to Tracer3 (3/4 of
+the way along the coupler).  Lengths are in scene units and angles in radians.  All functions work on arrays of
+states, so solve_ivp can evaluate many states per call (vectorized=True).
+"""
+class FourBarDynamics():
+    maxExplicitCalls = 50  # right-hand side calls per output sample before simulateChunks('auto') gives up on RK45
+
+    def __init__(self, L1, L2, L3, p0x, p0y, p1x, p1y, m1=1.0, m2=1.0, m3=1.0, k=0.0, c=0.0, freeLength=None,
+                 branch=kin.OPEN, anchorX=None, anchorY=None, attach=0.75):
+        """
+        :param L1: input link length
+        :param L2: coupler (drag) link length
+        :param L3: output link length
+        :param p0x, p0y: input pivot (Pivot0)
+        :param p1x, p1y: output pivot (Pivot1)
+        :param m1, m2, m3: masses of the input, coupler and output links
+        :param k: spring constant of the linear spring
+        :param c: coefficient of the dashpot (parallel to the spring)
+        :param freeLength: free length of the spring, if None the spring is free at the start of simulate()
+        :param branch: OPEN or CROSSED assembly
+        :param anchorX, anchorY: fixed end of the spring and dashpot, defaults to the output pivot
+        :param attach: fraction of the coupler length from the input joint where the spring is attached (Tracer3)
+        """
+        self.L1, self.L2, self.L3 = L1, L2, L3
+        self.p0x, self.p0y, self.p1x, self.p1y = p0x, p0y, p1x, p1y
+        self.m1, self.m2, self.m3 = m1, m2, m3
+        self.k = k
+        self.c = c
+        self.freeLength = freeLength
+        self.branch = branch
+        self.anchorX = p1x if anchorX is None else anchorX
+        self.anchorY = p1y if anchorY is None else anchorY
+        self.attach = attach
+        self.reachable = None
+
+    @classmethod
+    def fromCore(cls, core, m1=1.0, m2=1.0, m3=1.0, k=None, c=None):
+        """
+        Build the dynamics of the linkage held by a FourBarLinkage_Core, including its spring and dashpot.
+        :param k: spring constant, defaults to core.Spring.k
+        :param c: dashpot coefficient, defaults to core.DashPot.c
+        """
+        if core.branch is None:
+            core.detectBranch()
+        return cls(core.InputLink.length, core.DragLink.length, core.OutputLink.length,
+                   core.InputLink.stX, core.InputLink.stY, core.OutputLink.stX, core.OutputLink.stY,
+                   m1, m2, m3, core.Spring.k if k is None else k, core.DashPot.c if c is None else c,
+                   core.Spring.freeLength, core.branch, core.Spring.stX, core.Spring.stY)
+
+    def reachableRange(self):
+        """
+        The kin.ReachableRange of the linkage, recomputed only when a length, a pivot or the branch changed.
+        """
+        key = (self.L1, self.L2, self.L3, self.p0x, self.p0y, self.p1x, self.p1y, self.branch)
+        if self.reachable is None or self.reachable.key != key:
+            self.reachable = kin.ReachableRange(*key)
+        return self.reachable
+
+    def configuration(self, theta):
+        """
+        Positions and velocity/acceleration ratios of the linkage at input angles theta.
+        :param theta: input angle(s) (rad)
+        :return: (positions, K2, K3, dK2, dK3)
+        """
+        pos = kin.solvePositions(theta, self.L1, self.L2, self.L3, self.p0x, self.p0y, self.p1x, self.p1y,
+                                 self.branch, tracers=False)
+        K2, K3 = kin.velocityRatios(pos.theta1, pos.theta2, pos.theta3, self.L1, self.L2, self.L3)
+        dK2, dK3 = kin.accelerationRatios(pos.theta1, pos.theta2, pos.theta3, self.L1, self.L2, self.L3, K2, K3)
+        return pos, K2, K3, dK2, dK3
+
+    def effectiveInertia(self, theta, config=None):
+        """
+        Effective inertia about the input pivot and its derivative with respect to the input angle.
+        :param theta: input angle(s) (rad)
+        :param config: the result of configuration(theta) if it is already known
+        :return: (I, dI/dtheta)
+        """
+        pos, K2, K3, dK2, dK3 = self.configuration(theta) if config is None else config
+        L1, L2, L3 = self.L1, self.L2, self.L3
+        phi = pos.theta2 - pos.theta1
+        I = (self.m1 * L1 ** 2 / 3.0
+             + self.m2 * (L1 ** 2 + L1 * L2 * K2 * np.cos(phi) + L2 ** 2 * K2 ** 2 / 3.0)
+             + self.m3 * L3 ** 2 * K3 ** 2 / 3.0)
+        dI = (self.m2 * (L1 * L2 * (dK2 * np.cos(phi) - K2 * (K2 - 1.0) * np.sin(phi))
+                         + 2.0 * L2 ** 2 * K2 * dK2 / 3.0)
+              + 2.0 * self.m3 * L3 ** 2 * K3 * dK3 / 3.0)
+        return I, dI
+
+    def springGeometry(self, theta, config=None):
+        """
+        Length of the spring/dashpot and its rate of change with respect to the input angle.
+        :return: (length, dlength/dtheta)
+        """
+        pos, K2, K3, dK2, dK3 = self.configuration(theta) if config is None else config
+        a = self.attach
+        dx = pos.xB + a * (pos.xC - pos.xB) - self.anchorX
+        dy = pos.yB + a * (pos.yC - pos.yB) - self.anchorY
+        length = np.hypot(dx, dy)
+        # derivative of the attachment point in scene coordinates (y down)
+        dPx = -self.L1 * np.sin(pos.theta1) - a * self.L2 * K2 * np.sin(pos.theta2)
+        dPy = -self.L1 * np.cos(pos.theta1) - a * self.L2 * K2 * np.cos(pos.theta2)
+        return length, (dx * dPx + dy * dPy) / length
+
+    def generalizedForce(self, theta, omega, config=None):
+        """
+        Generalized force on the input angle from the spring and dashpot.
+        :param theta: input angle(s) (rad)
+        :param omega: input angular velocity(ies) (rad/s)
+        :return: Q
+        """
+        length, dLength = self.springGeometry(theta, config)
+        freeLength = length if self.freeLength is None else self.freeLength
+        return -(self.k * (length - freeLength) + self.c * dLength * omega) * dLength
+
+    def curvatures(self, theta, config=None):
+        """
+        Second derivatives of the effective inertia and of the spring length with respect to the input angle.
+        :return: (d2I/dtheta2, d2length/dtheta2, dI/dtheta, length, dlength/dtheta, I)
+        """
+        config = self.configuration(theta) if config is None else config
+        pos, K2, K3, dK2, dK3 = config
+        ddK2, ddK3 = kin.jerkRatios(pos.theta1, pos.theta2, pos.theta3, self.L1, self.L2, self.L3, K2, K3, dK2, dK3)
+        L1, L2, L3 = self.L1, self.L2, self.L3
+        I, dI = self.effectiveInertia(theta, config)
+        phi = pos.theta2 - pos.theta1
+        ddI = (self.m2 * (L1 * L2 * ((ddK2 - K2 * (K2 - 1.0) ** 2) * np.cos(phi) - dK2 * (3.0 * K2 - 2.0) * np.sin(phi))
+                          + 2.0 * L2 ** 2 * (dK2 ** 2 + K2 * ddK2) / 3.0)
+               + 2.0 * self.m3 * L3 ** 2 * (dK3 ** 2 + K3 * ddK3) / 3.0)
+        # spring attachment point and its first and second derivatives (scene coordinates, y down)
+        a = self.attach
+        dx = pos.xB + a * (pos.xC - pos.xB) - self.anchorX
+        dy = pos.yB + a * (pos.yC - pos.yB) - self.anchorY
+        s1, c1 = np.sin(pos.theta1), np.cos(pos.theta1)
+        s2, c2 = np.sin(pos.theta2), np.cos(pos.theta2)
+        dPx = -L1 * s1 - a * L2 * K2 * s2
+        dPy = -L1 * c1 - a * L2 * K2 * c2
+        ddPx = -L1 * c1 - a * L2 * (dK2 * s2 + K2 ** 2 * c2)
+        ddPy = L1 * s1 - a * L2 * (dK2 * c2 - K2 ** 2 * s2)
+        length = np.hypot(dx, dy)
+        dLength = (dx * dPx + dy * dPy) / length
+        ddLength = (dPx ** 2 + dPy ** 2 + dx * ddPx + dy * ddPy - dLength ** 2) / length
+        return ddI, ddLength, dI, length, dLength, I
+
+    def stateEq(self, t, y):
+        """
+        State equations for solve_ivp with y = [theta1, omega1].  y may also be a (2, n) array of states.
+        """
+        theta, omega = y[0], y[1]
+        config = self.configuration(theta)
+        I, dI = self.effectiveInertia(theta, config)
+        Q = self.generalizedForce(theta, omega, config)
+        return np.array([omega, (Q - 0.5 * dI * omega ** 2) / I])
+
+    def jacobian(self, t, y):
+        """
+        Analytic Jacobian of stateEq for the implicit (stiff) solvers.
+        :param y: [theta1, omega1]
+        :return: the 2x2 matrix d(stateEq)/dy
+        """
+        theta, omega = np.atleast_1d(y[0]), np.atleast_1d(y[1])
+        ddI, ddLength, dI, length, dLength, I = self.curvatures(theta)
+        freeLength = length if self.freeLength is None else self.freeLength
+        stretch = self.k * (length - freeLength) + self.c * dLength * omega
+        Q = -stretch * dLength
+        dQdTheta = -(self.k * dLength + self.c * ddLength * omega) * dLength - stretch * ddLength
+        dQdOmega = -self.c * dLength ** 2
+        rhs = Q - 0.5 * dI * omega ** 2
+        dAlphadTheta = ((dQdTheta - 0.5 * ddI * omega ** 2) * I - rhs * dI) / I ** 2
+        dAlphadOmega = (dQdOmega - dI * omega) / I
+        return np.array([[0.0, 1.0], [dAlphadTheta[0], dAlphadOmega[0]]])
+
+    def chooseMethod(self, theta, omega, fps=60, stiffRatio=5.0):
+        """
+        Stiffness detection:  the motion is stiff when the Jacobian has a mode that decays more than stiffRatio times
+        faster than the output frame rate.  Such a mode is invisible in the output, but an explicit method must keep
+        taking tiny steps to stay stable, so an implicit method is used instead.
+        :return: 'Radau' if the state is stiff, else 'RK45'
+        """
+        eigenvalues = np.linalg.eigvals(self.jacobian(0.0, [theta, omega]))
+        if not np.isfinite(eigenvalues).all():
+            return 'RK45'
+        return 'Radau' if -eigenvalues.real.min() > stiffRatio * fps else 'RK45'
+
+    def solverOptions(self, method):
+        """
+        Keyword arguments of solve_ivp for method:  the implicit methods get the analytic Jacobian.
+        """
+        if method in IMPLICIT_METHODS:
+            return {'jac': self.jacobian}
+        return {'vectorized': True}
+
+    def simulate(self, theta0, omega0=0.0, tMax=5.0, fps=60, method='RK45', rtol=1e-6, atol=1e-8):
+        """
+        Integrate the motion from rest (or omega0) at theta0.
+        :param theta0: initial input angle (rad)
+        :param omega0: initial input angular velocity (rad/s)
+        :param tMax: simulation duration (s)
+        :param fps: output samples per second
+        :param method: a solve_ivp method ('RK45', 'Radau', 'BDF', 'LSODA', ...) or 'auto' to pick RK45 or Radau by
+                       chooseMethod at the initial state
+        :return: the solve_ivp result, sol.y[0] is theta1 and sol.y[1] is omega1
+        """
+        if self.freeLength is None:
+            self.freeLength = float(self.springGeometry(np.array([theta0]))[0][0])
+        if method == 'auto':
+            method = self.chooseMethod(theta0, omega0, fps)
+        t_eval = np.linspace(0, tMax, int(tMax * fps))
+        return integrate.solve_ivp(self.stateEq, (0, tMax), [theta0, omega0], t_eval=t_eval, method=method,
+                                   rtol=rtol, atol=atol, **self.solverOptions(method))
+
+    def simulateChunks(self, theta0, omega0=0.0, tMax=5.0, fps=60, chunk=0.25, method='RK45', rtol=1e-6, atol=1e-8):
+        """
+        Integrate like simulate(), but hand back the solution piece by piece as soon as each piece is solved, so a
+        caller can start using (or stop) a long run before it is finished.
+        :param chunk: length of each piece (s)
+        :param method: as for simulate(), but 'auto' picks the method again for every piece, and also switches to
+                       Radau when RK45 needed more than maxExplicitCalls right-hand side calls per sample in a piece
+        :return: a generator of (t, y) arrays with samples every 1/fps seconds
+        """
+        if self.freeLength is None:
+            self.freeLength = float(self.springGeometry(np.array([theta0]))[0][0])
+        n = int(tMax * fps)
+        perChunk = max(1, int(round(chunk * fps)))
+        y0 = np.array([theta0, omega0], dtype=float)
+        t0 = 0.0
+        auto = method == 'auto'
+        forceImplicit = False
+        for i0 in range(0, n, perChunk):
+            t_eval = np.arange(i0, min(n, i0 + perChunk)) / fps
+            if t_eval[-1] == t0:
+                yield t_eval, y0.reshape(2, 1)
+                continue
+            if auto:
+                method = 'Radau' if forceImplicit else self.chooseMethod(y0[0], y0[1], fps)
+            sol = integrate.solve_ivp(self.stateEq, (t0, t_eval[-1]), y0, t_eval=t_eval, method=method,
+                                      rtol=rtol, atol=atol, **self.solverOptions(method))
+            if not sol.success:
+                raise RuntimeError(sol.message)
+            if auto and method not in IMPLICIT_METHODS and sol.nfev > self.maxExplicitCalls * len(t_eval):
+                forceImplicit = True  # many rejected steps:  stiff even if the eigenvalues did not show it
+            yield sol.t, sol.y
+            y0 = sol.y[:, -1]
+            t0 = sol.t[-1]
+#endregion
+
+#region real-time stepping
+class RealTimeStepper():
+    def __init__(self, dynamics, theta0, omega0=0.0, dt=1.0 / 240.0, maxSteps=32):
+        """
+        Advances a FourBarDynamics in fixed steps as wall-clock time goes by, for animations of unlimited length.  Only
+        the current state is kept, and dynamics.k, dynamics.c (and the masses) are read on every step, so they can be
+        changed while it runs.
+
+        The step is semi-implicit Euler:  the new angular velocity comes from the spring force at the current angle
+        with the damping taken at the new velocity, then the angle moves with the new velocity.  It is symplectic
+        without damping (the energy does not drift) and stays stable for any damping coefficient.
+        :param dt: fixed time step (s)
+        :param maxSteps: most steps per call of advance, so a stalled GUI does not have to catch up all at once
+        """
+        self.dynamics = dynamics
+        if dynamics.freeLength is None:
+            dynamics.freeLength = float(dynamics.springGeometry(np.array([theta0]))[0][0])
+        self.theta = float(theta0)
+        self.omega = float(omega0)
+        self.t = 0.0
+        self.dt = dt
+        self.maxSteps = maxSteps
+        self.accumulator = 0.0
+        self.blocked = False  # True after a step ran into a position that cannot be assembled
+
+    def step(self):
+        """
+        Advance by one fixed step dt.
+        """
+        d = self.dynamics
+        dt = self.dt
+        theta = np.array([self.theta])
+        config = d.configuration(theta)
+        I, dI = d.effectiveInertia(theta, config)
+        length, dLength = d.springGeometry(theta, config)
+        I, dI, length, dLength = float(I[0]), float(dI[0]), float(length[0]), float(dLength[0])
+        if not math.isfinite(I + dI + dLength):
+            self.blocked = True
+            self.omega = 0.0
+            return
+        springTorque = -d.k * (length - d.freeLength) * dLength
+        omega = (self.omega + dt * (springTorque - 0.5 * dI * self.omega ** 2) / I) / (1.0 + dt * d.c * dLength ** 2 / I)
+        theta = self.theta + dt * omega
+        if not d.reachableRange().contains(theta):
+            # the linkage locks at a dead point:  stop there instead of stepping through it
+            self.blocked = True
+            self.omega = 0.0
+            return
+        self.blocked = False
+        self.theta = theta
+        self.omega = omega
+        self.t += dt
+
+    def advance(self, elapsed):
+        """
+        Take as many fixed steps as fit in the wall-clock time elapsed since the last call, carrying the remainder
+        over to the next call.
+        :param elapsed: wall-clock time (s) since the last call
+        :return: the number of steps taken
+        """
+        self.accumulator += elapsed
+        n = min(int(self.accumulator / self.dt), self.maxSteps)
+        for _ in range(n):
+            self.step()
+        self.accumulator = min(self.accumulator - n * self.dt, self.dt)
+        return n
+#endregion
+
+#region batched integration of many linkages
+"""
+Dormand-Prince 5(4) coefficients for the adaptive mode of FourBarEnsemble.integrate.
+"""
+DP_C = (0.0, 1.0 / 5.0, 3.0 / 10.0, 4.0 / 5.0, 8.0 / 9.0, 1.0)
+DP_A = ((),
+        (1.0 / 5.0,),
+        (3.0 / 40.0, 9.0 / 40.0),
+        (44.0 / 45.0, -56.0 / 15.0, 32.0 / 9.0),
+        (19372.0 / 6561.0, -25360.0 / 2187.0, 64448.0 / 6561.0, -212.0 / 729.0),
+        (9017.0 / 3168.0, -355.0 / 33.0, 46732.0 / 5247.0, 49.0 / 176.0, -5103.0 / 18656.0))
+DP_B = (35.0 / 384.0, 0.0, 500.0 / 1113.0, 125.0 / 192.0, -2187.0 / 6784.0, 11.0 / 84.0)
+DP_E = (71.0 / 57600.0, 0.0, -71.0 / 16695.0, 71.0 / 1920.0, -17253.0 / 339200.0, 22.0 / 525.0, -1.0 / 40.0)
+
+
+class FourBarEnsemble(FourBarDynamics):
+    """
+    N linkages integrated together.  Every parameter of FourBarDynamics may be an array of N values (scalars are
+    shared by all members), and because all of FourBarDynamics works elementwise the right-hand side of all members is
+    evaluated in one set of array operations.  States are (N, 2) arrays of [theta1, omega1].
+    """
+    def __init__(self, L1, L2, L3, p0x, p0y, p1x, p1y, m1=1.0, m2=1.0, m3=1.0, k=0.0, c=0.0, freeLength=None,
+                 branch=kin.OPEN, anchorX=None, anchorY=None, attach=0.75):
+        super().__init__(L1, L2, L3, p0x, p0y, p1x, p1y, m1, m2, m3, k, c, freeLength, branch, anchorX, anchorY,
+                         attach)
+        names = ('L1', 'L2', 'L3', 'p0x', 'p0y', 'p1x', 'p1y', 'm1', 'm2', 'm3', 'k', 'c', 'branch', 'anchorX',
+                 'anchorY', 'attach')
+        values = np.broadcast_arrays(*(np.asarray(getattr(self, name), dtype=float) for name in names))
+        for name, value in zip(names, values):
+            setattr(self, name, np.array(value, ndmin=1))
+        self.n = len(self.L1)
+        if self.freeLength is not None:
+            self.freeLength = np.broadcast_to(np.asarray(self.freeLength, dtype=float), (self.n,)).copy()
+
+    @classmethod
+    def perturbed(cls, dynamics, n, sigma=None, seed=None):
+        """
+        Monte-Carlo ensemble around a single linkage.
+        :param dynamics: the nominal FourBarDynamics
+        :param n: number of members
+        :param sigma: dict of parameter name -> relative standard deviation of a normal perturbation, e.g.
+                      {'m1': 0.05, 'k': 0.1}
+        :param seed: seed of the random generator
+        :return: a FourBarEnsemble
+        """
+        rng = np.random.default_rng(seed)
+        names = ('L1', 'L2', 'L3', 'p0x', 'p0y', 'p1x', 'p1y', 'm1', 'm2', 'm3', 'k', 'c', 'freeLength', 'branch',
+                 'anchorX', 'anchorY', 'attach')
+        params = {name: getattr(dynamics, name) for name in names}
+        for name, s in (sigma or {}).items():
+            if name not in params or params[name] is None:
+                raise ValueError("cannot perturb {!r}".format(name))
+            params[name] = params[name] * (1.0 + s * rng.standard_normal(n))
+        params['L1'] = np.broadcast_to(params['L1'], (n,))
+        return cls(**params)
+
+    def derivatives(self, y):
+        """
+        Right-hand side of all members.
+        :param y: (N, 2) array of [theta1, omega1]
+        :return: (N, 2) array of [omega1, alpha1]
+        """
+        return self.stateEq(0.0, y.T).T
+
+    def initialState(self, theta0, omega0=0.0):
+        theta0 = np.broadcast_to(np.asarray(theta0, dtype=float), (self.n,))
+        if self.freeLength is None:
+            self.freeLength = self.springGeometry(theta0)[0]
+        y = np.empty((self.n, 2))
+        y[:, 0] = theta0
+        y[:, 1] = omega0
+        return y
+
+    def integrate(self, theta0, omega0=0.0, tMax=5.0, fps=60, method='RK4', dt=None, rtol=1e-6, atol=1e-8):
+        """
+        Integrate all members from theta0/omega0 (scalars or arrays of N values).
+        :param method: 'RK4' for fixed steps of dt, 'RK45' for adaptive Dormand-Prince steps with a step size per
+                       member, so a stiff member does not slow down the others
+        :param dt: RK4 step (s), default one step per output sample (1/fps)
+        :param rtol, atol: tolerances of the adaptive mode
+        :return: (t, theta, omega, ok):  t has the M output samples every 1/fps seconds, theta and omega are (M, N)
+                 and ok is False for members that ran into a position that cannot be assembled (NaN from then on)
+        """
+        y = self.initialState(theta0, omega0)
+        t = np.arange(int(tMax * fps)) / fps
+        out = np.full((len(t), self.n, 2), np.nan)
+        if len(t) == 0:
+            return t, out[..., 0], out[..., 1], np.ones(self.n, dtype=bool)
+        out[0] = y
+        if method == 'RK4':
+            self._integrateRK4(y, t, out, dt or 1.0 / fps)
+        elif method == 'RK45':
+            self._integrateRK45(y, t, out, rtol, atol)
+        else:
+            raise ValueError("method must be 'RK4' or 'RK45', not {!r}".format(method))
+        ok = np.isfinite(out[-1]).all(axis=1)
+        return t, out[..., 0], out[..., 1], ok
+
+    def _integrateRK4(self, y, t, out, dt):
+        f = self.derivatives
+        for i in range(1, len(t)):
+            steps = max(1, int(math.ceil((t[i] - t[i - 1]) / dt - 1e-9)))
+            h = (t[i] - t[i - 1]) / steps
+            for _ in range(steps):
+                k1 = f(y)
+                k2 = f(y + 0.5 * h * k1)
+                k3 = f(y + 0.5 * h * k2)
+                k4 = f(y + h * k3)
+                y = y + h / 6.0 * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+            out[i] = y
+
+    def _integrateRK45(self, y, t, out, rtol, atol, maxSteps=100000):
+        f = self.derivatives
+        h = np.full(self.n, 1.0 / (len(t) * 4.0) if len(t) > 1 else 1e-3)
+        tm = np.full(self.n, t[0])
+        alive = np.ones(self.n, dtype=bool)
+        steps = 0
+        fy = f(y)  # first same as last: the last stage of an accepted step is the first stage of the next one
+        for i in range(1, len(t)):
+            # advance every member to the next output time, each with its own step size
+            while True:
+                active = alive & (tm < t[i] - 1e-12)
+                if not active.any():
+                    break
+                steps += 1
+                if steps > maxSteps:
+                    raise RuntimeError("RK45 did not reach t = {} in {} steps".format(t[i], maxSteps))
+                hs = np.where(active, np.minimum(h, t[i] - tm), 0.0)
+                k = [fy]
+                for s in range(1, 6):
+                    ys = y + hs[:, None] * sum(a * ki for a, ki in zip(DP_A[s], k))
+                    k.append(f(ys))
+                y5 = y + hs[:, None] * sum(b * ki for b, ki in zip(DP_B, k))
+                k.append(f(y5))
+                err = hs[:, None] * sum(e * ki for e, ki in zip(DP_E, k))
+                scale = atol + rtol * np.maximum(np.abs(y), np.abs(y5))
+                norm = np.sqrt(np.mean((err / scale) ** 2, axis=1))
+                failed = active & ~np.isfinite(norm)
+                if failed.any():
+                    # the member ran into a position that cannot be assembled
+                    alive &= ~failed
+                    y[failed] = np.nan
+                accept = active & np.isfinite(norm) & (norm <= 1.0)
+                y[accept] = y5[accept]
+                fy[accept] = k[6][accept]
+                fy[failed] = np.nan
+                tm[accept] += hs[accept]
+                factor = np.where(norm > 0, 0.9 * np.power(np.where(norm > 0, norm, 1.0), -0.2), 5.0)
+                factor = np.clip(np.nan_to_num(factor, nan=0.2), 0.2, 5.0)
+                # a step clipped to the output time should not shrink the next one
+                grow = accept & (hs < h)
+                h = np.where(active & ~grow, hs * factor, np.where(grow, np.maximum(h, hs * factor), h))
+            out[i] = y
+#endregion
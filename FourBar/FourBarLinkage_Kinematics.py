@@ -0,0 +1,513 @@
+#region imports
+import math
+from collections import namedtuple
+import numpy as np
+#endregion
+
+#region closed form position analysis
+"""
+Closed form position analysis of the four bar linkage.
+
+Positions are given in scene coordinates (y points down, as in the QGraphicsScene), but all angles follow the
+convention of RigidLink.linkAngle:  measured counter-clockwise from the +x axis with the y axis flipped to point up,
+and wrapped into [0, 2pi).
+
+The output angle is found from the intersection of two circles:  one of radius L2 (coupler) centered on the moving
+end of the input link and one of radius L3 (output link) centered on the output pivot.  In general there are two
+intersections, one for each assembly branch of the linkage.
+"""
+OPEN = 1  # output joint lies clockwise of the input joint as seen from the output pivot
+CROSSED = -1  # output joint lies counter-clockwise of the input joint as seen from the output pivot
+TWO_PI = 2.0 * math.pi
+
+
+def wrapAngle(angle):
+    """
+    Wrap an angle into [0, 2pi) like RigidLink.linkAngle does.
+    :param angle: angle in radians
+    :return: the wrapped angle in radians
+    """
+    angle = math.fmod(angle, TWO_PI)
+    return angle + TWO_PI if angle < 0 else angle
+
+
+def inputJoint(theta1, L1, p0x, p0y):
+    """
+    Scene coordinates of the moving end of the input link.
+    :param theta1: input angle (rad)
+    :param L1: input link length
+    :param p0x: x of the input pivot
+    :param p0y: y of the input pivot
+    :return: (x, y)
+    """
+    return p0x + L1 * math.cos(theta1), p0y - L1 * math.sin(theta1)
+
+
+def solveOutputAngle(theta1, L1, L2, L3, p0x, p0y, p1x, p1y, branch=OPEN):
+    """
+    Solve the output and coupler angles for a given input angle without iteration.
+    :param theta1: input angle (rad)
+    :param L1: input link length
+    :param L2: coupler (drag) link length
+    :param L3: output link length
+    :param p0x: x of the input pivot (Pivot0)
+    :param p0y: y of the input pivot (Pivot0)
+    :param p1x: x of the output pivot (Pivot1)
+    :param p1y: y of the output pivot (Pivot1)
+    :param branch: OPEN or CROSSED assembly
+    :return: (theta3, theta2), the output and coupler angles in rad, or None if the coupler cannot close the loop
+    """
+    bx, by = inputJoint(theta1, L1, p0x, p0y)
+    # vector from the output pivot to the input joint with y pointing up
+    ex = bx - p1x
+    ey = p1y - by
+    d = math.hypot(ex, ey)
+    if d == 0.0 or L3 == 0.0:
+        return None  # the output angle is undefined
+    cosGamma = (d * d + L3 * L3 - L2 * L2) / (2.0 * d * L3)
+    if abs(cosGamma) > 1.0 + 1e-12:
+        return None  # input joint out of reach of the coupler
+    gamma = math.acos(max(-1.0, min(1.0, cosGamma)))
+    theta3 = math.atan2(ey, ex) - branch * gamma
+    cx = p1x + L3 * math.cos(theta3)
+    cy = p1y - L3 * math.sin(theta3)
+    theta2 = math.atan2(by - cy, cx - bx)
+    return wrapAngle(theta3), wrapAngle(theta2)
+
+
+def branchOf(theta1, theta3, L1, L3, p0x, p0y, p1x, p1y):
+    """
+    Determine the assembly branch of an existing pose of the linkage.
+    :param theta1: input angle (rad)
+    :param theta3: output angle (rad)
+    :param L1: input link length
+    :param L3: output link length
+    :param p0x: x of the input pivot
+    :param p0y: y of the input pivot
+    :param p1x: x of the output pivot
+    :param p1y: y of the output pivot
+    :return: OPEN or CROSSED
+    """
+    bx, by = inputJoint(theta1, L1, p0x, p0y)
+    ex = bx - p1x
+    ey = p1y - by
+    cross = ex * math.sin(theta3) - ey * math.cos(theta3)
+    return OPEN if cross <= 0.0 else CROSSED
+#endregion
+
+#region vectorized position analysis
+LinkagePositions = namedtuple('LinkagePositions', ['theta1', 'theta3', 'theta2', 'xB', 'yB', 'xC', 'yC',
+                                                   'tracerX', 'tracerY', 'valid'])
+LinkagePositions.__doc__ = """
+Positions of the linkage over an array of input angles.  theta3/theta2 are the output/coupler angles, (xB, yB) the
+moving end of the input link, (xC, yC) the moving end of the output link and tracerX/tracerY are (4, N) arrays with
+the points recorded by Tracer0 ... Tracer3.  Entries where valid is False cannot be assembled and are NaN.
+"""
+
+
+def solvePositions(theta1, L1, L2, L3, p0x, p0y, p1x, p1y, branch=OPEN, tracers=True):
+    """
+    Vectorized version of solveOutputAngle for an array of input angles.  Nothing is looped over in Python, so a full
+    revolution at 0.01 degree resolution takes a few milliseconds.
+    :param theta1: array of input angles (rad)
+    :param L1: input link length
+    :param L2: coupler (drag) link length
+    :param L3: output link length
+    :param p0x: x of the input pivot (Pivot0)
+    :param p0y: y of the input pivot (Pivot0)
+    :param p1x: x of the output pivot (Pivot1)
+    :param p1y: y of the output pivot (Pivot1)
+    :param branch: OPEN or CROSSED assembly
+    :param tracers: if False, tracerX and tracerY are None (saves time when only the angles and joints are needed)
+    :return: a LinkagePositions tuple of arrays
+    """
+    theta1 = np.asarray(theta1, dtype=float)
+    xB = p0x + L1 * np.cos(theta1)
+    yB = p0y - L1 * np.sin(theta1)
+    ex = xB - p1x
+    ey = p1y - yB
+    d = np.hypot(ex, ey)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cosGamma = (d * d + L3 * L3 - L2 * L2) / (2.0 * d * L3)
+    valid = (d > 0.0) & (np.abs(cosGamma) <= 1.0 + 1e-12)
+    gamma = np.arccos(np.clip(np.where(valid, cosGamma, np.nan), -1.0, 1.0))
+    theta3 = np.arctan2(ey, ex) - branch * gamma
+    xC = p1x + L3 * np.cos(theta3)
+    yC = p1y - L3 * np.sin(theta3)
+    theta2 = np.arctan2(yB - yC, xC - xB)
+    xB = np.where(valid, xB, np.nan)
+    yB = np.where(valid, yB, np.nan)
+    tracerX = tracerY = None
+    if tracers:
+        xMid = (xB + xC) / 2.0
+        yMid = (yB + yC) / 2.0
+        tracerX = np.stack((xC, xB, xMid, (xMid + xC) / 2.0))
+        tracerY = np.stack((yC, yB, yMid, (yMid + yC) / 2.0))
+    return LinkagePositions(theta1, np.mod(theta3, TWO_PI), np.mod(theta2, TWO_PI), xB, yB, xC, yC,
+                            tracerX, tracerY, valid)
+
+
+def sweepPositions(L1, L2, L3, p0x, p0y, p1x, p1y, branch=OPEN, step=0.01, start=0.0, stop=360.0):
+    """
+    Solve the linkage over a range of input angles.
+    :param step: input angle increment (deg)
+    :param start: first input angle (deg)
+    :param stop: last input angle (deg), not included
+    :return: a LinkagePositions tuple of arrays
+    """
+    theta1 = np.radians(np.arange(start, stop, step))
+    return solvePositions(theta1, L1, L2, L3, p0x, p0y, p1x, p1y, branch)
+#endregion
+
+#region velocity and acceleration analysis
+def velocityRatios(theta1, theta2, theta3, L1, L2, L3):
+    """
+    Angular velocity ratios of the coupler and output link with respect to the input link, from differentiating the
+    loop closure equation.  Works on scalars or arrays.
+    :param theta1: input angle (rad)
+    :param theta2: coupler angle (rad)
+    :param theta3: output angle (rad)
+    :return: (K2, K3) = (dtheta2/dtheta1, dtheta3/dtheta1)
+    """
+    s23 = L1 / np.sin(theta2 - theta3)
+    K2 = s23 * np.sin(theta3 - theta1) / L2
+    K3 = s23 * np.sin(theta2 - theta1) / L3
+    return K2, K3
+
+
+def accelerationRatios(theta1, theta2, theta3, L1, L2, L3, K2=None, K3=None):
+    """
+    Derivatives of the velocity ratios with respect to the input angle, i.e. the angular accelerations of the coupler
+    and output link for a unit input speed and zero input acceleration.  Works on scalars or arrays.
+    :param K2, K3: velocity ratios if they are already known
+    :return: (dK2/dtheta1, dK3/dtheta1)
+    """
+    if K2 is None or K3 is None:
+        K2, K3 = velocityRatios(theta1, theta2, theta3, L1, L2, L3)
+    s23 = np.sin(theta2 - theta3)
+    dK2 = (L3 * K3 ** 2 - L1 * np.cos(theta1 - theta3) - L2 * K2 ** 2 * np.cos(theta2 - theta3)) / (L2 * s23)
+    dK3 = (L3 * K3 ** 2 * np.cos(theta3 - theta2) - L1 * np.cos(theta1 - theta2) - L2 * K2 ** 2) / (L3 * s23)
+    return dK2, dK3
+
+
+def jerkRatios(theta1, theta2, theta3, L1, L2, L3, K2, K3, dK2, dK3):
+    """
+    Second derivatives of the velocity ratios with respect to the input angle, from differentiating the loop closure
+    L1 e^(i theta1) + L2 e^(i theta2) - L3 e^(i theta3) = const three times.  Needed for the Jacobian of the dynamics.
+    Works on scalars or arrays.
+    :return: (d2K2/dtheta1^2, d2K3/dtheta1^2)
+    """
+    e1, e2, e3 = np.exp(1j * theta1), np.exp(1j * theta2), np.exp(1j * theta3)
+    # i (ddK2 L2 e2 - ddK3 L3 e3) = R, with everything that does not depend on ddK2, ddK3 in R
+    R = (1j * L1 * e1 + L2 * (1j * K2 ** 3 + 3.0 * K2 * dK2) * e2
+         - L3 * (1j * K3 ** 3 + 3.0 * K3 * dK3) * e3)
+    S = -1j * R
+    s23 = np.sin(theta2 - theta3)
+    ddK2 = (S * np.conj(e3)).imag / (L2 * s23)
+    ddK3 = (S * np.conj(e2)).imag / (L3 * s23)
+    return ddK2, ddK3
+#endregion
+
+#region Grashof classification, reachable range and transmission angle
+CRANK_ROCKER = 0  # input link fully rotates, output rocks
+DOUBLE_CRANK = 1  # both input and output fully rotate (drag link)
+ROCKER_CRANK = 2  # output fully rotates, input rocks
+GRASHOF_DOUBLE_ROCKER = 3  # coupler fully rotates, input and output rock
+CHANGE_POINT = 4  # s + l = p + q, the links can line up and the linkage can switch branches
+TRIPLE_ROCKER = 5  # non-Grashof, no link fully rotates
+GRASHOF_NAMES = ('crank-rocker', 'double-crank', 'rocker-crank', 'Grashof double-rocker', 'change-point',
+                 'triple-rocker')
+
+
+def grashofClass(L0, L1, L2, L3, tol=1e-9):
+    """
+    Grashof classification of the linkage from its link lengths.
+    :param L0: ground link length (distance between the pivots)
+    :param L1: input link length
+    :param L2: coupler (drag) link length
+    :param L3: output link length
+    :param tol: relative tolerance of the change-point test s + l = p + q
+    :return: one of CRANK_ROCKER, DOUBLE_CRANK, ROCKER_CRANK, GRASHOF_DOUBLE_ROCKER, CHANGE_POINT, TRIPLE_ROCKER
+    """
+    lengths = (L0, L1, L2, L3)
+    shortest = min(range(4), key=lambda i: lengths[i])
+    s, p, q, l = sorted(lengths)
+    if abs((s + l) - (p + q)) <= tol * l:
+        return CHANGE_POINT
+    if s + l > p + q:
+        return TRIPLE_ROCKER
+    return (DOUBLE_CRANK, CRANK_ROCKER, GRASHOF_DOUBLE_ROCKER, ROCKER_CRANK)[shortest]
+
+
+def feasibleIntervals(L1, L2, L3, p0x, p0y, p1x, p1y, margin=1e-9):
+    """
+    Exact input angles where the linkage can be assembled.  The coupler closes the loop when the distance d from the
+    output pivot to the input joint satisfies |L2 - L3| <= d <= L2 + L3, and with a = the direction from the output
+    pivot to the input pivot,  d^2 = L0^2 + L1^2 + 2 L0 L1 cos(theta1 - a),  so the limits are two arccos values.
+    The ends of the intervals are the limit (dead) positions of the input, where the coupler and output link line up.
+    :param margin: the intervals are shrunk by this much (rad) so their ends still solve despite rounding
+    :return: list of (start, end) in rad with 0 <= start < 2pi and start < end <= start + 2pi, [(0, 2pi)] if the input
+             link fully rotates and [] if the linkage cannot be assembled at all
+    """
+    gx, gy = p0x - p1x, p0y - p1y
+    L0 = math.hypot(gx, gy)
+    dMin, dMax = abs(L2 - L3), L2 + L3
+    if L0 * L1 == 0.0:
+        # d does not depend on the input angle
+        return [(0.0, TWO_PI)] if dMin <= L0 + L1 <= dMax else []
+    cHi = (dMax ** 2 - L0 ** 2 - L1 ** 2) / (2.0 * L0 * L1)
+    cLo = (dMin ** 2 - L0 ** 2 - L1 ** 2) / (2.0 * L0 * L1)
+    if cHi < -1.0 or cLo > 1.0:
+        return []
+    # allowed ranges of x = theta1 - a with cLo <= cos(x) <= cHi
+    if cHi >= 1.0 and cLo <= -1.0:
+        return [(0.0, TWO_PI)]
+    if cLo <= -1.0:
+        xs = [(math.acos(cHi), TWO_PI - math.acos(cHi))]
+    elif cHi >= 1.0:
+        xs = [(-math.acos(cLo), math.acos(cLo))]
+    else:
+        xs = [(math.acos(cHi), math.acos(cLo)), (TWO_PI - math.acos(cLo), TWO_PI - math.acos(cHi))]
+    a = math.atan2(-gy, gx)
+    intervals = []
+    for x0, x1 in xs:
+        if x1 - x0 > 2.0 * margin:
+            start = wrapAngle(a + x0 + margin)
+            intervals.append((start, start + (x1 - x0) - 2.0 * margin))
+    return sorted(intervals)
+
+
+def outputToggleAngles(L1, L2, L3, p0x, p0y, p1x, p1y, branch=OPEN, tol=1e-7):
+    """
+    Input angles of the toggle positions of the output link, where the input link and the coupler line up (stretched
+    out or folded), the output velocity ratio K3 is zero and a rocking output link reverses.  The output joint is then
+    at distance L1 + L2 or |L1 - L2| from the input pivot, so it is an intersection of two circles.
+    :param branch: only toggle positions on this assembly branch are returned
+    :return: sorted list of input angles (rad)
+    """
+    dx, dy = p0x - p1x, p0y - p1y
+    L0 = math.hypot(dx, dy)
+    angles = []
+    if L0 == 0.0:
+        return angles
+    for r, folded in ((L1 + L2, False), (abs(L1 - L2), L2 > L1)):
+        # intersections of the circle of radius r about the input pivot with the circle of radius L3 about the output
+        # pivot, measured from the output pivot
+        along = (L0 ** 2 + L3 ** 2 - r ** 2) / (2.0 * L0)
+        h2 = L3 ** 2 - along ** 2
+        if h2 < 0.0 or r == 0.0:
+            continue
+        h = math.sqrt(h2)
+        for sign in ((1.0, -1.0) if h > 0.0 else (1.0,)):
+            cx = p1x + (along * dx - sign * h * dy) / L0
+            cy = p1y + (along * dy + sign * h * dx) / L0
+            theta1 = wrapAngle(math.atan2(-(cy - p0y), cx - p0x) + (math.pi if folded else 0.0))
+            solution = solveOutputAngle(theta1, L1, L2, L3, p0x, p0y, p1x, p1y, branch)
+            if solution is None:
+                continue
+            theta3 = solution[0]
+            if math.hypot(p1x + L3 * math.cos(theta3) - cx, p1y - L3 * math.sin(theta3) - cy) <= tol * (L0 + r + L3):
+                angles.append(theta1)
+    return sorted(angles)
+
+
+def limitIntervals(intervals, lower, upper):
+    """
+    Intersect feasible intervals with the input angles lower ... upper.
+    :param intervals: sorted list of (start, end) as from feasibleIntervals, start in [0, 2pi), end - start <= 2pi
+    :param lower: smallest allowed input angle (rad, in [0, 2pi])
+    :param upper: largest allowed input angle (rad, in [0, 2pi]), the range does not wrap through 0
+    :return: sorted list of (start, end), empty if nothing is left;  intervals that touch are merged, so a range
+             that still covers the whole circle is [(0, 2pi)]
+    """
+    pieces = []
+    for start, end in intervals:
+        # an interval may run past 2pi, so it can meet the allowed range in two places
+        for shift in (0.0, TWO_PI):
+            a, b = max(start, lower + shift), min(end, upper + shift)
+            if b > a:  # a range that only touches the interval adds no angles
+                pieces.append((a - shift, b - shift) if a >= TWO_PI else (a, b))
+    limited = []
+    for a, b in sorted(pieces):
+        if limited and a <= limited[-1][1]:
+            limited[-1] = (limited[-1][0], max(limited[-1][1], b))
+        else:
+            limited.append((a, b))
+    # the last interval may run on through 2pi into the first one
+    if len(limited) > 1 and limited[-1][1] >= TWO_PI and limited[0][0] <= limited[-1][1] - TWO_PI:
+        first = limited.pop(0)
+        limited[-1] = (limited[-1][0], max(limited[-1][1], first[1] + TWO_PI))
+    if limited and limited[-1][1] - limited[-1][0] >= TWO_PI:
+        return [(0.0, TWO_PI)]
+    return limited
+
+
+class ReachableRange():
+    def __init__(self, L1, L2, L3, p0x, p0y, p1x, p1y, branch=OPEN, angleLimits=None):
+        """
+        Grashof class, feasible input angle intervals, input limit positions and output toggle positions of a
+        linkage, computed in closed form once per geometry, so an input angle can be checked and clamped to the
+        reachable range in constant time instead of by a solve that fails.
+        :param angleLimits: (lower, upper) input angles (rad) the input link is kept between, on top of what the
+                            geometry allows, or None;  their ends become limit positions
+        """
+        self.key = (L1, L2, L3, p0x, p0y, p1x, p1y, branch)
+        self.angleLimits = angleLimits
+        self.grashof = grashofClass(math.hypot(p1x - p0x, p1y - p0y), L1, L2, L3)
+        self.intervals = feasibleIntervals(L1, L2, L3, p0x, p0y, p1x, p1y)
+        if angleLimits is not None:
+            self.intervals = limitIntervals(self.intervals, *angleLimits)
+        self.fullRotation = self.intervals == [(0.0, TWO_PI)]
+        self.limits = [] if self.fullRotation else sorted(wrapAngle(end) for interval in self.intervals
+                                                          for end in interval)
+        self.toggles = outputToggleAngles(L1, L2, L3, p0x, p0y, p1x, p1y, branch)
+
+    def name(self):
+        return GRASHOF_NAMES[self.grashof]
+
+    def interval(self, theta1):
+        """
+        :return: the feasible interval that holds input angle theta1 (rad), or None
+        """
+        for start, end in self.intervals:
+            if (theta1 - start) % TWO_PI <= end - start:
+                return start, end
+        return None
+
+    def contains(self, theta1):
+        return self.fullRotation or self.interval(theta1) is not None
+
+    def clamp(self, theta1, previous=None):
+        """
+        The reachable input angle closest to theta1.  When the input link was at previous, it stays in the interval of
+        previous, so dragging past a dead point stops there instead of jumping to another interval.
+        :param theta1: requested input angle (rad)
+        :param previous: the current input angle (rad), if any
+        :return: theta1 if it is reachable (from the interval of previous), otherwise the nearest end of that interval
+                 or, without one, of any feasible interval (wrapped into [0, 2pi)), or None if the linkage cannot be
+                 assembled at all
+        """
+        if self.fullRotation:
+            return theta1
+        if not self.intervals:
+            return None
+        current = None if previous is None else self.interval(previous)
+        if current is None:
+            if self.interval(theta1) is not None:
+                return theta1
+        elif (theta1 - current[0]) % TWO_PI <= current[1] - current[0]:
+            return theta1
+        best, bestDistance = None, math.inf
+        for interval in (self.intervals if current is None else (current,)):
+            for end in interval:
+                distance = abs(math.remainder(theta1 - end, TWO_PI))
+                if distance < bestDistance:
+                    best, bestDistance = end, distance
+        return wrapAngle(best)
+
+
+def transmissionAngle(theta2, theta3):
+    """
+    Transmission angle at the output joint:  the angle between the coupler and the output link, in [0, pi].  The
+    linkage transmits force best at pi/2 and locks up near 0 or pi.  Works on scalars or arrays.
+    :param theta2: coupler angle (rad)
+    :param theta3: output angle (rad)
+    :return: the transmission angle (rad)
+    """
+    return np.arccos(np.cos(theta2 - theta3))
+#endregion
+
+#region coupler curve analysis
+TRACER_FRACTIONS = (1.0, 0.0, 0.5, 0.75)  # where Tracer0 ... Tracer3 sit along the coupler, from B (0) to C (1)
+CycleAnalysis = namedtuple('CycleAnalysis', ['positions', 'K2', 'K3', 'dK2', 'dK3', 'omega2', 'omega3', 'alpha2',
+                                             'alpha3', 'tracerVx', 'tracerVy', 'tracerAx', 'tracerAy',
+                                             'transmission', 'mechanicalAdvantage'])
+CycleAnalysis.__doc__ = """
+Motion of the linkage over a range of input angles.  positions is the LinkagePositions tuple, K2/K3 and dK2/dK3 the
+velocity and acceleration ratios of the coupler/output, omega2/omega3 and alpha2/alpha3 their angular velocities and
+accelerations at the given input speed and acceleration, tracerVx ... tracerAy (4, N) arrays with the velocities and
+accelerations of Tracer0 ... Tracer3 (scene units, y down), transmission the transmission angle and
+mechanicalAdvantage the output to input torque ratio 1/K3 of the lossless linkage.  Entries where the linkage cannot
+be assembled are NaN.
+"""
+
+
+def tracerDerivatives(theta1, theta2, L1, L2, K2, dK2, fractions=TRACER_FRACTIONS):
+    """
+    First and second derivatives of points on the coupler with respect to the input angle.  A point at fraction f of
+    the coupler is P = B + f L2 (cos theta2, -sin theta2) in scene coordinates.  Works on arrays.
+    :param fractions: positions of the points along the coupler, from B (0) to C (1)
+    :return: (dPx, dPy, d2Px, d2Py), each a (len(fractions), N) array
+    """
+    f = np.asarray(fractions, dtype=float)[:, np.newaxis]
+    s1, c1 = np.sin(theta1), np.cos(theta1)
+    s2, c2 = np.sin(theta2), np.cos(theta2)
+    dPx = -L1 * s1 - f * (L2 * K2 * s2)
+    dPy = -L1 * c1 - f * (L2 * K2 * c2)
+    d2Px = -L1 * c1 - f * (L2 * (dK2 * s2 + K2 ** 2 * c2))
+    d2Py = L1 * s1 - f * (L2 * (dK2 * c2 - K2 ** 2 * s2))
+    return dPx, dPy, d2Px, d2Py
+
+
+def analyzeCycle(L1, L2, L3, p0x, p0y, p1x, p1y, branch=OPEN, step=0.5, start=0.0, stop=360.0, omega=1.0, alpha=0.0):
+    """
+    Positions, velocities, accelerations, transmission angle and mechanical advantage over a range of input angles in
+    one vectorized pass, e.g. to find the dead points of a linkage without dragging it around.
+    :param step: input angle increment (deg)
+    :param start: first input angle (deg)
+    :param stop: last input angle (deg), not included
+    :param omega: input angular velocity (rad/s)
+    :param alpha: input angular acceleration (rad/s^2)
+    :return: a CycleAnalysis tuple of arrays
+    """
+    pos = sweepPositions(L1, L2, L3, p0x, p0y, p1x, p1y, branch, step, start, stop)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        K2, K3 = velocityRatios(pos.theta1, pos.theta2, pos.theta3, L1, L2, L3)
+        dK2, dK3 = accelerationRatios(pos.theta1, pos.theta2, pos.theta3, L1, L2, L3, K2, K3)
+        mechanicalAdvantage = 1.0 / K3
+    dPx, dPy, d2Px, d2Py = tracerDerivatives(pos.theta1, pos.theta2, L1, L2, K2, dK2)
+    omega2 = np.square(omega)
+    return CycleAnalysis(pos, K2, K3, dK2, dK3, K2 * omega, K3 * omega, dK2 * omega2 + K2 * alpha,
+                         dK3 * omega2 + K3 * alpha, dPx * omega, dPy * omega, d2Px * omega2 + dPx * alpha,
+                         d2Py * omega2 + dPy * alpha, transmissionAngle(pos.theta2, pos.theta3), mechanicalAdvantage)
+#endregion
+
+#region lookup table
+class PositionTable():
+    def __init__(self, L1, L2, L3, p0x, p0y, p1x, p1y, branch=OPEN, n=7200):
+        """
+        Dense table of the linkage positions over a full revolution of the input link, so the output angle for any
+        input angle is a constant time interpolation instead of a solve.  Cells next to input angles where the linkage
+        cannot be assembled give None, so the caller can fall back to solveOutputAngle near dead points.
+        Only the output angle is tabulated:  the joints follow from the two angles with four cos/sin calls, about what
+        interpolating four tabulated coordinates would cost, and so the links stay exactly rigid instead of following
+        the chords between samples.  A lookup takes about 0.45 us in CPython; a 'table' solve of FourBarLinkage_Core,
+        which also checks that the table still matches the geometry, about 1 us against 3 us for the closed form.
+        :param n: number of cells over 2pi
+        """
+        self.key = (L1, L2, L3, p0x, p0y, p1x, p1y, branch)
+        self.n = n
+        self.step = TWO_PI / n
+        self.scale = n / TWO_PI
+        self.positions = solvePositions(np.arange(n + 1) * self.step, L1, L2, L3, p0x, p0y, p1x, p1y, branch)
+        theta3 = self.positions.theta3
+        # change of the output angle across each cell, taking the short way around the circle
+        delta = np.mod(np.diff(theta3) + math.pi, TWO_PI) - math.pi
+        # plain lists are faster than numpy for one value at a time; the extra cell catches theta1 % 2pi rounding to 2pi
+        self.base = theta3.tolist()
+        self.delta = delta.tolist() + [delta[-1]]
+
+    def lookup(self, theta1):
+        """
+        Interpolate the output angle.
+        :param theta1: input angle (rad)
+        :return: the output angle (rad) or None if the cell touches a position that cannot be assembled
+        """
+        x = theta1 % TWO_PI * self.scale
+        i = int(x)
+        d = self.delta[i]
+        if d != d:
+            return None
+        angle = self.base[i] + (x - i) * d
+        return angle if 0.0 <= angle < TWO_PI else angle % TWO_PI
+#endregion
@@ -3,8 +3,9 @@ import PyQt5.QtGui as qtg
 import PyQt5.QtCore as qtc
 import PyQt5.QtWidgets as qtw
 import math
-from scipy import optimize
-from copy import deepcopy as dc
+import numpy as np
+import FourBarLinkage_Kinematics as kin
+from FourBarLinkage_Core import FourBarLinkage_Core, LinkCore, SpringCore, DashPotCore, TracerCore
 #endregion
 
 #region four bar linkage classes in MVC Pattern
@@ -14,13 +15,56 @@ display of the state of the object (view) to the user/GUI/CLI.  The controller m
 view caused by a change in state of the model or user interaction with the view (e.g., mouse movement or clicks).
 """
 #region model and supporting classes
+def coreProperty(name):
+    """
+    Make a property that reads and writes attribute name of self.core, so the graphics items can be used exactly as
+    before while their state lives in the Qt-free core objects of FourBarLinkage_Core.
+    """
+    return property(lambda self: getattr(self.core, name), lambda self, value: setattr(self.core, name, value))
+
+
+#region shared drawing resources
+"""
+Pens, brushes and fonts that never change are made once and shared by all items, so paint() does not allocate them on
+every repaint.  Fonts are made on first use because a QFont needs the QApplication.
+"""
+NO_PEN = qtg.QPen(qtc.Qt.NoPen)
+BLACK_PEN = qtg.QPen(qtg.QColor("black"))
+BLACK_BRUSH = qtg.QBrush(qtc.Qt.black)
+HATCH_BRUSH = qtg.QBrush(qtc.Qt.BDiagPattern)
+HATCH_BRUSH.setTransform(qtg.QTransform.fromScale(0.5, 0.5))
+_fonts = {}
+
+
+def roundOut(value, step=8.0):
+    """
+    Round a non-negative extent up to a multiple of step.  Items that stretch every frame round their bounding rect
+    out this way, so it only changes (and the scene only re-indexes the item) every few frames.
+    """
+    return math.ceil(value / step) * step
+
+
+def sharedFont(family, size, weight=-1):
+    """
+    A QFont shared by every item that asks for the same family, point size and weight.
+    """
+    key = (family, size, weight)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = qtg.QFont(family, size, weight)
+    return font
+#endregion
+
+
 class RigidLink(qtw.QGraphicsItem):
     def __init__(self, stX=0, stY=0, enX=1, enY=1, radius=10, mass=10,
                  parent=None, pen=None, brush=None, name='RigidLink',
-                 label_pen=qtg.QPen(qtc.Qt.black)):
+                 label_pen=qtg.QPen(qtc.Qt.black), core=None):
         """
         This is a custom class for drawing a rigid link.  The paint function executes every time
         the scene updates.  See header comment in your original for full details.
+        The geometry lives in a LinkCore (core), this item only draws it.  If no core is given, one is made from
+        stX, stY, enX, enY and mass.
         """
         super().__init__(parent)
 
@@ -31,126 +75,156 @@ class RigidLink(qtw.QGraphicsItem):
         self.name      = name
 
         # step 1: define start/end points
-        self.stPt = qtc.QPointF(stX, stY)
-        self.enPt = qtc.QPointF(enX, enY)
-        # ─── LEGACY ALIAS ───────────────────────────────────────────────
-        # allow references to .endPt to work exactly like .enPt
-        self.endPt = self.enPt
-        # ────────────────────────────────────────────────────────────────
+        self.core = LinkCore(stX, stY, enX, enY, mass) if core is None else core
 
         self.radius = radius
-        self.mass   = mass  # assume uniform distribution
 
         # step 2: compute current angle & length
-        self.angle = self.linkAngle()
+        self.linkAngle()
+
+        # step 3: bounding rect, transform and glyph (body path etc.), kept up to date by syncGeometry
+        self.centerPen = qtg.QPen(self.pen.color()) if self.pen else qtg.QPen()
+        self.centerPen.setStyle(qtc.Qt.DashDotLine)
+        r, g, b, a = self.centerPen.color().getRgb()
+        self.centerPen.setColor(qtg.QColor(r, g, b, 128))
+        self.centerPen.setWidth(1)
+        self.glyphKey = None
+        self.rectKey = None
+        self.rect = qtc.QRectF()
+        self.transform = qtg.QTransform()
+        self.syncGeometry()
 
-        # step 3: initial bounding rect (will be updated in paint)
-        self.rect = qtc.QRectF(-self.radius, -self.radius,
-                               self.length + self.radius, self.radius)
+        # step 4: the tooltip is only built when the mouse is over the link
+        self.setAcceptHoverEvents(True)
 
-        # step 4: prepare transform
-        self.transform = qtg.QTransform()
-        self.transform.reset()
+    #region views of the core geometry
+    @property
+    def stPt(self):
+        return qtc.QPointF(self.core.stX, self.core.stY)
+
+    @stPt.setter
+    def stPt(self, pt):
+        self.core.setStart(pt.x(), pt.y())
+
+    @property
+    def enPt(self):
+        return qtc.QPointF(self.core.enX, self.core.enY)
+
+    @enPt.setter
+    def enPt(self, pt):
+        self.core.setEnd(pt.x(), pt.y())
+
+    # ─── LEGACY ALIAS ───────────────────────────────────────────────
+    # allow references to .endPt to work exactly like .enPt
+    endPt = enPt
+    # ────────────────────────────────────────────────────────────────
+
+    length = coreProperty('length')
+    angle = coreProperty('angle')
+    mass = coreProperty('mass')  # assume uniform distribution
+    #endregion
 
     def boundingRect(self):
-        return self.transform.mapRect(self.rect)
+        # item coordinates: the transform is already applied by the scene
+        return self.rect
+
+    def syncGeometry(self):
+        """
+        Bring the item's bounding rect and transform up to date with the core.  Qt repaints only the area the link
+        left and the area it moved to.
+        """
+        pad = self.radius + (self.pen.widthF() if self.pen else 1.0)
+        if self.rectKey != (self.core.length, pad):
+            self.rectKey = (self.core.length, pad)
+            self.prepareGeometryChange()
+            self.rect = qtc.QRectF(-pad, -pad, self.core.length + 2 * pad, 2 * pad)
+        if self.glyphKey != (self.core.length, self.radius):
+            self.buildGlyph()
+        # rotate then translate
+        self.transform.reset()
+        self.transform.translate(self.core.stX, self.core.stY)
+        self.transform.rotate(-self.core.AngleDeg())
+        self.setTransform(self.transform)
+
+    def buildGlyph(self):
+        """
+        Build the body path, centerline, pivot circles and label rect for the current length and radius.  They only
+        change when the length of the link does, so dragging the linkage just reuses them.
+        """
+        length = self.core.length
+        radius = self.radius
+
+        # bounding circles
+        rectSt = qtc.QRectF(-radius, -radius, 2*radius, 2*radius)
+        rectEn = qtc.QRectF(length - radius, -radius, 2*radius, 2*radius)
+
+        # link body
+        path = qtg.QPainterPath()
+        path.arcMoveTo(rectSt, 90);  path.arcTo(rectSt, 90, 180)
+        path.lineTo(length, radius)
+        path.arcMoveTo(rectEn, 270); path.arcTo(rectEn, 270, 180)
+        path.lineTo(0, -radius)
+        self.bodyPath = path
+
+        self.centerLine = qtc.QLineF(0, 0, length, 0)
+        self.pivotSt = qtc.QRectF(-radius/6, -radius/6, radius/3, radius/3)
+        self.pivotEn = qtc.QRectF(length - radius/6, -radius/6, radius/3, radius/3)
+        self.labelRect = qtc.QRectF(-radius, -radius, length + 2*radius, 2*radius)
+        self.labelFont = sharedFont("Times", radius)
+        self.glyphKey = (length, radius)
+
+    def hoverEnterEvent(self, event):
+        self.setToolTip(self.toolTipText())
+        super().hoverEnterEvent(event)
+
+    def toolTipText(self):
+        return (f"{self.name}\n"
+                f"start: ({self.core.stX:.3f},{self.core.stY:.3f})\n"
+                f"end:   ({self.core.enX:.3f},{self.core.enY:.3f})\n"
+                f"length: {self.core.length:.3f}\n"
+                f"angle:  {self.core.angle*180/math.pi:.3f}")
 
     def deltaY(self):
-        self.DY = self.enPt.y() - self.stPt.y()
+        self.DY = self.core.deltaY()
         return self.DY
 
     def deltaX(self):
-        self.DX = self.enPt.x() - self.stPt.x()
+        self.DX = self.core.deltaX()
         return self.DX
 
     def linkLength(self):
-        self.length = math.hypot(self.deltaX(), self.deltaY())
-        return self.length
+        return self.core.linkLength()
 
     def linkAngle(self):
-        self.linkLength()
-        if self.length == 0:
-            self.angle = 0
-        else:
-            self.angle = math.acos(self.DX / self.length)
-            if self.DY > 0:
-                self.angle *= -1
-        # wrap into [0,2π)
-        while self.angle < 0:
-            self.angle += 2 * math.pi
-        while self.angle >= 2 * math.pi:
-            self.angle -= 2 * math.pi
-        return self.angle
+        return self.core.linkAngle()
 
     def AngleDeg(self):
-        return self.angle * 180.0 / math.pi
+        return self.core.AngleDeg()
 
     def paint(self, painter, option, widget=None):
         """
         Draw a semicircle at the start, a centerline, the body of the link, semicircle at the end,
-        pivots, name, and apply the proper rotation + translation.
+        pivots and name.  The rotation + translation is applied by syncGeometry and the shapes are cached by
+        buildGlyph, so paint only draws them.
         """
-        path = qtg.QPainterPath()
-        length = self.linkLength()
-        angDeg = self.linkAngle() * 180.0 / math.pi
-
-        # bounding circles
-        rectSt = qtc.QRectF(-self.radius, -self.radius,
-                             2*self.radius, 2*self.radius)
-        rectEn = qtc.QRectF(self.length - self.radius, -self.radius,
-                             2*self.radius, 2*self.radius)
-
         # centerline (dashed)
-        centerPen = qtg.QPen(self.pen.color())
-        centerPen.setStyle(qtc.Qt.DashDotLine)
-        r, g, b, a = self.pen.color().getRgb()
-        centerPen.setColor(qtg.QColor(r, g, b, 128))
-        centerPen.setWidth(1)
-        painter.setPen(centerPen)
-        painter.drawLine(qtc.QPointF(0,0), qtc.QPointF(length,0))
-
-        # build link body
-        path.arcMoveTo(rectSt, 90);  path.arcTo(rectSt, 90, 180)
-        path.lineTo(self.length, self.radius)
-        path.arcMoveTo(rectEn, 270); path.arcTo(rectEn, 270, 180)
-        path.lineTo(0, -self.radius)
+        painter.setPen(self.centerPen)
+        painter.drawLine(self.centerLine)
 
         # draw body
         if self.pen:   painter.setPen(self.pen)
         if self.brush: painter.setBrush(self.brush)
-        painter.drawPath(path)
+        painter.drawPath(self.bodyPath)
 
         # draw pivot circles
-        pivotSt = qtc.QRectF(-self.radius/6, -self.radius/6,
-                             self.radius/3, self.radius/3)
-        pivotEn = qtc.QRectF(self.length - self.radius/6, -self.radius/6,
-                             self.radius/3, self.radius/3)
-        painter.drawEllipse(pivotSt)
-        painter.drawEllipse(pivotEn)
-
-        # update bounding rect for picking
-        self.rect = qtc.QRectF(-self.radius, -self.radius,
-                               self.length + 2*self.radius, 2*self.radius)
+        painter.drawEllipse(self.pivotSt)
+        painter.drawEllipse(self.pivotEn)
 
         # draw label
-        painter.setBrush(qtg.QBrush(qtc.Qt.black))
+        painter.setBrush(BLACK_BRUSH)
         painter.setPen(self.label_pen)
-        painter.setFont(qtg.QFont("Times", self.radius))
-        painter.drawText(self.rect, qtc.Qt.AlignCenter, self.name)
-
-        # apply transformation: rotate then translate
-        self.transform.reset()
-        self.transform.translate(self.stPt.x(), self.stPt.y())
-        self.transform.rotate(-angDeg)
-        self.setTransform(self.transform)
-
-        # update tooltip
-        info = (f"{self.name}\n"
-                f"start: ({self.stPt.x():.3f},{self.stPt.y():.3f})\n"
-                f"end:   ({self.enPt.x():.3f},{self.enPt.y():.3f})\n"
-                f"length: {self.length:.3f}\n"
-                f"angle:  {self.angle*180/math.pi:.3f}")
-        self.setToolTip(info)
+        painter.setFont(self.labelFont)
+        painter.drawText(self.labelRect, qtc.Qt.AlignCenter, self.name)
 
 class RigidPivotPoint(qtw.QGraphicsItem):
     def __init__(self, ptX=0, ptY=0, pivotHeight=10, pivotWidth=10, parent=None, pen=None, brush=None, rotation=0,
@@ -179,25 +253,62 @@ class RigidPivotPoint(qtw.QGraphicsItem):
         self.height = pivotHeight
         self.width = pivotWidth
         self.radius = min(self.height, self.width) / 4
-        self.rect = qtc.QRectF(self.x - self.width / 2, self.y - self.radius, self.width, self.height + self.radius)
+        self.rect = qtc.QRectF()
         self.rotationAngle = rotation
-        self.name = name
+        self._name = name
         self.transformation = qtg.QTransform()
-        stTT = self.name + "\nx={:0.3f}, y={:0.3f}".format(self.x, self.y)
-        self.setToolTip(stTT)
+        self.buildGlyph()
+        self.syncGeometry()
+        # the tooltip is only built when the mouse is over the pivot
+        self.setAcceptHoverEvents(True)
+        # pivots never move, so keep their rendering in a pixmap until the zoom or the name changes
+        self.setCacheMode(qtw.QGraphicsItem.DeviceCoordinateCache)
         # self.tag_location = args['tag_location']
 
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+        self.update()  # also drops the cached pixmap
+
     def boundingRect(self):
-        bounding_rect = self.transformation.mapRect(self.rect)
-        return bounding_rect
+        # item coordinates: the transform is already applied by the scene
+        return self.rect
+
+    def syncGeometry(self):
+        """
+        Bring the bounding rect (plate, ground line and hatched support) and the transform up to date with x, y and
+        rotationAngle.
+        """
+        pad = self.pen.widthF() if self.pen is not None else 1.0
+        plateRadius = min(self.height, self.width) / 2
+        rect = qtc.QRectF(-self.width - pad, -plateRadius - pad,
+                          self.width * 2 + 2 * pad, self.height * 2 + plateRadius + 2 * pad)
+        if rect != self.rect:
+            self.prepareGeometryChange()
+            self.rect = rect
+        self.transformation.reset()
+        self.transformation.translate(self.x, self.y)
+        self.transformation.rotate(self.rotationAngle)
+        self.setTransform(self.transformation)
 
     def rotate(self, angle):
         self.rotationAngle = angle
+        self.syncGeometry()
 
-    def paint(self, painter, option, widget=None):
+    def hoverEnterEvent(self, event):
+        self.setToolTip(self.name + "\nx={:0.3f}, y={:0.3f}".format(self.x, self.y))
+        super().hoverEnterEvent(event)
+
+    def buildGlyph(self):
+        """
+        Build the plate path and the ground symbol once; the pivot never changes shape.
+        """
         path = qtg.QPainterPath()
         radius = min(self.height, self.width) / 2
-        name = self.name
         H = math.sqrt(math.pow(self.width / 2, 2) + math.pow(self.height, 2))
         phi = math.asin(radius / H)
         theta = math.asin(self.height / H)
@@ -218,75 +329,305 @@ class RigidPivotPoint(qtw.QGraphicsItem):
         y4 = +self.height
         path.lineTo(x4, y4)
         # path.arcTo(pivotRect,ang*180/math.pi, 90)
+        self.platePath = path
+
+        self.pivotPtRect = qtc.QRectF(-radius / 4, -radius / 4, radius / 2, radius / 2)
+        x5 = -self.width
+        x6 = +self.width
+        self.groundLine = qtc.QLineF(x5, y4, x6, y4)
+        self.support = qtc.QRectF(x5, y4, self.width * 2, self.height)
+        self.labelFont = sharedFont("Arial", 3)
+
+    def paint(self, painter, option, widget=None):
         if self.pen is not None:
             painter.setPen(self.pen)  # Red color pen
         if self.brush is not None:
             painter.setBrush(self.brush)
-        painter.drawPath(path)
-
-        pivotPtRect = qtc.QRectF(-radius / 4, -radius / 4, radius / 2, radius / 2)
-        painter.drawEllipse(pivotPtRect)
-        x5 = -self.width
-        x6 = +self.width
+        painter.drawPath(self.platePath)
+        painter.drawEllipse(self.pivotPtRect)
 
         # Draw the symbol for the ground
-        painter.drawLine(x5, y4, x6, y4)
-
-        penOutline = qtg.QPen(qtc.Qt.NoPen)
-        hatchbrush = qtg.QBrush(qtc.Qt.BDiagPattern)
-        brushTransform = qtg.QTransform()
-        brushTransform.scale(0.5, 0.5)
-        hatchbrush.setTransform(brushTransform)
-        painter.setPen(penOutline)
-        painter.setBrush(hatchbrush)
-        painter.setFont(qtg.QFont("Arial", 3))
-        support = qtc.QRectF(x5, y4, self.width * 2, self.height)
-        painter.drawRect(support)
+        painter.drawLine(self.groundLine)
+        painter.setPen(NO_PEN)
+        painter.setBrush(HATCH_BRUSH)
+        painter.setFont(self.labelFont)
+        painter.drawRect(self.support)
 
         painter.setBrush(self.brush)
         painter.setPen(self.pen)
-        painter.drawText(support, qtc.Qt.AlignCenter, name)
-        self.rect = qtc.QRectF(-self.width, -self.radius, self.width * 2, self.height * 2 + self.radius)
-        self.transformation.reset()
-        self.transformation.translate(self.x, self.y)
-        self.transformation.rotate(self.rotationAngle)
-        self.setTransform(self.transformation)
-
-        self.transformation.reset()
+        painter.drawText(self.support, qtc.Qt.AlignCenter, self.name)
         # brPen=qtg.QPen()
         # brPen.setWidth(0)
         # painter.setPen(brPen)
         # painter.drawRect(self.boundingRect())
+
+
 class Tracer(qtw.QGraphicsItem):
-    def __init__(self, x=0, y=0, pen=None, penOutline = qtg.QPen(qtc.Qt.black)):
+    def __init__(self, x=0, y=0, pen=None, penOutline = qtg.QPen(qtc.Qt.black), core=None):
+        """
+        Draws the history of a TracerCore as a polyline.  The polyline and the bounding rect are cached and only
+        brought up to date by sync():  new points are appended and expired points are dropped from the front.  After
+        a full turnover of the buffer the polyline is rebuilt in one bulk copy, which also tightens the bounding rect.
+        """
         super().__init__()
-        self.pts = [qtc.QPointF(x, y)]
-        self.rect = qtc.QRectF(-5, -5, 10, 10)
+        self.core = TracerCore(x, y) if core is None else core
         self.pen = pen
         self.penOutline = penOutline
+        self.markerRadius = 2.5
+        self.padPen = pen.widthF() if pen is not None else 1.0
+        self.rect = qtc.QRectF()
+        self.rebuild()
 
     def boundingRect(self):
         bounding_rect = self.rect
         return bounding_rect
 
     def lastPt(self):
-        return self.pts[len(self.pts) - 1]
+        x, y = self.core.lastPt()
+        return qtc.QPointF(x, y)
+
+    def sync(self):
+        """
+        Bring the cached polyline and bounding rect up to date with the core.
+        """
+        core = self.core
+        new = core.total - self.synced
+        if new == 0 and core.version == self.version:
+            return
+        if core.version != self.version or new < 0 or new > core.count:
+            self.rebuild()  # the history was replaced
+            return
+        expired = max(0, core.total - core.capacity) - max(0, self.synced - core.capacity)
+        if expired > 0:
+            self.expired += expired
+            if self.expired >= core.capacity:
+                self.rebuild()
+                return
+            # repaint only the segments that disappear from the front of the polyline
+            self.updateSegments(0, expired + 1)
+            self.polyline.remove(0, expired)
+        # repaint from the old end marker through the new points
+        x = xMin = xMax = self.endX
+        y = yMin = yMax = self.endY
+        for i in range(core.head - new, core.head):
+            x = float(core.xs[i])
+            y = float(core.ys[i])
+            self.polyline.append(qtc.QPointF(x, y))
+            xMin, xMax = min(xMin, x), max(xMax, x)
+            yMin, yMax = min(yMin, y), max(yMax, y)
+        self.endX, self.endY = x, y
+        self.growBounds(xMin, yMin, xMax, yMax)
+        self.updateArea(xMin, yMin, xMax, yMax)
+        self.synced = core.total
+
+    def updateSegments(self, first, last):
+        """
+        Schedule a repaint of the area covered by points first ... last - 1 of the polyline (and the end marker).
+        """
+        if last <= first:
+            return
+        if last - first == 2:
+            # the usual case of one segment, without copying the polyline
+            a = self.polyline.at(first)
+            b = self.polyline.at(first + 1)
+            self.updateArea(min(a.x(), b.x()), min(a.y(), b.y()), max(a.x(), b.x()), max(a.y(), b.y()))
+        else:
+            rect = self.polyline.mid(first, last - first).boundingRect()
+            self.updateArea(rect.left(), rect.top(), rect.right(), rect.bottom())
+
+    def updateArea(self, xMin, yMin, xMax, yMax):
+        """
+        Schedule a repaint of a box of the polyline, with room for the pen and the end marker.
+        """
+        pad = self.markerRadius + self.padPen
+        self.update(xMin - pad, yMin - pad, xMax - xMin + 2 * pad, yMax - yMin + 2 * pad)
+
+    def rebuild(self):
+        """
+        Rebuild the polyline from the ring buffer with a single copy into the QPolygonF's memory.
+        """
+        xs, ys = self.core.points()
+        n = len(xs)
+        self.polyline = qtg.QPolygonF()
+        self.polyline.fill(qtc.QPointF(), n)
+        ptr = self.polyline.data()
+        ptr.setsize(2 * n * np.dtype(np.float64).itemsize)
+        pts = np.frombuffer(ptr, dtype=np.float64).reshape(n, 2)
+        pts[:, 0] = xs
+        pts[:, 1] = ys
+        self.endX, self.endY = self.core.lastPt()
+        self.synced = self.core.total
+        self.version = self.core.version
+        self.expired = 0
+        self.bounds = None
+        self.growBounds(xs.min(), ys.min(), xs.max(), ys.max())
+        self.update()
+
+    def growBounds(self, xMin, yMin, xMax, yMax):
+        """
+        Extend the bounding rect (with room for the pen and the end marker) to cover the given box.
+        """
+        if self.bounds is not None:
+            bxMin, byMin, bxMax, byMax = self.bounds
+            if bxMin <= xMin and byMin <= yMin and xMax <= bxMax and yMax <= byMax:
+                return
+            xMin, yMin = min(xMin, bxMin), min(yMin, byMin)
+            xMax, yMax = max(xMax, bxMax), max(yMax, byMax)
+        self.bounds = (xMin, yMin, xMax, yMax)
+        pad = self.markerRadius + self.padPen
+        self.prepareGeometryChange()
+        self.rect = qtc.QRectF(xMin - pad, yMin - pad, xMax - xMin + 2 * pad, yMax - yMin + 2 * pad)
 
     def paint(self, painter, option, widget=None):
         if self.pen is not None:
             painter.setPen(self.pen)
-        path = qtg.QPainterPath()
-        if len(self.pts) > 0:
-            path.moveTo(self.pts[0])
-        for i in range(1, len(self.pts)):
-            path.lineTo(self.pts[i])
-        painter.drawPath(path)
-        pt = self.pts[len(self.pts) - 1]
+        painter.drawPolyline(self.polyline)
         painter.setPen(self.penOutline)
-        painter.drawEllipse(qtc.QRectF(pt.x() - 2.5, pt.y() - 2.5, 5, 5))
+        r = self.markerRadius
+        painter.drawEllipse(qtc.QRectF(self.endX - r, self.endY - r, 2 * r, 2 * r))
+class CycleOverlay(qtw.QGraphicsItem):
+    # transmission angle bands (deg from 90):  good, fair, poor
+    bands = ((45.0, qtg.QColor(0, 160, 0, 160)),
+             (70.0, qtg.QColor(255, 140, 0, 180)),
+             (90.0, qtg.QColor(220, 0, 0, 200)))
+
+    def __init__(self, parent=None):
+        """
+        Draws a CycleAnalysis over the linkage:  the full paths of Tracer0 ... Tracer3 colored by the transmission
+        angle at each input angle, circles where the output link reverses (toggle positions, K3 = 0), crosses where
+        the input link cannot go further (limit positions) and a summary with the Grashof class, the transmission
+        angle and the mechanical advantage.  Everything is built once by setAnalysis(), paint() only draws the cached paths.
+        """
+        super().__init__(parent)
+        self.rect = qtc.QRectF()
+        self.paths = []
+        self.markers = qtg.QPainterPath()
+        self.summary = ""
+        self.font = sharedFont("Arial", 8)
+        self.markerPen = qtg.QPen(qtc.Qt.black)
+        self.markerPen.setCosmetic(True)
+        self.setAcceptedMouseButtons(qtc.Qt.NoButton)
+        self.setZValue(-1)  # under the links
+        # only changes with the geometry of the linkage, keep its rendering in a pixmap
+        self.setCacheMode(qtw.QGraphicsItem.DeviceCoordinateCache)
+
+    def boundingRect(self):
+        return self.rect
+
+    def setAnalysis(self, analysis, reachable):
+        """
+        Rebuild the cached paths.
+        :param analysis: a FourBarLinkage_Kinematics.CycleAnalysis of a full revolution
+        :param reachable: the FourBarLinkage_Kinematics.ReachableRange of the same linkage
+        """
+        pos = analysis.positions
+        deviation = np.abs(np.degrees(analysis.transmission) - 90.0)
+        band = np.searchsorted([limit for limit, color in self.bands], deviation)  # NaN where not assembled
+        band[~pos.valid] = -1
+        self.paths = []
+        for b, (limit, color) in enumerate(self.bands):
+            path = qtg.QPainterPath()
+            for xs, ys in zip(pos.tracerX, pos.tracerY):
+                # a segment from sample i to i + 1 (wrapping around) gets the band of sample i
+                xs, ys = xs.tolist(), ys.tolist()
+                n = len(xs)
+                drawing = False
+                for i in np.flatnonzero((band == b) & np.roll(pos.valid, -1)).tolist():
+                    if not drawing or i != last + 1:
+                        path.moveTo(xs[i], ys[i])
+                    path.lineTo(xs[(i + 1) % n], ys[(i + 1) % n])
+                    drawing, last = True, i
+            pen = qtg.QPen(color, 2)
+            pen.setCosmetic(True)
+            self.paths.append((path, pen))
+
+        # the exact toggle positions of the output (circles on the output joint) and limit positions of the input
+        # (crosses on the input joint)
+        self.markers = qtg.QPainterPath()
+        toggles = kin.solvePositions(np.array(reachable.toggles), *reachable.key, tracers=False)
+        for x, y in zip(toggles.xC.tolist(), toggles.yC.tolist()):
+            self.markers.addEllipse(qtc.QPointF(x, y), 4, 4)
+        limits = kin.solvePositions(np.array(reachable.limits), *reachable.key, tracers=False)
+        for x, y in zip(limits.xB.tolist(), limits.yB.tolist()):
+            self.markers.moveTo(x - 4, y - 4)
+            self.markers.lineTo(x + 4, y + 4)
+            self.markers.moveTo(x - 4, y + 4)
+            self.markers.lineTo(x + 4, y - 4)
+
+        valid = pos.valid
+        if valid.any():
+            mu = np.degrees(analysis.transmission[valid])
+            ma = np.abs(analysis.mechanicalAdvantage[valid])
+            self.summary = "{}, transmission angle {:0.1f}° ... {:0.1f}°, mechanical advantage ≥ {:0.3f}".format(
+                reachable.name(), mu.min(), mu.max(), ma.min())
+        else:
+            self.summary = "the linkage cannot be assembled"
+        rect = qtc.QRectF()
+        for path, pen in self.paths:
+            rect = rect.united(path.boundingRect())
+        rect = rect.united(self.markers.boundingRect())
+        self.textPos = rect.topLeft() - qtc.QPointF(0, 4)
+        textRect = qtg.QFontMetricsF(self.font).boundingRect(self.summary).translated(self.textPos)
+        self.prepareGeometryChange()
+        self.rect = rect.united(textRect).adjusted(-2, -2, 2, 2)
+        self.update()
+
+    def paint(self, painter, option, widget=None):
+        painter.setBrush(qtc.Qt.NoBrush)
+        for path, pen in self.paths:
+            painter.setPen(pen)
+            painter.drawPath(path)
+        painter.setPen(self.markerPen)
+        painter.drawPath(self.markers)
+        painter.setFont(self.font)
+        painter.drawText(self.textPos, self.summary)
+
+
+class ProfilerHUD(qtw.QGraphicsItem):
+    def __init__(self, parent=None):
+        """
+        Lines of text (the report of a FourBarLinkage_Profiling.Profiler) drawn on a translucent panel over the scene.
+        It ignores the view's zoom, so the text keeps its size, and the controller keeps it in the top left corner of
+        the view.
+        """
+        super().__init__(parent)
+        self.lines = []
+        self.rect = qtc.QRectF()
+        self.font = sharedFont("Courier New", 8)
+        self.lineHeight = qtg.QFontMetricsF(self.font).lineSpacing()
+        self.brush = qtg.QBrush(qtg.QColor(255, 255, 255, 200))
+        self.setFlag(qtw.QGraphicsItem.ItemIgnoresTransformations)
+        self.setAcceptedMouseButtons(qtc.Qt.NoButton)
+        self.setZValue(100)  # over everything
+
+    def boundingRect(self):
+        return self.rect
+
+    def setLines(self, lines):
+        metrics = qtg.QFontMetricsF(self.font)
+        width = max((metrics.horizontalAdvance(line) for line in lines), default=0.0)
+        rect = qtc.QRectF(0, 0, width + 8, self.lineHeight * len(lines) + 6)
+        if rect != self.rect:
+            self.prepareGeometryChange()
+            self.rect = rect
+        self.lines = lines
+        self.update()
+
+    def paint(self, painter, option, widget=None):
+        painter.setPen(NO_PEN)
+        painter.setBrush(self.brush)
+        painter.drawRect(self.rect)
+        painter.setPen(BLACK_PEN)
+        painter.setFont(self.font)
+        for i, line in enumerate(self.lines):
+            painter.drawText(qtc.QPointF(4, 3 + self.lineHeight * (i + 0.8)), line)
+
+
 class LinearSpring(qtw.QGraphicsItem):
+    digitsToZero = str.maketrans("123456789", "000000000")  # see textWidth
+
     def __init__(self, ptSt=qtc.QPointF(0, 0), ptEn=qtc.QPointF(1, 1), coilsWidth=10, coilsLength=30, parent=None,
-                 pen=None, name='Spring', label=None, k=10, nCoils=6):
+                 pen=None, name='Spring', label=None, k=10, nCoils=6, core=None):
         """
         This is my class for a spring,
         :param ptSt: a QPointF point
@@ -300,14 +641,12 @@ class LinearSpring(qtw.QGraphicsItem):
         :param label: text to be displayed beside the spring
         :param k: the spring constant
         :param nCoils: number of coils to be drawn
+        :param core: the SpringCore holding the state, made from ptSt, ptEn and k if not given
         """
         super().__init__(parent)
-        self.stPt = ptSt
-        self.enPt = ptEn
-        self.freeLength = self.getLength()  # this assumes the spring to be free on initial definition
-        self.DL = self.length - self.freeLength
+        # this assumes the spring to be free on initial definition
+        self.core = SpringCore(ptSt.x(), ptSt.y(), ptEn.x(), ptEn.y(), k) if core is None else core
         self.centerPt = (self.stPt + self.enPt) / 2.0
-        self.force = 0
         self.pen = pen
         self.coilsWidth = coilsWidth
         self.coilsLength = coilsLength
@@ -316,39 +655,93 @@ class LinearSpring(qtw.QGraphicsItem):
         self.rect = qtc.QRectF(self.left, self.top, self.coilsWidth, self.coilsLength)
         self.name = name
         self.label = label
-        self.k = k
         self.nCoils = nCoils
         self.transformation = qtg.QTransform()
-        stTT = self.name + "\nx={:0.1f}, y={:0.1f}\nk = {:0.1f}".format(self.centerPt.x(), self.centerPt.y(), self.k)
-        self.setToolTip(stTT)
+        self.font = sharedFont("Arial", 12, qtg.QFont.Bold)
+        self.fontMetrics = qtg.QFontMetricsF(self.font)
+        self.textWidths = {}
+        self.rectKey = None
+        self.textKey = None  # (k, force) of the label text
+        self.syncGeometry()
+        # the tooltip is only built when the mouse is over the spring
+        self.setAcceptHoverEvents(True)
 
     def setk(self, k=None):
         if k is not None:
             self.k = k
-            stTT = self.name + "\nx={:0.3f}, y={:0.3f}\nk = {:0.3f}".format(self.stPt.x(), self.stPt.y(), self.k)
-            self.setToolTip(stTT)
+            self.core.getForce()
+            self.syncGeometry()
+
+    def textWidth(self, text):
+        """
+        Width of the label text.  All digits are equally wide, so the width is measured once per pattern of the text
+        with the digits replaced by 0 instead of on every frame.
+        """
+        pattern = text.translate(self.digitsToZero)
+        width = self.textWidths.get(pattern)
+        if width is None:
+            width = self.textWidths[pattern] = self.fontMetrics.width(pattern)
+        return width
+
+    def hoverEnterEvent(self, event):
+        centerPt = (self.stPt + self.enPt) / 2.0
+        self.setToolTip(self.name + "\nx={:0.3f}, y={:0.3f}\nk = {:0.3f}".format(centerPt.x(), centerPt.y(), self.k))
+        super().hoverEnterEvent(event)
 
     def boundingRect(self):
-        bounding_rect = self.transformation.mapRect(self.rect)
-        return bounding_rect
+        # item coordinates: the transform is already applied by the scene
+        return self.rect
+
+    def syncGeometry(self):
+        """
+        Bring the bounding rect and transform up to date with the core (steps 5 to 7 of paint) and schedule a repaint
+        of the item only.
+        """
+        length = self.core.getLength()
+        nodeRad = 2
+        if self.textKey != (self.k, self.force):
+            # the label is formatted and measured here, once per change of k or the force, and paint only draws it
+            self.textKey = (self.k, self.force)
+            self.text = "k = {:0.1f} N/m, F = {:0.2f} N".format(self.k, self.force)
+            self.textHalfWidth = self.textWidth(self.text) / 2.0
+        halfX = roundOut(max(length / 2 + nodeRad, self.textHalfWidth))
+        if halfX != self.rectKey:
+            self.rectKey = halfX
+            fm = self.fontMetrics
+            halfY = max(self.coilsWidth / 2, nodeRad, fm.height() / 2.0 + fm.descent())
+            rect = qtc.QRectF(-halfX, -halfY, 2 * halfX, 2 * halfY)
+            if self.label is not None:
+                rect = rect.united(fm.boundingRect(self.label).translated((self.coilsWidth / 2.0) + 10, 0))
+            pad = self.pen.widthF() if self.pen is not None else 1.0
+            self.prepareGeometryChange()
+            self.rect = rect.adjusted(-pad, -pad, pad, pad)
+        self.transformation.reset()
+        self.transformation.translate(self.core.stX, self.core.stY)
+        self.transformation.rotate(self.getAngleDeg())
+        self.transformation.translate(length / 2, 0)
+        self.setTransform(self.transformation)
+        self.update()
+
+    stPt = property(lambda self: qtc.QPointF(self.core.stX, self.core.stY))
+    enPt = property(lambda self: qtc.QPointF(self.core.enX, self.core.enY))
+    length = coreProperty('length')
+    freeLength = coreProperty('freeLength')
+    DL = coreProperty('DL')
+    force = coreProperty('force')
+    k = coreProperty('k')
 
     def getLength(self):
-        p = self.enPt - self.stPt
-        self.length = math.sqrt(p.x() ** 2 + p.y() ** 2)
-        return self.length
+        return self.core.getLength()
 
     def getForce(self):
-        self.force = self.k * self.getDL()
-        return self.force
+        return self.core.getForce()
 
     def getDL(self):
-        self.DL = self.length - self.freeLength
-        return self.DL
+        return self.core.getDL()
 
     def getAngleDeg(self):
-        p = self.enPt - self.stPt
-        self.angleRad = math.atan2(p.y(), p.x())
-        self.angleDeg = 180.0 / math.pi * self.angleRad
+        self.angleDeg = self.core.getAngleDeg()
+        self.angleRad = math.radians(self.angleDeg)
         return self.angleDeg
 
     def paint(self, painter, option, widget=None):
@@ -365,26 +758,22 @@ class LinearSpring(qtw.QGraphicsItem):
         Step 6: rotate to self.angleDeg
         Step 7: translate to stPt
         Step 8: decorate with text
+        The length, DL and steps 5 to 7 are taken care of by syncGeometry, so paint only draws.
         :param painter:
         :param option:
         :param widget:
         :return:
         """
-        self.transformation.reset()
-
         if self.pen is not None:
             painter.setPen(self.pen)  # Red color pen
         # Step 1:
-        self.getLength()
-        self.getAngleDeg()
-        self.getDL()
         ht = self.coilsWidth
         wd = self.coilsLength + self.DL
         top = -ht / 2
         left = -wd / 2
         right = wd / 2
-        self.rect = qtc.QRectF(left, top, wd, ht)
-        # painter.drawRect(self.rect)
+        coils = qtc.QRectF(left, top, wd, ht)
+        # painter.drawRect(coils)
         # Step 2:
         painter.drawLine(qtc.QPointF(left, 0), qtc.QPointF(left, ht / 2))
         dX = wd / (self.nCoils)
@@ -401,29 +790,12 @@ class LinearSpring(qtw.QGraphicsItem):
         enRec = qtc.QRectF(self.length / 2 - nodeRad, -nodeRad, 2 * nodeRad, 2 * nodeRad)
         painter.drawEllipse(stRec)
         painter.drawEllipse(enRec)
-        # Step 5:
-        self.transformation.translate(self.stPt.x(), self.stPt.y())
-        self.transformation.rotate(self.angleDeg)
-        self.transformation.translate(self.length / 2, 0)
-        self.setTransform(self.transformation)
-        # Step 6:
-        self.transformation.reset()
-        font = painter.font()
-        font.setPointSize(6)
-        font = qtg.QFont("Arial", 12, qtg.QFont.Bold)#added to make F and k visible
-        painter.setFont(font)
-        painter.setPen(qtg.QColor("black")) # added to make F and k visible
-        text = "k = {:0.1f} N/m".format(self.k)
-        text += ", F = {:0.2f} N".format(self.force)
-        fm = qtg.QFontMetrics(painter.font())
-        centerPt = (self.stPt + self.enPt) / 2, 0
-        painter.drawText(qtc.QPointF(-fm.width(text) / 2.0, fm.height() / 2.0), text)
+        # Step 8:
+        painter.setFont(self.font) # Arial 12 bold to make F and k visible
+        painter.setPen(BLACK_PEN) # added to make F and k visible
+        painter.drawText(qtc.QPointF(-self.textHalfWidth, self.fontMetrics.height() / 2.0), self.text)
         if self.label is not None:
-            font.setPointSize(12)
-            painter.setFont(font)
             painter.drawText(qtc.QPointF((self.coilsWidth / 2.0) + 10, 0), self.label)
-
-        self.transformation.reset()
         # brPen=qtg.QPen()
         # brPen.setWidth(0)
         # painter.setPen(brPen)
@@ -431,7 +803,7 @@ class LinearSpring(qtw.QGraphicsItem):
         # painter.drawRect(self.boundingRect())
 class DashPot(qtw.QGraphicsItem):
     def __init__(self, ptSt=qtc.QPointF(0, 0), ptEn=qtc.QPointF(1, 1), dpWidth=10, dpLength=30, parent=None, pen=None,
-                 name='Dashpot', label=None, c=10):
+                 name='Dashpot', label=None, c=10, core=None):
         """
         This is my class for a dashpot,
         :param ptSt: a QPointF point
@@ -444,12 +816,11 @@ class DashPot(qtw.QGraphicsItem):
         :param name: just a convenient name
         :param label: text to be displayed beside the dashpot
         :param c: the dashpot coefficient
+        :param core: the DashPotCore holding the state, made from ptSt, ptEn and c if not given
         """
         super().__init__(parent)
-        self.stPt = ptSt
-        self.enPt = ptEn
-        self.freeLength = self.getLength()  # this assumes the dashpot to be free on initial definition
-        self.DL = self.length - self.freeLength
+        # this assumes the dashpot to be free on initial definition
+        self.core = DashPotCore(ptSt.x(), ptSt.y(), ptEn.x(), ptEn.y(), c) if core is None else core
         self.centerPt = (self.stPt + self.enPt) / 2.0
         self.pen = pen
         self.Width = dpWidth
@@ -462,34 +833,63 @@ class DashPot(qtw.QGraphicsItem):
         self.rect = qtc.QRectF(self.left, self.top, self.Width, self.Length)
         self.name = name
         self.label = label
-        self.c = c
         self.transformation = qtg.QTransform()
-        stTT = self.name + "\nx={:0.1f}, y={:0.1f}\nc = {:0.1f}".format(self.centerPt.x(), self.centerPt.y(), self.c)
-        self.setToolTip(stTT)
+        self.rectKey = None
+        self.syncGeometry()
+        # the tooltip is only built when the mouse is over the dashpot
+        self.setAcceptHoverEvents(True)
 
     def setc(self, c=None):
         if c is not None:
             self.c = c
-            stTT = self.name + "\nx={:0.3f}, y={:0.3f}\nc = {:0.3f}".format(self.stPt.x(), self.stPt.y(), self.c)
-            self.setToolTip(stTT)
+
+    def hoverEnterEvent(self, event):
+        centerPt = (self.stPt + self.enPt) / 2.0
+        self.setToolTip(self.name + "\nx={:0.3f}, y={:0.3f}\nc = {:0.3f}".format(centerPt.x(), centerPt.y(), self.c))
+        super().hoverEnterEvent(event)
 
     def boundingRect(self):
-        bounding_rect = self.transformation.mapRect(self.rect)
-        return bounding_rect
+        # item coordinates: the transform is already applied by the scene
+        return self.rect
+
+    def syncGeometry(self):
+        """
+        Bring the bounding rect and transform up to date with the core (steps 5 to 7 of paint) and schedule a repaint
+        of the item only.
+        """
+        length = self.core.getLength()
+        DL = self.core.getDL()
+        nodeRad = 2
+        piston = self.conn1Len + self.Length / 2 + DL
+        left = -roundOut(-min(-nodeRad, piston))
+        right = roundOut(max(length + nodeRad, self.conn1Len + self.Length, piston + self.conn2Len))
+        if (left, right) != self.rectKey:
+            self.rectKey = (left, right)
+            pad = self.pen.widthF() if self.pen is not None else 1.0
+            self.prepareGeometryChange()
+            self.rect = qtc.QRectF(left - pad, -self.Width / 2 - pad, right - left + 2 * pad, self.Width + 2 * pad)
+        self.transformation.reset()
+        self.transformation.translate(self.core.stX, self.core.stY)
+        self.transformation.rotate(self.getAngleDeg())
+        self.setTransform(self.transformation)
+        self.update()
+
+    stPt = property(lambda self: qtc.QPointF(self.core.stX, self.core.stY))
+    enPt = property(lambda self: qtc.QPointF(self.core.enX, self.core.enY))
+    length = coreProperty('length')
+    freeLength = coreProperty('freeLength')
+    DL = coreProperty('DL')
+    c = coreProperty('c')
 
     def getLength(self):
-        p = self.enPt - self.stPt
-        self.length = math.sqrt(p.x() ** 2 + p.y() ** 2)
-        return self.length
+        return self.core.getLength()
 
     def getDL(self):
-        self.DL = self.length - self.freeLength
-        return self.DL
+        return self.core.getDL()
 
     def getAngleDeg(self):
-        p = self.enPt - self.stPt
-        self.angleRad = math.atan2(p.y(), p.x())
-        self.angleDeg = 180.0 / math.pi * self.angleRad
+        self.angleDeg = self.core.getAngleDeg()
+        self.angleRad = math.radians(self.angleDeg)
         return self.angleDeg
 
     def paint(self, painter, option, widget=None):
@@ -506,26 +906,22 @@ class DashPot(qtw.QGraphicsItem):
         Step 6: rotate to self.angleDeg
         Step 7: translate to stPt
         Step 8: decorate with text
+        The length, DL and steps 5 to 7 are taken care of by syncGeometry, so paint only draws.
         :param painter:
         :param option:
         :param widget:
         :return:
         """
-        self.transformation.reset()
-
         if self.pen is not None:
             painter.setPen(self.pen)  # Red color pen
         # Step 1:
-        self.getLength()
-        self.getAngleDeg()
-        self.getDL()
         ht = self.Width
         wd = self.Length
         top = -ht / 2
         left = self.conn1Len
         right = left + wd
-        self.rect = qtc.QRectF(left, top, wd, ht)
-        # painter.drawRect(self.rect)
+        body = qtc.QRectF(left, top, wd, ht)
+        # painter.drawRect(body)
         # Step 2:
         painter.drawLine(qtc.QPointF(left, -ht / 2), qtc.QPointF(left, ht / 2))
         painter.drawLine(qtc.QPointF(left, -ht / 2), qtc.QPointF(right, -ht / 2))
@@ -542,10 +938,6 @@ class DashPot(qtw.QGraphicsItem):
         enRec = qtc.QRectF(self.length - nodeRad, -nodeRad, 2 * nodeRad, 2 * nodeRad)
         painter.drawEllipse(stRec)
         painter.drawEllipse(enRec)
-        # Step 5:
-        self.transformation.translate(self.stPt.x(), self.stPt.y())
-        self.transformation.rotate(self.angleDeg)
-        self.setTransform(self.transformation)
         # Step 6:
         # self.transformation.reset()
         # font=painter.font()
@@ -560,7 +952,6 @@ class DashPot(qtw.QGraphicsItem):
         #     painter.setFont(font)
         #     painter.drawText(qtc.QPointF((self.FBL.DashPotWidth / 2.0) + 10, 0), self.label)
 
-        self.transformation.reset()
         # brPen=qtg.QPen()
         # brPen.setWidth(0)
         # painter.setPen(brPen)
@@ -583,111 +974,193 @@ class FourBarLinkage_Model():
 
     Operation of the four-bar linkage:
         There is one degree of freedom in the motion of the four bar linkage:  the input angle.
-        My strategy is to use fsolve of scipy to find the output angle with the following constraint: The lengths of all the links must remain fixed (i.e., rigid links).
+        The output angle is found in closed form as the intersection of the coupler circle around the input joint and
+        the output link circle around the output pivot (see FourBarLinkage_Kinematics).  The assembly branch (open or
+        crossed) is taken from the pose of the linkage when it is built and kept thereafter.
+
+    The state of the linkage lives in a Qt-free FourBarLinkage_Core (self.core), which can be used on its own for batch
+    runs.  The links, spring, dashpot and tracers of this model are QGraphicsItems that only draw the core's state.
+    See FourBarLinkage_Core for the solver modes (self.solver); the interactive model uses 'table'.
     '''
-    def __init__(self):
-        self.GroundLink = RigidLink()
-        self.InputLink = RigidLink()
-        self.DragLink = RigidLink()
-        self.OutputLink = RigidLink()
+    def __init__(self, tracerCapacity=1000):
+        self.core = FourBarLinkage_Core(tracerCapacity)
+        self.GroundLink = RigidLink(core=self.core.GroundLink)
+        self.InputLink = RigidLink(core=self.core.InputLink)
+        self.DragLink = RigidLink(core=self.core.DragLink)
+        self.OutputLink = RigidLink(core=self.core.OutputLink)
         self.Pivot0 = RigidPivotPoint()
         self.Pivot1 = RigidPivotPoint()
-        self.Spring = LinearSpring()
-        self.DashPot = DashPot()
-        self.Tracer0 = Tracer()
-        self.Tracer1 = Tracer()
-        self.Tracer2 = Tracer()
-        self.Tracer3 = Tracer()
+        self.Spring = LinearSpring(core=self.core.Spring)
+        self.DashPot = DashPot(core=self.core.DashPot)
+        self.Tracer0 = Tracer(core=self.core.Tracer0)
+        self.Tracer1 = Tracer(core=self.core.Tracer1)
+        self.Tracer2 = Tracer(core=self.core.Tracer2)
+        self.Tracer3 = Tracer(core=self.core.Tracer3)
+        self.Overlay = CycleOverlay()
+        # dragging and animation only interpolate in a table of positions
+        self.core.solver = 'table'
+
+    solver = coreProperty('solver')
+    branch = coreProperty('branch')
+    angle1 = coreProperty('angle1')
+    angle2 = coreProperty('angle2')
+    prevAlpha = coreProperty('prevAlpha')
+    prevBeta = coreProperty('prevBeta')
+
+    def solveOutputAngle(self, angle1):
+        """
+        Find the output angle for input angle angle1 using the current solver mode.
+        :param angle1: input angle (rad)
+        :return: the output angle (rad) or None if the linkage cannot be assembled at angle1
+        """
+        return self.core.solveOutputAngle(angle1)
+
+    def solvePositions(self, angles):
+        """
+        Solve the current linkage for an array of input angles without touching the graphics items or tracers.
+        :param angles: array of input angles (rad)
+        :return: a FourBarLinkage_Kinematics.LinkagePositions tuple of arrays
+        """
+        return self.core.solvePositions(angles)
+
+    def analyzeCycle(self, step=0.5):
+        """
+        Analyze the current linkage over a full revolution of the input link (see FourBarLinkage_Core.analyzeCycle).
+        """
+        return self.core.analyzeCycle(step)
 
     def setInputLength(self, L=10):
-        self.InputLink.enPt.setX(self.InputLink.stPt.x() + math.cos(self.InputLink.angle) * L)
-        self.InputLink.enPt.setY(self.InputLink.stPt.y() - math.sin(self.InputLink.angle) * L)
-        self.InputLink.linkLength()
-        self.DragLink.stPt.setX(self.InputLink.enPt.x())
-        self.DragLink.stPt.setY(self.InputLink.enPt.y())
+        self.core.setInputLength(L)
 
     def setOutputLength(self, L=10):
-        self.OutputLink.enPt.setX(self.OutputLink.stPt.x() + math.cos(self.OutputLink.angle) * L)
-        self.OutputLink.enPt.setY(self.OutputLink.stPt.y() - math.sin(self.OutputLink.angle) * L)
-        self.OutputLink.linkLength()
-        self.DragLink.enPt.setX(self.OutputLink.enPt.x())
-        self.DragLink.enPt.setY(self.OutputLink.enPt.y())
+        self.core.setOutputLength(L)
+
+    def setInputAngle(self, angle1, limited=False):
+        """
+        Move the linkage to input angle angle1 (rad).
+        :param limited: also keep it within the angle limits (see FourBarLinkage_Core.setInputAngle)
+        :return: True if the angle was reached, False if it was clamped to the reachable range
+        """
+        ok = self.core.setInputAngle(angle1, limited)
+        self.syncViews()
+        return ok
+
+    def setAngleLimits(self, lower=None, upper=None):
+        """
+        Keep dragged input angles between lower and upper (rad), see FourBarLinkage_Core.setAngleLimits.
+        """
+        if self.core.setAngleLimits(lower, upper):
+            self.syncViews()
 
     def moveLinkage(self, pt=qtc.QPointF(0, 0)):
-        l1 = self.InputLink.length
-        l2 = self.DragLink.length
-        l3 = self.OutputLink.length
-
-        x = pt.x()
-        y = pt.y()
-        if (x == self.InputLink.stPt.x()):
-            self.angle1 = math.pi / 2 if y <= self.InputLink.stPt.y() else math.pi * 3.0 / 2.0
-        else:
-            self.angle1 = math.atan(-(y - self.InputLink.stPt.y()) / (x - self.InputLink.stPt.x()))
-            self.angle1 += math.pi if x < self.InputLink.stPt.x() else 0
-        if (self.OutputLink.enPt.x() == self.OutputLink.enPt.x()):
-            self.angle2 = math.pi / 2 if self.OutputLink.enPt.y() < self.OutputLink.stPt.y() else math.pi * 3.0 / 2.0
-        else:
-            self.angle2 = math.atan(-(self.OutputLink.enPt.y() - self.DragLink.stPt.y()) / (
-                    self.OutputLink.enPt.x() - self.OutputLink.stPt.x()))
-            self.angle2 += math.pi if self.OutputLink.enPt.x() < self.OutputLink.stPt.x() else 0
-
-        self.InputLink.enPt.setX(self.InputLink.stPt.x() + math.cos(self.angle1) * l1)
-        self.InputLink.enPt.setY(self.InputLink.stPt.y() - math.sin(self.angle1) * l1)
-        x1 = self.InputLink.enPt.x()
-        y1 = self.InputLink.enPt.y()
-        self.lTest = l2
-
-        def fn1(angle2):
-            x2 = self.OutputLink.stPt.x() + l3 * math.cos(angle2)
-            y2 = self.OutputLink.stPt.y() - l3 * math.sin(angle2)
-            self.lTest = math.sqrt(math.pow(x2 - x1, 2) + math.pow(y2 - y1, 2))
-            return l2 - self.lTest
-        # Here is where the position of coupler link is found.
-        result = optimize.fsolve(fn1, [self.angle2])
-        if abs(self.lTest - l2) > 0.001:
-            self.angle2 = self.prevBeta
-            self.angle1 = self.prevAlpha
-            self.InputLink.enPt.setX(self.InputLink.stPt.x() + math.cos(self.angle1) * l1)
-            self.InputLink.endPt.setY(self.InputLink.stPt.y() - math.sin(self.angle1) * l1)
-        else:
-            self.angle2 = result[0]
-            self.prevAlpha = self.angle1
-            self.prevBeta = self.angle2
-
-        # self.InputLink.enPt.x()=scenePos.x()
-        # self.InputLink.enPt.y()=scenePos.y()
-        # self.InputLink.update()
-        self.OutputLink.enPt.setX(self.OutputLink.stPt.x() + l3 * math.cos(self.angle2))
-        self.OutputLink.enPt.setY(self.OutputLink.stPt.y() - l3 * math.sin(self.angle2))
-        pt1 = dc(self.InputLink.enPt)
-        pt0 = dc(self.OutputLink.enPt)
-        ptMid = (pt0 + pt1) / 2
-        self.Tracer1.pts.append(pt1)
-        self.Tracer0.pts.append(pt0)
-        self.Tracer2.pts.append(ptMid)
-        self.Tracer3.pts.append(ptMid + 0.5 * (pt0 - ptMid))
-        self.Spring.enPt = dc(self.Tracer3.lastPt())
-        self.Spring.getForce()
-        self.DashPot.enPt = dc(self.Tracer3.lastPt())
-        if len(self.Tracer1.pts) >= 1000:
-            self.Tracer0.pts = self.Tracer0.pts[1:]
-            self.Tracer1.pts = self.Tracer1.pts[1:]
-            self.Tracer2.pts = self.Tracer2.pts[1:]
-            self.Tracer3.pts = self.Tracer3.pts[1:]
-
-        self.DragLink.stPt = self.InputLink.enPt
-        self.DragLink.enPt = self.OutputLink.enPt
+        """
+        Point the input link at pt (scene coordinates) and move the rest of the linkage to match.
+        :return: True if the angle was reached, False if it was clamped to the reachable range or the angle limits
+        """
+        ok = self.core.moveLinkage(pt.x(), pt.y())
+        self.syncViews()
+        return ok
+
+    def syncViews(self):
+        """
+        Bring the graphics items up to date with the core.  Each item invalidates only the area it covers, so the view
+        repaints the moving parts of the linkage instead of the whole viewport.
+        """
+        for link in (self.InputLink, self.DragLink, self.OutputLink):
+            link.syncGeometry()
+        self.Spring.syncGeometry()
+        self.DashPot.syncGeometry()
+        self.syncTracers()
+
+    def syncTracers(self):
+        for tracer in (self.Tracer0, self.Tracer1, self.Tracer2, self.Tracer3):
+            tracer.sync()
 #endregion
 
 #region view
+class GridScene(qtw.QGraphicsScene):
+    def __init__(self, parent=None):
+        """
+        A scene that paints the reference grid in drawBackground, so the grid is not made of scene items and takes no
+        part in indexing or hit-testing.  The grid spacing adapts to the zoom of the view:  it is doubled until the
+        lines are at least minSpacing pixels apart and halved while they are more than 4 * minSpacing pixels apart.
+        """
+        super().__init__(parent)
+        self.gridRect = None  # no grid until setGrid is called
+        self.gridDeltaX = 10
+        self.gridDeltaY = 10
+        self.gridPen = qtg.QPen()
+        self.gridBrush = None
+        self.minSpacing = 8
+
+    def setGrid(self, rect, DeltaX=10, DeltaY=10, Pen=None, Brush=None):
+        """
+        :param rect: QRectF covered by the grid (scene coords), None to remove the grid
+        :param DeltaX: grid spacing in x direction at a zoom of 1
+        :param DeltaY: grid spacing in y direction at a zoom of 1
+        :param Pen: pen for grid lines
+        :param Brush: brush for background
+        """
+        self.gridRect = rect
+        self.gridDeltaX = DeltaX
+        self.gridDeltaY = DeltaY
+        # the spacing adapts to the zoom, so the lines keep their width on screen too
+        self.gridPen = qtg.QPen() if Pen is None else qtg.QPen(Pen)
+        self.gridPen.setCosmetic(True)
+        self.gridBrush = Brush
+        self.invalidate(self.sceneRect(), qtw.QGraphicsScene.BackgroundLayer)
+
+    def gridSpacing(self, delta, scale):
+        """
+        The grid spacing (scene units) to draw at a view scale of scale (pixels per scene unit).
+        """
+        spacing = delta
+        if scale <= 0:
+            return spacing
+        while spacing * scale < self.minSpacing:
+            spacing *= 2.0
+        while spacing * scale > 4 * self.minSpacing:
+            spacing /= 2.0
+        return spacing
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if self.gridRect is None:
+            return
+        area = self.gridRect.intersected(rect)
+        if area.isEmpty():
+            return
+        if self.gridBrush is not None:
+            painter.fillRect(area, self.gridBrush)
+        t = painter.worldTransform()
+        scale = math.hypot(t.m11(), t.m12())
+        dx = self.gridSpacing(self.gridDeltaX, scale)
+        dy = self.gridSpacing(self.gridDeltaY, scale)
+        g = self.gridRect
+        lines = []
+        # only the lines that cross the exposed area, snapped to the grid origin at the top left of gridRect
+        x = g.left() + math.ceil((area.left() - g.left()) / dx) * dx
+        while x <= area.right():
+            lines.append(qtc.QLineF(x, area.top(), x, area.bottom()))
+            x += dx
+        y = g.top() + math.ceil((area.top() - g.top()) / dy) * dy
+        while y <= area.bottom():
+            lines.append(qtc.QLineF(area.left(), y, area.right(), y))
+            y += dy
+        painter.setPen(self.gridPen)
+        painter.drawLines(lines)
+        if self.gridBrush is not None:
+            painter.setBrush(qtc.Qt.NoBrush)
+            painter.drawRect(g)
+
+
 class FourBarLinkage_View():
     def __init__(self, gv_Main):
         self.gv_Main = gv_Main
 
     def setupGraphics(self):
-        # create a scene object
-        self.scene = qtw.QGraphicsScene()
+        # create a scene object, it paints the grid as its background
+        self.scene = GridScene()
 
         self.scene.setObjectName("MyScene")
         self.scene.setSceneRect(-200, -200, 400, 400)  # xLeft, yTop, Width, Height
@@ -697,8 +1170,10 @@ class FourBarLinkage_View():
         # make some pens and brushes for my drawing
         self.setupPensAndBrushes()
 
-        # assign scene object to gv_Main
-        self.gv_Main.setViewportUpdateMode(qtw.QGraphicsView.FullViewportUpdate)
+        # repaint only the regions invalidated by the items that moved
+        self.gv_Main.setViewportUpdateMode(qtw.QGraphicsView.SmartViewportUpdate)
+        # keep the painted grid in a pixmap, it only changes with the zoom
+        self.gv_Main.setCacheMode(qtw.QGraphicsView.CacheBackground)
 
     def setupPensAndBrushes(self):
         # make the pens first
@@ -742,10 +1217,6 @@ class FourBarLinkage_View():
         # draw a grid
         self.drawAGrid(DeltaX=10, DeltaY=10, Height=400, Width=400, Pen=self.penGridLines, Brush=self.brushGrid)
 
-        # Set DragLink start and end points
-        FBL_M.DragLink.stPt = qtc.QPointF(-100, -60)
-        FBL_M.DragLink.enPt = qtc.QPointF(100, -150)
-
         # Set coordinates and properties of Pivot 0
         FBL_M.Pivot0 = self.drawPivot(-100, 0, 10, 20)
         FBL_M.Pivot0.setTransformOriginPoint(qtc.QPointF(FBL_M.Pivot0.x, FBL_M.Pivot0.y))
@@ -757,46 +1228,53 @@ class FourBarLinkage_View():
         FBL_M.Pivot1.setTransformOriginPoint(qtc.QPointF(FBL_M.Pivot1.x, FBL_M.Pivot1.y))
         FBL_M.Pivot1.rotate(0)
         FBL_M.Pivot1.name = "RP 1"
+
+        # place the linkage in the model's core:  pivots, then DragLink start and end points
+        FBL_M.core.setup(FBL_M.Pivot0.x, FBL_M.Pivot0.y, FBL_M.Pivot1.x, FBL_M.Pivot1.y, -100, -60, 100, -150)
+
         # Make the ground link
-        FBL_M.GroundLink = self.drawLinkage(FBL_M.Pivot0.x, FBL_M.Pivot0.y, FBL_M.Pivot1.x, FBL_M.Pivot1.y,
-                                          radius=5, pen=self.penGridLines, brush=self.brushGrid)
+        FBL_M.GroundLink = self.drawLinkage(radius=5, pen=self.penGridLines, brush=self.brushGrid,
+                                            core=FBL_M.core.GroundLink)
         # Make the input link
-        FBL_M.InputLink = self.drawLinkage(FBL_M.Pivot0.x, FBL_M.Pivot0.y, FBL_M.DragLink.stPt.x(),
+        FBL_M.InputLink = self.drawLinkage(radius=5, core=FBL_M.core.InputLink)
         # Make the coupler link
-        FBL_M.DragLink.stPt.y(), 5)
-        FBL_M.DragLink = self.drawLinkage(FBL_M.DragLink.stPt.x(), FBL_M.DragLink.stPt.y(),
-                                             FBL_M.DragLink.enPt.x(), FBL_M.DragLink.enPt.y(), 5)
+        FBL_M.DragLink = self.drawLinkage(radius=5, core=FBL_M.core.DragLink)
         # Make the output link
-        FBL_M.OutputLink = self.drawLinkage(FBL_M.Pivot1.x, FBL_M.Pivot1.y, FBL_M.DragLink.enPt.x(),
-                                               FBL_M.DragLink.enPt.y(), 5)
+        FBL_M.OutputLink = self.drawLinkage(radius=5, core=FBL_M.core.OutputLink)
         FBL_M.GroundLink.name = "Frame"
         FBL_M.InputLink.name = "Input"
         FBL_M.DragLink.name = "Coupler"
         FBL_M.OutputLink.name = "Output"
+        # the frame never moves, so keep its rendering in a pixmap
+        FBL_M.GroundLink.setCacheMode(qtw.QGraphicsItem.DeviceCoordinateCache)
 
         #Make some tracer points
-        FBL_M.Tracer0 = Tracer(x=100, y=-150, pen=self.penTracer)
+        FBL_M.Tracer0 = Tracer(pen=self.penTracer, core=FBL_M.core.Tracer0)
         self.scene.addItem(FBL_M.Tracer0)
-        FBL_M.Tracer1 = Tracer(x=-100, y=-60, pen=self.penTracer)
+        FBL_M.Tracer1 = Tracer(pen=self.penTracer, core=FBL_M.core.Tracer1)
         self.scene.addItem(FBL_M.Tracer1)
-        FBL_M.Tracer2 = Tracer(0, 0, pen=self.penTracer)
-        FBL_M.Tracer2.pts[0] = (FBL_M.Tracer0.pts[0] + FBL_M.Tracer1.pts[0]) / 2
+        FBL_M.Tracer2 = Tracer(pen=self.penTracer, core=FBL_M.core.Tracer2)
         self.scene.addItem(FBL_M.Tracer2)
-        FBL_M.Tracer3 = Tracer(0, 0, pen=self.penTracer)
-        FBL_M.Tracer3.pts[0] = (FBL_M.Tracer0.pts[0] + FBL_M.Tracer2.pts[0]) / 2
+        FBL_M.Tracer3 = Tracer(pen=self.penTracer, core=FBL_M.core.Tracer3)
         self.scene.addItem(FBL_M.Tracer3)
 
         # make a spring and dashpot
-        FBL_M.Spring = LinearSpring(FBL_M.Pivot1.pt, FBL_M.Tracer3.pts[0], 20, 50)
+        FBL_M.Spring = LinearSpring(coilsWidth=20, coilsLength=50, core=FBL_M.core.Spring)
         self.scene.addItem(FBL_M.Spring)
-        FBL_M.DashPot = DashPot(FBL_M.Pivot1.pt, FBL_M.Tracer3.lastPt(), 10, 80)
+        FBL_M.DashPot = DashPot(dpWidth=10, dpLength=80, core=FBL_M.core.DashPot)
         self.scene.addItem(FBL_M.DashPot)
 
+        # full cycle analysis, shown on demand
+        FBL_M.Overlay = CycleOverlay()
+        FBL_M.Overlay.setVisible(False)
+        self.scene.addItem(FBL_M.Overlay)
+
     def drawAGrid(self, DeltaX=10, DeltaY=10, Height=200, Width=200, CenterX=0, CenterY=0, Pen=None, Brush=None, SubGrid=None):
         """
         This makes a grid for reference.  No snapping to grid enabled.
-        :param DeltaX: grid spacing in x direction
-        :param DeltaY: grid spacing in y direction
+        The grid is painted by the scene's drawBackground (see GridScene) rather than built from line items.
+        :param DeltaX: grid spacing in x direction at a zoom of 1
+        :param DeltaY: grid spacing in y direction at a zoom of 1
         :param Height: height of grid (y)
         :param Width: width of grid (x)
         :param CenterX: center of grid (x, in scene coords)
@@ -806,34 +1284,14 @@ class FourBarLinkage_View():
         :param SubGrid: subdivide the grid (not currently working)
         :return: nothing
         """
-        height = self.scene.sceneRect().coilsLength() if Height is None else Height
-        width = self.scene.sceneRect().coilsWidth() if Width is None else Width
+        height = self.scene.sceneRect().height() if Height is None else Height
+        width = self.scene.sceneRect().width() if Width is None else Width
         left = self.scene.sceneRect().left() if CenterX is None else (CenterX - width / 2.0)
         right = self.scene.sceneRect().right() if CenterX is None else (CenterX + width / 2.0)
         top = self.scene.sceneRect().top() if CenterY is None else (CenterY - height / 2.0)
         bottom = self.scene.sceneRect().bottom() if CenterY is None else (CenterY + height / 2.0)
-        Dx = DeltaX
-        Dy = DeltaY
         pen = qtg.QPen() if Pen is None else Pen
-
-        # make the background rectangle first
-        if Brush is not None:
-            rect = self.drawARectangle(left, top, width, height)
-            rect.setBrush(Brush)
-            rect.setPen(pen)
-
-        # draw the vertical grid lines
-        x = left
-        while x <= right:
-            lVert = self.drawALine(x, top, x, bottom)
-            lVert.setPen(pen)
-            x += Dx
-        # draw the horizontal grid lines
-        y = top
-        while y <= bottom:
-            lHor = self.drawALine(left, y, right, y)
-            lHor.setPen(pen)
-            y += Dy
+        self.scene.setGrid(qtc.QRectF(qtc.QPointF(left, top), qtc.QPointF(right, bottom)), DeltaX, DeltaY, pen, Brush)
 
     def drawARectangle(self, leftX, topY, widthX, heightY, pen=None, brush=None):
 
@@ -922,10 +1380,10 @@ class FourBarLinkage_View():
 
         self.drawARectangle(left, top, Width, Height, pen=penOutline, brush=brush)
 
-    def drawLinkage(self, stX, stY, enX, enY, radius=10, pen=None, brush=None):
+    def drawLinkage(self, stX=0, stY=0, enX=1, enY=1, radius=10, pen=None, brush=None, core=None):
         if pen is None: pen = self.penLink
         if brush is None: brush = self.brushLink
-        lin1 = RigidLink(stX, stY, enX, enY, radius, pen=pen, brush=brush)
+        lin1 = RigidLink(stX, stY, enX, enY, radius, pen=pen, brush=brush, core=core)
         self.scene.addItem(lin1)
         return lin1
 
@@ -957,28 +1415,93 @@ class FourBarLinkage_Controller():
 
         self.FBL_M = FourBarLinkage_Model()
         self.FBL_V = FourBarLinkage_View(self.gv_Main)
+        self.profiler = None  # a FourBarLinkage_Profiling.Profiler while profiling
+        self.HUD = None
 
     def setupGraphics(self):
         self.FBL_V.setupGraphics()
 
     def buildScene(self):
         self.FBL_V.BuildScene(self.FBL_M)
+        if self.profiler is not None:
+            # clearing the scene deleted the report
+            self.HUD = ProfilerHUD()
+            self.FBL_V.scene.addItem(self.HUD)
+            self.refreshProfile()
 
     def setInputLinkLength(self):
         self.FBL_M.setInputLength(self.nud_Link1Length.value())
-        self.FBL_M.moveLinkage(self.FBL_M.InputLink.enPt)
-        self.FBL_V.scene.update()
+        self.FBL_M.setInputAngle(self.FBL_M.InputLink.angle)
+        self.updateAnalysis()
 
     def setOutputLinkLength(self):
         self.FBL_M.setOutputLength(self.nud_Link3Length.value())
-        self.FBL_M.moveLinkage(self.FBL_M.InputLink.enPt)
-        self.FBL_V.scene.update()
+        self.FBL_M.setInputAngle(self.FBL_M.InputLink.angle)
+        self.updateAnalysis()
+
+    def showAnalysis(self, show=True):
+        """Show or hide the full cycle analysis overlay"""
+        self.FBL_M.Overlay.setVisible(show)
+        self.updateAnalysis()
+
+    def updateAnalysis(self):
+        """Analyze the linkage again after a change of its geometry, if the overlay is shown"""
+        if self.FBL_M.Overlay.isVisible():
+            self.FBL_M.Overlay.setAnalysis(self.FBL_M.analyzeCycle(), self.FBL_M.core.reachableRange())
 
     def moveLinkage(self, scenePos):
         self.FBL_M.moveLinkage(scenePos)
-        self.FBL_V.scene.update()
         self.nud_InputAngle.setValue(self.FBL_M.InputLink.AngleDeg())
         self.lbl_OutputAngle_Val.setText("{:0.2f}".format(self.FBL_M.OutputLink.AngleDeg()))
+
+    def setAngleLimits(self, minDeg, maxDeg):
+        """
+        Keep the dragged input link between minDeg and maxDeg (degrees, 0 ... 360).
+        """
+        self.FBL_M.setAngleLimits(math.radians(minDeg), math.radians(maxDeg))
+        self.nud_InputAngle.setValue(self.FBL_M.InputLink.AngleDeg())
+        self.lbl_OutputAngle_Val.setText("{:0.2f}".format(self.FBL_M.OutputLink.AngleDeg()))
+
+    def startProfiling(self, profiler):
+        """
+        Time the drag path and every paint() with profiler and show its report on the canvas (see refreshProfile).
+        The stages nest:  controller.moveLinkage holds model.moveLinkage, which holds the core's solve and position
+        update (with the tracer appends) and the views' sync.
+        :param profiler: a FourBarLinkage_Profiling.Profiler
+        """
+        self.stopProfiling()
+        self.profiler = profiler
+        M = self.FBL_M
+        profiler.instrument(self, 'moveLinkage', 'controller.moveLinkage')
+        profiler.instrument(M, 'moveLinkage', 'model.moveLinkage')
+        profiler.instrument(M, 'setInputAngle', 'model.setInputAngle')
+        profiler.instrument(M, 'syncViews', 'model.syncViews')
+        profiler.instrument(M, 'syncTracers', 'model.syncTracers')
+        # the core has __slots__, and there is one per model, so its class is instrumented
+        profiler.instrument(type(M.core), 'solveOutputAngle', 'core.solveOutputAngle')
+        profiler.instrument(type(M.core), 'updatePositions', 'core.updatePositions')
+        # Qt calls paint() through the class
+        for cls in (RigidLink, RigidPivotPoint, Tracer, CycleOverlay, LinearSpring, DashPot):
+            profiler.instrument(cls, 'paint', 'paint.' + cls.__name__)
+        self.HUD = ProfilerHUD()
+        self.FBL_V.scene.addItem(self.HUD)
+        self.refreshProfile()
+
+    def stopProfiling(self):
+        """Put the untimed methods back and remove the report from the canvas"""
+        if self.profiler is None:
+            return
+        self.profiler.restore()
+        self.profiler = None
+        self.FBL_V.scene.removeItem(self.HUD)
+        self.HUD = None
+
+    def refreshProfile(self):
+        """Show the current rolling percentiles of the profiler in the top left corner of the view"""
+        if self.profiler is None:
+            return
+        self.HUD.setPos(self.gv_Main.mapToScene(8, 8))
+        self.HUD.setLines(self.profiler.report())
 #endregion
 #endregion
 
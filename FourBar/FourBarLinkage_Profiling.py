@@ -0,0 +1,189 @@
+#region imports
+import functools
+import json
+import time
+import numpy as np
+#endregion
+
+#region stage timers
+"""
+Optional timing of the hot paths of the GUI.  A Profiler wraps the methods it is told to time (instrument) so nothing
+is measured and nothing costs anything until profiling is switched on; each wrapped call adds two perf_counter reads
+and one store into a preallocated ring buffer.  Percentiles are only computed when somebody asks for them (the HUD a
+few times a second, or a dump), never on the timed path.
+"""
+class StageTimes():
+    __slots__ = ('times', 'capacity', 'head', 'count', 'total', 'sum')
+
+    def __init__(self, capacity=2048):
+        """
+        The most recent durations of one stage in a ring buffer.
+        :param capacity: number of durations kept for the rolling percentiles
+        """
+        self.capacity = capacity
+        self.times = np.empty(capacity)
+        self.reset()
+
+    def reset(self):
+        self.head = 0
+        self.count = 0
+        self.total = 0  # every call ever recorded
+        self.sum = 0.0  # and their total time (s)
+
+    def record(self, dt):
+        h = self.head
+        self.times[h] = dt
+        h += 1
+        self.head = 0 if h == self.capacity else h
+        if self.count < self.capacity:
+            self.count += 1
+        self.total += 1
+        self.sum += dt
+
+    def recent(self):
+        """
+        :return: copy of the kept durations (s), oldest first
+        """
+        if self.count < self.capacity:
+            return self.times[:self.count].copy()
+        return np.concatenate((self.times[self.head:], self.times[:self.head]))
+
+    def summary(self):
+        """
+        :return: dict with the number of calls, their total time and the mean, p50, p95, p99 and maximum of the
+                 kept durations (s)
+        """
+        times = self.times[:self.count]
+        if self.count == 0:
+            return {'calls': self.total, 'total': self.sum}
+        p50, p95, p99 = np.percentile(times, (50, 95, 99)).tolist()
+        return {'calls': self.total, 'total': self.sum, 'mean': float(times.mean()), 'p50': p50, 'p95': p95,
+                'p99': p99, 'max': float(times.max())}
+
+
+class Profiler():
+    def __init__(self, capacity=2048):
+        """
+        Rolling timings of named stages and of the displayed frames.
+        :param capacity: number of durations (and frames) kept per stage
+        """
+        self.capacity = capacity
+        self.stages = {}
+        self.frames = StageTimes(capacity)  # intervals between displayed frames
+        self.lastFrame = None
+        self.patches = []  # (owner, attribute, original, was in the owner's own __dict__)
+        self.started = time.perf_counter()
+
+    def stage(self, name):
+        """
+        :return: the StageTimes of stage name, created on first use
+        """
+        times = self.stages.get(name)
+        if times is None:
+            times = self.stages[name] = StageTimes(self.capacity)
+        return times
+
+    def timed(self, fn, name):
+        """
+        Wrap fn so that every call records its duration in stage name.
+        """
+        record = self.stage(name).record
+        clock = time.perf_counter
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(clock() - start)
+        return wrapper
+
+    def instrument(self, owner, attribute, name=None):
+        """
+        Replace owner.attribute by a timed version until restore() is called.  owner is an instance (only its calls
+        are timed) or a class (every instance is timed, as needed for virtual methods such as paint() that Qt calls).
+        :param name: name of the stage, defaults to the attribute
+        """
+        ownDict = attribute in vars(owner)
+        original = getattr(owner, attribute)
+        self.patches.append((owner, attribute, original, ownDict))
+        setattr(owner, attribute, self.timed(original, attribute if name is None else name))
+
+    def restore(self):
+        """
+        Put every instrumented method back.
+        """
+        for owner, attribute, original, ownDict in reversed(self.patches):
+            if ownDict:
+                setattr(owner, attribute, original)
+            else:
+                delattr(owner, attribute)
+        self.patches = []
+
+    def frame(self, now=None):
+        """
+        Record that a frame was displayed.
+        """
+        now = time.perf_counter() if now is None else now
+        if self.lastFrame is not None:
+            self.frames.record(now - self.lastFrame)
+        self.lastFrame = now
+
+    def fps(self, window=1.0, now=None):
+        """
+        :return: frames displayed per second over the last window seconds
+        """
+        now = time.perf_counter() if now is None else now
+        if self.lastFrame is None or now - self.lastFrame > window:
+            return 0.0
+        # walk back through the frame intervals until the window is covered
+        intervals = self.frames.recent()[::-1]
+        elapsed = now - self.lastFrame + np.cumsum(intervals)
+        return float(np.count_nonzero(elapsed <= window) + 1) / window
+
+    def reset(self):
+        for times in self.stages.values():
+            times.reset()
+        self.frames.reset()
+        self.lastFrame = None
+        self.started = time.perf_counter()
+
+    def summary(self):
+        """
+        :return: dict of stage name -> StageTimes.summary(), with the frame intervals as 'frame'
+        """
+        stats = {name: times.summary() for name, times in self.stages.items()}
+        stats['frame'] = self.frames.summary()
+        return stats
+
+    def report(self, unit=1e-3):
+        """
+        The summary as lines of text, one per stage, times in ms.
+        """
+        lines = ["{:0.1f} fps".format(self.fps())]
+        for name, s in sorted(self.summary().items()):
+            if 'p50' not in s:
+                continue
+            lines.append("{:<24s} p50 {:7.3f}  p95 {:7.3f}  p99 {:7.3f} ms  ({})".format(
+                name, s['p50'] / unit, s['p95'] / unit, s['p99'] / unit, s['calls']))
+        return lines
+
+    def dump(self, path):
+        """
+        Write the summary and the kept durations of every stage for offline analysis.
+        :param path: a .json file, or a .npz file of one array of durations (s) per stage plus the summary as JSON
+        :return: path
+        """
+        samples = {name: times.recent() for name, times in self.stages.items()}
+        samples['frame'] = self.frames.recent()
+        meta = {'elapsed': time.perf_counter() - self.started, 'capacity': self.capacity, 'fps': self.fps(),
+                'summary': self.summary()}
+        if path.endswith('.npz'):
+            np.savez_compressed(path, meta=json.dumps(meta), **samples)
+        else:
+            meta['samples'] = {name: times.tolist() for name, times in samples.items()}
+            with open(path, 'w') as f:
+                json.dump(meta, f, indent=2)
+        return path
+#endregion
@@ -0,0 +1,224 @@
+#region imports
+import io
+import json
+import os
+import numpy as np
+#endregion
+
+#region trajectory columns
+"""
+Simulation results on disk.
+
+A trajectory is a set of equally long columns, one value per frame:
+    t                   time (s)
+    theta1, omega1      input angle (rad) and angular velocity (rad/s)
+    theta2, theta3      coupler and output angles (rad)
+    xB, yB, xC, yC      moving ends of the input and output links (Tracer1 and Tracer0)
+    xMid, yMid          coupler midpoint (Tracer2)
+    xP, yP              spring and dashpot attachment on the coupler (Tracer3)
+    springLength        length of the spring/dashpot
+    springForce         spring tension k (length - freeLength)
+    damperForce         dashpot tension c dlength/dt
+
+It is stored either as a directory (name.traj) holding one .npy file per column and a trajectory.json manifest with the
+linkage, or as a single .npz file with the same columns plus a 'meta' entry.  The directory form is written frame
+chunk by frame chunk, so a run of any length is recorded in constant memory, and it is read memory mapped, so a
+recording of millions of frames opens instantly and only the pages that are played back are ever read.  The .npz
+form is compact for exchange but is read one whole column at a time.
+"""
+TRAJECTORY_COLUMNS = ('t', 'theta1', 'omega1', 'theta2', 'theta3', 'xB', 'yB', 'xC', 'yC', 'xMid', 'yMid',
+                      'xP', 'yP', 'springLength', 'springForce', 'damperForce')
+MANIFEST = 'trajectory.json'
+
+
+def trajectoryColumns(dynamics, t, theta, omega):
+    """
+    Every column of a trajectory from the solved states of a FourBarDynamics.
+    :param dynamics: the FourBarDynamics that was integrated (its k, c and freeLength give the forces)
+    :param t: times (s)
+    :param theta: input angles (rad)
+    :param omega: input angular velocities (rad/s)
+    :return: dict of column name -> array
+    """
+    t = np.asarray(t, dtype=float)
+    theta = np.asarray(theta, dtype=float)
+    omega = np.asarray(omega, dtype=float)
+    config = dynamics.configuration(theta)
+    pos = config[0]
+    length, dLength = dynamics.springGeometry(theta, config)
+    freeLength = length if dynamics.freeLength is None else dynamics.freeLength
+    a = dynamics.attach
+    return {'t': t, 'theta1': theta, 'omega1': omega, 'theta2': pos.theta2, 'theta3': pos.theta3,
+            'xB': pos.xB, 'yB': pos.yB, 'xC': pos.xC, 'yC': pos.yC,
+            'xMid': (pos.xB + pos.xC) / 2.0, 'yMid': (pos.yB + pos.yC) / 2.0,
+            'xP': pos.xB + a * (pos.xC - pos.xB), 'yP': pos.yB + a * (pos.yC - pos.yB),
+            'springLength': length, 'springForce': dynamics.k * (length - freeLength),
+            'damperForce': dynamics.c * dLength * omega}
+
+
+def trajectoryMeta(dynamics, **extra):
+    """
+    The linkage a trajectory was recorded on, stored with it so a player can tell whether it matches.
+    """
+    meta = {name: float(getattr(dynamics, name)) for name in
+            ('L1', 'L2', 'L3', 'p0x', 'p0y', 'p1x', 'p1y', 'm1', 'm2', 'm3', 'k', 'c', 'attach')}
+    meta['freeLength'] = None if dynamics.freeLength is None else float(dynamics.freeLength)
+    meta['branch'] = int(dynamics.branch)
+    meta.update(extra)
+    return meta
+#endregion
+
+#region writing
+class TrajectoryWriter():
+    def __init__(self, path, meta=None, columns=TRAJECTORY_COLUMNS):
+        """
+        Streams a trajectory to a directory of .npy columns.  Each column file gets its header when it is created and
+        the header is rewritten with the final length by close(), so frames are appended without ever holding more
+        than one chunk in memory.
+        :param path: the directory to write, created if needed
+        :param meta: JSON-able dict stored in the manifest
+        :param columns: names of the columns
+        """
+        self.path = path
+        self.meta = {} if meta is None else dict(meta)
+        self.columns = tuple(columns)
+        self.count = 0
+        os.makedirs(path, exist_ok=True)
+        self.files = {}
+        for name in self.columns:
+            f = open(os.path.join(path, name + '.npy'), 'wb')
+            f.write(self.header())
+            self.files[name] = f
+        self.dataOffset = len(self.header())
+
+    def header(self):
+        """The .npy header of a column with the frames written so far"""
+        f = io.BytesIO()
+        np.lib.format.write_array_header_1_0(f, {'descr': np.lib.format.dtype_to_descr(np.dtype(float)),
+                                                 'fortran_order': False, 'shape': (self.count,)})
+        return f.getvalue()
+
+    def append(self, columns):
+        """
+        Append frames.
+        :param columns: dict with an equally long array for every column (as from trajectoryColumns)
+        """
+        data = [np.ascontiguousarray(columns[name], dtype=float) for name in self.columns]
+        n = len(data[0])
+        for name, column in zip(self.columns, data):
+            if len(column) != n:
+                raise ValueError("column {} has {} frames, expected {}".format(name, len(column), n))
+        for name, column in zip(self.columns, data):
+            self.files[name].write(column.tobytes())
+        self.count += n
+
+    def close(self):
+        """Write the final lengths and the manifest"""
+        if self.files is None:
+            return
+        header = self.header()
+        for name, f in self.files.items():
+            if len(header) == self.dataOffset:
+                f.seek(0)
+                f.write(header)
+                f.close()
+            else:
+                # the header outgrew its padding (numpy pads it for this, so only with an old numpy): move the data
+                f.close()
+                fileName = os.path.join(self.path, name + '.npy')
+                np.save(fileName, np.fromfile(fileName, dtype=float, offset=self.dataOffset))
+        self.files = None
+        with open(os.path.join(self.path, MANIFEST), 'w') as f:
+            json.dump({'columns': list(self.columns), 'frames': self.count, 'meta': self.meta}, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def saveTrajectory(path, columns, meta=None):
+    """
+    Save a whole trajectory at once.
+    :param path: a .npz file name, anything else is written as a column directory
+    :param columns: dict of column name -> array (as from trajectoryColumns)
+    :param meta: JSON-able dict stored with the trajectory
+    :return: path
+    """
+    meta = {} if meta is None else meta
+    if path.endswith('.npz'):
+        np.savez_compressed(path, meta=json.dumps(meta), **{name: np.asarray(col, dtype=float)
+                                                            for name, col in columns.items()})
+    else:
+        with TrajectoryWriter(path, meta, columns.keys()) as writer:
+            writer.append(columns)
+    return path
+#endregion
+
+#region reading
+class Trajectory():
+    def __init__(self, path):
+        """
+        A saved trajectory.  Columns of a column directory are memory mapped read only, so opening is O(1) and
+        reading frame i only touches the pages that hold it.
+        :param path: a column directory, its trajectory.json, or a .npz file
+        """
+        if os.path.basename(path) == MANIFEST:
+            path = os.path.dirname(path)
+        self.path = path
+        if path.endswith('.npz'):
+            self.data = np.load(path)
+            self.meta = json.loads(str(self.data['meta'])) if 'meta' in self.data.files else {}
+            self.columns = tuple(name for name in self.data.files if name != 'meta')
+            self.frames = len(self.data[self.columns[0]]) if self.columns else 0
+        else:
+            with open(os.path.join(path, MANIFEST)) as f:
+                manifest = json.load(f)
+            self.meta = manifest['meta']
+            self.columns = tuple(manifest['columns'])
+            self.data = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r') for name in self.columns}
+            self.frames = manifest['frames']
+        self.cache = {}
+
+    def __len__(self):
+        return self.frames
+
+    def __getitem__(self, name):
+        """
+        A column.  Memory mapped columns are returned as they are; a .npz column is read once and kept.
+        """
+        if isinstance(self.data, dict):
+            return self.data[name]
+        if name not in self.cache:
+            self.cache[name] = self.data[name]
+        return self.cache[name]
+
+    def frame(self, i):
+        """
+        :return: dict of column name -> value of frame i
+        """
+        return {name: float(self[name][i]) for name in self.columns}
+
+    def indexAt(self, t):
+        """
+        :return: the index of the last frame at or before time t
+        """
+        return max(0, int(np.searchsorted(self['t'], t, side='right')) - 1)
+
+    def matches(self, dynamics, tol=1e-6):
+        """
+        :return: True if the trajectory was recorded on a linkage with the geometry of dynamics
+        """
+        for name in ('L1', 'L2', 'L3', 'p0x', 'p0y', 'p1x', 'p1y'):
+            value = getattr(dynamics, name)
+            if not abs(self.meta.get(name, np.nan) - value) <= tol * max(1.0, abs(value)):
+                return False
+        return True
+
+    def close(self):
+        if not isinstance(self.data, dict):
+            self.data.close()
+        self.data = {}
+        self.cache = {}
+#endregion
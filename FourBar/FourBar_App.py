@@ -1,11 +1,15 @@
 # region imports
 from FourBar_GUI import Ui_Form
 from FourBarLinkage_MVC import FourBarLinkage_Controller
+from FourBarLinkage_Dynamics import FourBarDynamics, RealTimeStepper
+from FourBarLinkage_Trajectory import Trajectory, saveTrajectory, trajectoryColumns, trajectoryMeta
+from FourBarLinkage_Profiling import Profiler
 import PyQt5.QtGui as qtg
 import PyQt5.QtCore as qtc
 import PyQt5.QtWidgets as qtw
 import math
 import sys
+import time
 import numpy as np
 import scipy as sp
 from scipy import optimize
@@ -15,6 +19,44 @@ from copy import deepcopy as dc
 # endregion
 
 # region class definitions
+class SimulationWorker(qtc.QObject):
+    """
+    Integrates a FourBarDynamics off the GUI thread and streams the solution back in chunks.
+
+    Signals:
+        chunkReady(t, theta, omega): times (s), input angles (deg) and speeds (rad/s) of the next solved piece
+        finished(completed): emitted once at the end, completed is False if the run was cancelled or failed
+        failed(message): the integrator stopped with an error
+    """
+    chunkReady = qtc.pyqtSignal(object, object, object)
+    finished = qtc.pyqtSignal(bool)
+    failed = qtc.pyqtSignal(str)
+
+    def __init__(self, dynamics, theta0, omega0=0.0, tMax=5.0, fps=60, chunk=0.25, method='auto'):
+        super().__init__()
+        self.dynamics = dynamics
+        self.args = (theta0, omega0, tMax, fps, chunk, method)
+        self.cancelled = False
+
+    def run(self):
+        """Integrate chunk by chunk until done or cancelled"""
+        completed = False
+        try:
+            for t, y in self.dynamics.simulateChunks(*self.args):
+                if self.cancelled:
+                    break
+                self.chunkReady.emit(t, np.degrees(y[0]), y[1])
+            else:
+                completed = True
+        except Exception as e:
+            self.failed.emit(str(e))
+        self.finished.emit(completed and not self.cancelled)
+
+    def cancel(self):
+        """Stop after the chunk that is being solved"""
+        self.cancelled = True
+
+
 class MainWindow(Ui_Form, qtw.QWidget):
     """
     Main application window for Four-Bar Linkage simulation.
@@ -61,6 +103,9 @@ class MainWindow(Ui_Form, qtw.QWidget):
         self.nud_Mass3 = qtw.QDoubleSpinBox(self)
         self.nud_SpringK = qtw.QDoubleSpinBox(self)
         self.nud_DampC = qtw.QDoubleSpinBox(self)
+        self.cmb_Method = qtw.QComboBox(self)
+        self.chk_RealTime = qtw.QCheckBox("real time", self)
+        self.chk_Analysis = qtw.QCheckBox("analysis", self)
         self.btn_Simulate = qtw.QPushButton("Simulate", self)
 
         # Configure ranges and defaults for physics parameters
@@ -70,12 +115,15 @@ class MainWindow(Ui_Form, qtw.QWidget):
             nud.setSuffix(" kg")
         self.nud_SpringK.setRange(0.0, 1000.0)
         self.nud_SpringK.setValue(50.0)
-        self.nud_SpringK.setSuffix(" N·m/rad")
+        self.nud_SpringK.setSuffix(" N/m")
         self.nud_DampC.setRange(0.0, 100.0)
         self.nud_DampC.setValue(5.0)
-        self.nud_DampC.setSuffix(" N·m·s/rad")
+        self.nud_DampC.setSuffix(" N·s/m")
+        # auto: RK45, switching to Radau with the analytic Jacobian when the motion is stiff
+        self.cmb_Method.addItems(["auto", "RK45", "Radau", "BDF", "LSODA"])
 
         # Add widgets to horizontal layout
+        self.horizontalLayout.addWidget(self.chk_Analysis)
         self.horizontalLayout.addWidget(self.nud_MinAngle)
         self.horizontalLayout.addWidget(self.nud_MaxAngle)
         self.horizontalLayout.addWidget(qtw.QLabel("m1:"))
@@ -88,13 +136,46 @@ class MainWindow(Ui_Form, qtw.QWidget):
         self.horizontalLayout.addWidget(self.nud_SpringK)
         self.horizontalLayout.addWidget(qtw.QLabel("c:"))
         self.horizontalLayout.addWidget(self.nud_DampC)
+        self.horizontalLayout.addWidget(qtw.QLabel("solver:"))
+        self.horizontalLayout.addWidget(self.cmb_Method)
+        self.horizontalLayout.addWidget(self.chk_RealTime)
         self.horizontalLayout.addWidget(self.btn_Simulate)
 
+        # ─── build the playback controls for saved runs ─────────────────────
+        self.btn_SaveRun = qtw.QPushButton("Save run...", self)
+        self.btn_OpenRun = qtw.QPushButton("Open run...", self)
+        self.btn_Play = qtw.QPushButton("Play", self)
+        self.sld_Frame = qtw.QSlider(qtc.Qt.Horizontal, self)
+        self.lbl_Frame = qtw.QLabel("", self)
+        self.btn_SaveRun.setEnabled(False)
+        self.btn_Play.setEnabled(False)
+        self.sld_Frame.setEnabled(False)
+        self.horizontalLayout_Playback = qtw.QHBoxLayout()
+        self.horizontalLayout_Playback.addWidget(self.btn_SaveRun)
+        self.horizontalLayout_Playback.addWidget(self.btn_OpenRun)
+        self.horizontalLayout_Playback.addWidget(self.btn_Play)
+        self.horizontalLayout_Playback.addWidget(self.sld_Frame)
+        self.horizontalLayout_Playback.addWidget(self.lbl_Frame)
+        # ─── and the profiling controls ─────────────────────────────────────
+        self.chk_Profile = qtw.QCheckBox("profile", self)
+        self.btn_DumpProfile = qtw.QPushButton("Dump timings...", self)
+        self.btn_DumpProfile.setEnabled(False)
+        self.horizontalLayout_Playback.addWidget(self.chk_Profile)
+        self.horizontalLayout_Playback.addWidget(self.btn_DumpProfile)
+        self.verticalLayout.addLayout(self.horizontalLayout_Playback)
+
         # Connect signals and slots
-        self.nud_MinAngle.valueChanged.connect(self._clampInputAngle)
-        self.nud_MaxAngle.valueChanged.connect(self._clampInputAngle)
-        self.btn_Simulate.clicked.connect(self.startSimulation)
+        self.nud_MinAngle.valueChanged.connect(self._setAngleLimits)
+        self.nud_MaxAngle.valueChanged.connect(self._setAngleLimits)
+        self.btn_Simulate.clicked.connect(self._onSimulateClicked)
         self.nud_SpringK.valueChanged.connect(self._updateSpringConstant)
+        self.nud_DampC.valueChanged.connect(self._updateDampingCoefficient)
+        self.btn_SaveRun.clicked.connect(self.saveRun)
+        self.btn_OpenRun.clicked.connect(self.openRun)
+        self.btn_Play.clicked.connect(self._onPlayClicked)
+        self.sld_Frame.valueChanged.connect(self._onFrameScrubbed)
+        self.chk_Profile.toggled.connect(self.setProfiling)
+        self.btn_DumpProfile.clicked.connect(self.dumpProfile)
 
         # region UserInterface setup
         # Initialize graphics view and controller
@@ -127,10 +208,48 @@ class MainWindow(Ui_Form, qtw.QWidget):
         self.spnd_Zoom.valueChanged.connect(self.setZoom)
         self.nud_Link1Length.valueChanged.connect(self.setInputLinkLength)
         self.nud_Link3Length.valueChanged.connect(self.setOutputLinkLength)
+        self.chk_Analysis.toggled.connect(self.FBL_C.showAnalysis)
 
         # Install event filter for scene interactions
         self.FBL_C.FBL_V.scene.installEventFilter(self)
         self.mouseDown = False
+
+        # Mouse moves only store the newest position; dragTimer applies it once per display frame and titleTimer
+        # shows the newest coordinates a few times a second, so fast mice cannot queue up solves and repaints
+        self.pendingDrag = None
+        self.pendingTitle = None
+        refreshRate = qtw.QApplication.primaryScreen().refreshRate() if qtw.QApplication.primaryScreen() else 60.0
+        self.dragTimer = qtc.QTimer(self)
+        self.dragTimer.setSingleShot(True)
+        self.dragTimer.setTimerType(qtc.Qt.PreciseTimer)
+        self.dragTimer.setInterval(max(1, int(1000 / (refreshRate if refreshRate > 0 else 60.0))))
+        self.dragTimer.timeout.connect(self._applyPendingDrag)
+        self.titleTimer = qtc.QTimer(self)
+        self.titleTimer.setSingleShot(True)
+        self.titleTimer.setInterval(100)
+        self.titleTimer.timeout.connect(self._showPendingTitle)
+
+        # Simulation state
+        self.simThread = None
+        self.simWorker = None
+        self.simRuns = {}  # every integration thread that is still running -> its worker, cancelled ones included
+        self.simSolving = False
+        self.sim_t = []
+        self.sim_theta = []
+        self.sim_omega = []
+        self.sim_index = 0
+        self.simDynamics = None  # the dynamics of the last solved run, for saving it
+        self.playback = None  # an opened Trajectory, played back instead of sim_theta
+        self.rtStepper = None  # the running real-time simulation, if any
+        self.rtClock = 0.0
+        self.timer = qtc.QTimer(self)
+        self.timer.setInterval(int(1000 / 60))  # ~60 FPS
+        # looked up on every tick, so the profiler can time it
+        self.timer.timeout.connect(lambda: self._stepSimulation())
+        self.profiler = None  # a Profiler while profiling is on
+        self.profileTimer = qtc.QTimer(self)
+        self.profileTimer.setInterval(250)  # the HUD is refreshed 4 times a second
+        self.profileTimer.timeout.connect(self.FBL_C.refreshProfile)
         self.show()
         # endregion
 
@@ -144,9 +263,47 @@ class MainWindow(Ui_Form, qtw.QWidget):
 
     def mouseMoveEvent(self, a0: qtg.QMouseEvent):
         """Track mouse position and update window title"""
-        w = app.widgetAt(a0.globalPos())
-        name = w.objectName() if w else "none"
-        self.setWindowTitle(f"{a0.x()},{a0.y()},{name}")
+        x, y, globalPos = a0.x(), a0.y(), a0.globalPos()
+
+        def title():
+            w = app.widgetAt(globalPos)
+            name = w.objectName() if w else "none"
+            return f"{x},{y},{name}"
+        self._setTitleLater(title)
+
+    # region === Drag Coalescing ===
+    def _setTitleLater(self, title):
+        """
+        Show a window title at most titleTimer's interval after the last one, however fast the mouse moves.
+        :param title: function returning the text, only called for the title that is finally shown
+        """
+        self.pendingTitle = title
+        if not self.titleTimer.isActive():
+            self.titleTimer.start()
+
+    def _showPendingTitle(self):
+        if self.pendingTitle is not None:
+            self.setWindowTitle(self.pendingTitle())
+            self.pendingTitle = None
+
+    def _dragLater(self, scenePos):
+        """
+        Follow a drag at most once per display frame.  The first move after a quiet frame is applied at once; moves
+        within the frame after it only replace the pending position, which dragTimer applies when the frame is over.
+        So any number of mouse moves per frame costs one solve and one repaint.
+        """
+        self.pendingDrag = scenePos
+        if not self.dragTimer.isActive():
+            self._applyPendingDrag()
+
+    def _applyPendingDrag(self):
+        """Move the linkage to the newest drag position, if there is one, and start the next frame"""
+        scenePos, self.pendingDrag = self.pendingDrag, None
+        if scenePos is None or self.timer.isActive():
+            return  # nothing new, or a simulation took over the linkage
+        self.FBL_C.moveLinkage(scenePos)
+        self.dragTimer.start()
+    # endregion
 
     def eventFilter(self, obj, event):
         """
@@ -157,17 +314,14 @@ class MainWindow(Ui_Form, qtw.QWidget):
         """
         if obj == self.FBL_C.FBL_V.scene:
             if event.type() == qtc.QEvent.GraphicsSceneMouseMove:
-                # Update position displays
+                # Update position displays, a few times a second at most
                 screenPos = event.screenPos()
                 scenePos = event.scenePos()
-                self.setWindowTitle(
-                    f"screen x={screenPos.x()}, y={screenPos.y()} : "
-                    f"scene x={scenePos.x()}, y={scenePos.y()}"
-                )
-                # Handle linkage dragging
+                self._setTitleLater(lambda: f"screen x={screenPos.x()}, y={screenPos.y()} : "
+                                            f"scene x={scenePos.x()}, y={scenePos.y()}")
+                # Handle linkage dragging, once per display frame with the newest position
                 if self.mouseDown:
-                    self.FBL_C.moveLinkage(scenePos)
-                    self._clampInputAngle()
+                    self._dragLater(scenePos)
 
             elif event.type() == qtc.QEvent.GraphicsSceneWheel:
                 # Handle zoom control
@@ -182,50 +336,41 @@ class MainWindow(Ui_Form, qtw.QWidget):
                     self.mouseDown = True
 
             elif event.type() == qtc.QEvent.GraphicsSceneMouseRelease:
-                # Stop dragging
+                # Stop dragging where the mouse was let go
+                self._applyPendingDrag()
+                self.dragTimer.stop()
                 self.mouseDown = False
 
+        elif self.profiler is not None and obj is self.gv_Main.viewport() and event.type() == qtc.QEvent.Paint:
+            # every repaint of the view is a displayed frame
+            self.profiler.frame()
+
         return super(MainWindow, self).eventFilter(obj, event)
 
+    def closeEvent(self, event):
+        """Stop every integration thread before the window, their parent, is destroyed"""
+        self.timer.stop()
+        for thread, worker in list(self.simRuns.items()):
+            worker.cancel()
+            thread.quit()
+            thread.wait()
+        self.simRuns = {}
+        super().closeEvent(event)
+
     def setZoom(self):
         """Apply zoom transformation to graphics view"""
         self.gv_Main.resetTransform()
         self.gv_Main.scale(self.spnd_Zoom.value(), self.spnd_Zoom.value())
+        # the grid spacing follows the zoom, so the cached background is stale
+        self.gv_Main.resetCachedContent()
 
     # region === Angle Clamping Methods ===
-    def _clampInputAngle(self):
+    def _setAngleLimits(self):
         """
-        Constrain input angle to user-defined min/max range
-        Updates linkage position and view if correction needed
+        Constrain the dragged input angle to the user-defined min/max range.  The model clamps to it before its single
+        solve, and moves the linkage only if it is outside the new range.
         """
-        amin = self.nud_MinAngle.value()
-        amax = self.nud_MaxAngle.value()
-        curr = self.FBL_C.FBL_M.InputLink.AngleDeg()
-
-        # Determine if clamping needed
-        if curr < amin:
-            target = amin
-        elif curr > amax:
-            target = amax
-        else:
-            target = None
-
-        if target is not None:
-            # Update linkage position
-            rad = math.radians(target)
-            link = self.FBL_C.FBL_M.InputLink
-            link.angle = rad
-            L = link.length
-            st = link.stPt
-            link.enPt.setX(st.x() + math.cos(rad) * L)
-            link.enPt.setY(st.y() - math.sin(rad) * L)
-            self.FBL_C.FBL_M.moveLinkage(link.enPt)
-            self.FBL_C.FBL_V.scene.update()
-
-        # Update input angle display
-        self.nud_InputAngle.setValue(
-            self.FBL_C.FBL_M.InputLink.AngleDeg()
-        )
+        self.FBL_C.setAngleLimits(self.nud_MinAngle.value(), self.nud_MaxAngle.value())
 
     # endregion
 
@@ -234,8 +379,8 @@ class MainWindow(Ui_Form, qtw.QWidget):
         """
         Initialize and run physics simulation:
         - Collect parameters from UI
-        - Calculate moment of inertia
-        - Set up and solve differential equations
+        - Build the Lagrangian dynamics (configuration dependent inertia, spring and dashpot at Tracer3)
+        - Solve differential equations
         - Start animation timer
         """
         # Get parameters from UI
@@ -245,88 +390,262 @@ class MainWindow(Ui_Form, qtw.QWidget):
         k = self.nud_SpringK.value()
         c = self.nud_DampC.value()
 
-        # Get link lengths from model
-        L1 = self.FBL_C.FBL_M.InputLink.length
-        L2 = self.FBL_C.FBL_M.DragLink.length
-        L3 = self.FBL_C.FBL_M.OutputLink.length
-
-        # Calculate moments of inertia (assuming thin rods)
-        I1 = (1 / 3) * m1 * L1 ** 2
-        I2 = (1 / 3) * m2 * L2 ** 2
-        I3 = (1 / 3) * m3 * L3 ** 2
-        I_tot = I1 + I2 + I3
+        # Link lengths, pivots and the spring's free length come from the model
+        dynamics = FourBarDynamics.fromCore(self.FBL_C.FBL_M.core, m1, m2, m3, k, c)
 
-        # Set equilibrium and initial conditions
-        θ_eq = 90.0  # Spring equilibrium at 90 degrees
-        θ0 = self.FBL_C.FBL_M.InputLink.AngleDeg()
+        # Set initial conditions
+        θ0 = self.FBL_C.FBL_M.InputLink.angle
         ω0 = 0.0  # Initial angular velocity
 
+        if self.chk_RealTime.isChecked():
+            self.startRealTimeSimulation(dynamics, θ0, ω0)
+            return
+
         # Configure time parameters
         t_max = 5.0  # Simulation duration (seconds)
-        t_eval = np.linspace(0, t_max, int(t_max * 60))  # 60 Hz sampling
-
-        # Define system dynamics
-        def state_eq(t, y):
-            """System state equations for ODE solver"""
-            θ, ω = y
-            return [ω, (-k * (θ - θ_eq) - c * ω) / I_tot]
-
-        # Solve differential equations
-        sol = sp.integrate.solve_ivp(
-            state_eq,
-            (0, t_max),
-            [θ0, ω0],
-            t_eval=t_eval,
-            rtol=1e-6, atol=1e-8
-        )
 
-        # Store simulation results
-        self.sim_t = sol.t
-        self.sim_theta = sol.y[0]
+        # Solve differential equations (60 Hz sampling) on a worker thread
+        self.sim_t = []
+        self.sim_theta = []
+        self.sim_omega = []
         self.sim_index = 0
+        self.simDynamics = dynamics
+        self.closePlayback()
+        self.btn_SaveRun.setEnabled(False)
+        self.simSolving = True
+        self.simThread = qtc.QThread(self)
+        self.simWorker = SimulationWorker(dynamics, θ0, ω0, tMax=t_max, fps=60, method=self.cmb_Method.currentText())
+        self.simWorker.moveToThread(self.simThread)
+        self.simThread.started.connect(self.simWorker.run)
+        self.simWorker.chunkReady.connect(self._onSimulationChunk)
+        self.simWorker.failed.connect(self._onSimulationFailed)
+        self.simWorker.finished.connect(self._onSimulationSolved)
+        self.simWorker.finished.connect(self.simThread.quit)
+        self.simThread.finished.connect(self._onSimulationThreadFinished)
+        self.simThread.finished.connect(self.simWorker.deleteLater)
+        self.simThread.finished.connect(self.simThread.deleteLater)
+        self.simRuns[self.simThread] = self.simWorker
 
-        # Configure animation timer
-        self.timer = qtc.QTimer(self)
-        self.timer.setInterval(int(1000 / 60))  # ~60 FPS
-        self.timer.timeout.connect(self._stepSimulation)
         # Disable user interaction during simulation
         self.FBL_C.FBL_V.scene.removeEventFilter(self)
+        self.btn_Simulate.setText("Cancel")
+        self.simThread.start()
+        # Animation starts as soon as the first chunk arrives
         self.timer.start()
 
+    def startRealTimeSimulation(self, dynamics, θ0, ω0=0.0):
+        """
+        Advance the dynamics a fixed step at a time on every timer tick, in step with the wall clock, until the user
+        stops it.  k and c follow nud_SpringK and nud_DampC while it runs.
+        """
+        self.closePlayback()
+        self.rtStepper = RealTimeStepper(dynamics, θ0, ω0)
+        self.rtClock = time.perf_counter()
+        self.FBL_C.FBL_V.scene.removeEventFilter(self)
+        self.btn_Simulate.setText("Stop")
+        self.timer.start()
+
+    def cancelSimulation(self):
+        """Stop the integration and the animation and give control back to the user"""
+        self.rtStepper = None
+        if self.simWorker is not None:
+            self.simWorker.cancel()
+        # the cancelled worker may still deliver a chunk; it is ignored once it is no longer self.simWorker.  Its
+        # thread stays in self.simRuns until it has finished the chunk it is solving
+        self.simWorker = None
+        self.simSolving = False
+        self._endSimulation()
+
+    def _onSimulateClicked(self):
+        """The simulate button doubles as a cancel button while a simulation runs"""
+        if self.timer.isActive() or self.simSolving or self.rtStepper is not None:
+            self.cancelSimulation()
+        else:
+            self.startSimulation()
+
+    def _onSimulationChunk(self, t, theta, omega):
+        """Queue a solved piece of the trajectory for animation"""
+        if self.sender() is self.simWorker:
+            self.sim_t.extend(t)
+            self.sim_theta.extend(theta)
+            self.sim_omega.extend(omega)
+
+    def _onSimulationSolved(self, completed):
+        """The worker is done; the animation keeps going until all frames are shown"""
+        if self.sender() is not self.simWorker:
+            return
+        self.simSolving = False
+        self.simWorker = None
+        self.btn_SaveRun.setEnabled(len(self.sim_t) > 0)
+
+    def _onSimulationThreadFinished(self):
+        """An integration thread, current or cancelled, has stopped and is about to be deleted"""
+        thread = self.sender()
+        self.simRuns.pop(thread, None)
+        if thread is self.simThread:
+            self.simThread = None
+
+    def _onSimulationFailed(self, message):
+        self.setWindowTitle(f"simulation failed: {message}")
+
+    def _endSimulation(self):
+        self.timer.stop()
+        self.btn_Simulate.setText("Simulate")
+        self.btn_Play.setText("Play")
+        self.FBL_C.FBL_V.scene.removeEventFilter(self)  # never install the filter twice
+        self.FBL_C.FBL_V.scene.installEventFilter(self)
+
     def _stepSimulation(self):
         """Update linkage position for current simulation step"""
-        if self.sim_index < len(self.sim_theta):
+        if self.rtStepper is not None:
+            now = time.perf_counter()
+            self.rtStepper.advance(now - self.rtClock)
+            self.rtClock = now
+            self.FBL_C.FBL_M.setInputAngle(self.rtStepper.theta)
+            self.nud_InputAngle.setValue(math.degrees(self.rtStepper.theta))
+        elif self.playback is not None:
+            if self.sim_index < len(self.playback):
+                self.showFrame(self.sim_index)
+                self.sim_index += 1
+            else:
+                self._endSimulation()
+        elif self.sim_index < len(self.sim_theta):
             θ = self.sim_theta[self.sim_index]
             # Update model with new angle
-            rad = math.radians(θ)
-            link = self.FBL_C.FBL_M.InputLink
-            link.angle = rad
-            L = link.length
-            st = link.stPt
-            link.enPt.setX(st.x() + math.cos(rad) * L)
-            link.enPt.setY(st.y() - math.sin(rad) * L)
-            self.FBL_C.FBL_M.moveLinkage(link.enPt)
-            # Refresh view and UI
-            self.FBL_C.FBL_V.scene.update()
+            self.FBL_C.FBL_M.setInputAngle(math.radians(θ))
+            # Refresh UI, the moved items repaint themselves
             self.nud_InputAngle.setValue(θ)
             self.sim_index += 1
-        else:
+        elif not self.simSolving:
             # End simulation
-            self.timer.stop()
-            self.FBL_C.FBL_V.scene.installEventFilter(self)
+            self._endSimulation()
+        # otherwise wait for the next chunk from the worker
 
     # endregion
 
+    # region === Saved Runs ===
+    def saveRun(self):
+        """Write the last solved simulation (all joints, angles and forces per frame) to a trajectory file"""
+        if not self.sim_t or self.simDynamics is None:
+            return
+        fileName, _ = qtw.QFileDialog.getSaveFileName(self, "Save run", "run.traj",
+                                                      "Trajectory, memory mapped (*.traj);;Compressed (*.npz)")
+        if fileName:
+            columns = trajectoryColumns(self.simDynamics, self.sim_t, np.radians(self.sim_theta), self.sim_omega)
+            saveTrajectory(fileName, columns, trajectoryMeta(self.simDynamics, fps=60))
+
+    def openRun(self):
+        """Open a saved trajectory for playback and scrubbing"""
+        fileName, _ = qtw.QFileDialog.getOpenFileName(self, "Open run", "",
+                                                      "Trajectories (trajectory.json *.npz)")
+        if fileName:
+            self.loadRun(fileName)
+
+    def loadRun(self, fileName):
+        """
+        Open a trajectory memory mapped and show its first frame.  The input angles are played back on the linkage on
+        screen, so a run recorded on a different linkage only reproduces its input motion.
+        :param fileName: a .traj directory, its trajectory.json or a .npz file
+        """
+        self.cancelSimulation()
+        self.closePlayback()
+        self.playback = Trajectory(fileName)
+        dynamics = FourBarDynamics.fromCore(self.FBL_C.FBL_M.core)
+        if not self.playback.matches(dynamics):
+            self.setWindowTitle("run was recorded on a different linkage, playing its input angles")
+        self.sim_index = 0
+        self.sld_Frame.setRange(0, max(0, len(self.playback) - 1))
+        self.sld_Frame.setEnabled(True)
+        self.btn_Play.setEnabled(True)
+        self.showFrame(0)
+
+    def closePlayback(self):
+        if self.playback is not None:
+            self.playback.close()
+            self.playback = None
+        self.sld_Frame.setEnabled(False)
+        self.btn_Play.setEnabled(False)
+        self.lbl_Frame.setText("")
+
+    def showFrame(self, i):
+        """Put the linkage in frame i of the opened trajectory"""
+        if not 0 <= i < len(self.playback):
+            return
+        θ = float(self.playback['theta1'][i])
+        self.FBL_C.FBL_M.setInputAngle(θ)
+        self.nud_InputAngle.setValue(math.degrees(θ))
+        self.sld_Frame.blockSignals(True)
+        self.sld_Frame.setValue(i)
+        self.sld_Frame.blockSignals(False)
+        self.lbl_Frame.setText("t = {:0.3f} s".format(self.playback['t'][i]))
+
+    def _onPlayClicked(self):
+        """Play the opened trajectory from the current frame, or pause it"""
+        if self.timer.isActive():
+            self._endSimulation()
+        elif self.playback is not None:
+            if self.sim_index >= len(self.playback):
+                self.sim_index = 0
+            self.FBL_C.FBL_V.scene.removeEventFilter(self)
+            self.btn_Play.setText("Pause")
+            self.timer.start()
+
+    def _onFrameScrubbed(self, i):
+        if self.playback is not None:
+            self.sim_index = i
+            self.showFrame(i)
+    # endregion
+
+    # region === Profiling ===
+    def setProfiling(self, on=True):
+        """
+        Switch the timing of the drag path, paint() and _stepSimulation on or off.  While it is on, the rolling
+        percentiles of every stage and the frame rate are shown over the scene and can be dumped to a file.
+        """
+        if on and self.profiler is None:
+            self.profiler = Profiler()
+            self.profiler.instrument(self, '_stepSimulation', 'stepSimulation')
+            self.FBL_C.startProfiling(self.profiler)
+            self.gv_Main.viewport().installEventFilter(self)
+            self.profileTimer.start()
+        elif not on and self.profiler is not None:
+            self.profileTimer.stop()
+            self.gv_Main.viewport().removeEventFilter(self)
+            self.FBL_C.stopProfiling()
+            self.profiler.restore()
+            self.profiler = None
+        self.btn_DumpProfile.setEnabled(self.profiler is not None)
+
+    def dumpProfile(self):
+        """Write the timings collected so far to a file for offline analysis"""
+        if self.profiler is None:
+            return
+        fileName, _ = qtw.QFileDialog.getSaveFileName(self, "Dump timings", "timings.json",
+                                                      "JSON (*.json);;Compressed arrays (*.npz)")
+        if fileName:
+            self.profiler.dump(fileName)
+    # endregion
+
     # region === Spring Constant Updates ===
     def _updateSpringConstant(self, k_new: float):
         """
         Update spring constant in model and refresh display
         Args:
-            k_new: New spring constant value (N·m/rad)
+            k_new: New spring constant value (N/m)
+        """
+        self.FBL_C.FBL_M.Spring.setk(k_new)
+        if self.rtStepper is not None:
+            self.rtStepper.dynamics.k = k_new
+
+    def _updateDampingCoefficient(self, c_new: float):
+        """
+        Update the dashpot coefficient in the model, and in a running real-time simulation
+        Args:
+            c_new: New damping coefficient (N·s/m)
         """
-        self.FBL_C.FBL_M.Spring.k = k_new
-        self.FBL_C.FBL_M.Spring.setToolTip(f"k = {k_new:.1f} N·m/rad")
-        self.FBL_C.FBL_V.scene.update()
+        self.FBL_C.FBL_M.DashPot.setc(c_new)
+        if self.rtStepper is not None:
+            self.rtStepper.dynamics.c = c_new
     # endregion
 
 
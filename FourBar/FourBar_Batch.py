@@ -0,0 +1,220 @@
+# region imports
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import FourBarLinkage_Kinematics as kin
+from FourBarLinkage_Core import FourBarLinkage_Core
+from FourBarLinkage_Dynamics import FourBarDynamics
+from FourBarLinkage_Trajectory import TrajectoryWriter, saveTrajectory, trajectoryColumns, trajectoryMeta
+# endregion
+
+# region linkage specs
+"""
+Headless batch runs of the four bar linkage, without Qt.
+
+A linkage spec is a dict (usually read from a JSON file) with any of these keys; missing keys take the defaults of the
+GUI, so {} is the linkage and the simulation the GUI starts with:
+    name            used for the output file names (default spec<i>)
+    pivot0, pivot1  [x, y] of the input and output pivots
+    B, C            [x, y] of the moving joints, the link lengths are taken from this pose (as in BuildScene)
+    L1, L2, L3      input, coupler and output link lengths, used instead of B and C when L1 is given
+    theta1          input angle (deg) of the pose built from L1, L2, L3
+    branch          'open' or 'crossed', assembly of the pose built from L1, L2, L3
+    m1, m2, m3      link masses (kg)
+    k, c            spring constant (N/m) and dashpot coefficient (N*s/m)
+    freeLength      free length of the spring, default: free in the initial pose
+    mode            'sweep', 'simulate' or 'both'
+    step            input angle increment of the kinematic sweep (deg)
+    theta0, omega0  initial input angle (deg, default: the initial pose) and speed (rad/s) of the simulation
+    tMax, fps       duration (s) and output samples per second of the simulation
+    method          solve_ivp method ('RK45', 'Radau', 'BDF', 'LSODA', ...) or 'auto' for stiffness detection
+    format          'npz' for one compressed trajectory file, or 'traj' for a memory mappable column directory that
+                    is written chunk by chunk while the simulation runs (for long runs, see FourBarLinkage_Trajectory)
+
+A spec file holds one spec, a list of specs, or {"defaults": {...}, "specs": [...]} where the defaults apply to every
+spec in the list.
+"""
+DEFAULT_SPEC = {'pivot0': [-100.0, 0.0], 'pivot1': [60.0, 0.0], 'B': [-100.0, -60.0], 'C': [100.0, -150.0],
+                'theta1': 90.0, 'branch': 'open',
+                'm1': 1.0, 'm2': 1.0, 'm3': 1.0, 'k': 50.0, 'c': 5.0, 'freeLength': None,
+                'mode': 'both', 'step': 0.1, 'theta0': None, 'omega0': 0.0, 'tMax': 5.0, 'fps': 60, 'method': 'RK45',
+                'format': 'npz'}
+BRANCHES = {'open': kin.OPEN, 'crossed': kin.CROSSED}
+
+
+def loadSpecs(path):
+    """
+    Read the specs of a spec file.
+    :param path: a JSON spec file
+    :return: a list of spec dicts
+    """
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict) and 'specs' in data:
+        defaults = data.get('defaults', {})
+        return [dict(defaults, **spec) for spec in data['specs']]
+    return data if isinstance(data, list) else [data]
+
+
+def completeSpec(spec, index=0):
+    """
+    Fill in the defaults of a spec.
+    :return: a new dict with every key of DEFAULT_SPEC
+    """
+    unknown = set(spec) - set(DEFAULT_SPEC) - {'name', 'L1', 'L2', 'L3'}
+    if unknown:
+        raise ValueError("unknown spec keys: " + ", ".join(sorted(unknown)))
+    full = dict(DEFAULT_SPEC, name='spec{}'.format(index))
+    full.update(spec)
+    if full['mode'] not in ('sweep', 'simulate', 'both'):
+        raise ValueError("mode must be 'sweep', 'simulate' or 'both', not {!r}".format(full['mode']))
+    if full['format'] not in ('npz', 'traj'):
+        raise ValueError("format must be 'npz' or 'traj', not {!r}".format(full['format']))
+    return full
+
+
+def buildCore(spec):
+    """
+    Place a FourBarLinkage_Core as described by a (complete) spec.
+    :return: the core
+    """
+    p0x, p0y = spec['pivot0']
+    p1x, p1y = spec['pivot1']
+    if spec.get('L1') is None:
+        (bx, by), (cx, cy) = spec['B'], spec['C']
+    else:
+        L1, L2, L3 = spec['L1'], spec['L2'], spec['L3']
+        theta1 = math.radians(spec['theta1'])
+        solution = kin.solveOutputAngle(theta1, L1, L2, L3, p0x, p0y, p1x, p1y, BRANCHES[spec['branch']])
+        if solution is None:
+            raise ValueError("the linkage cannot be assembled at theta1 = {} deg".format(spec['theta1']))
+        bx, by = kin.inputJoint(theta1, L1, p0x, p0y)
+        cx, cy = kin.inputJoint(solution[0], L3, p1x, p1y)
+    core = FourBarLinkage_Core()
+    core.setup(p0x, p0y, p1x, p1y, bx, by, cx, cy)
+    return core
+# endregion
+
+# region runs
+def runSweep(core, spec, outDir):
+    """
+    Solve the linkage over a full revolution of the input link and save the positions.
+    :return: (file name, summary dict)
+    """
+    pos = core.solvePositions(np.radians(np.arange(0.0, 360.0, spec['step'])))
+    fileName = os.path.join(outDir, spec['name'] + '_sweep.npz')
+    np.savez(fileName, **pos._asdict())
+    valid = pos.valid
+    summary = {'validFraction': float(valid.mean())}
+    if valid.any():
+        theta3 = np.degrees(pos.theta3[valid])
+        summary['theta3Min'] = float(theta3.min())
+        summary['theta3Max'] = float(theta3.max())
+    return fileName, summary
+
+
+def runSimulation(core, spec, outDir):
+    """
+    Integrate the dynamics like MainWindow.startSimulation does and save the trajectory (see FourBarLinkage_Trajectory).
+    :return: (file name, summary dict)
+    """
+    dynamics = FourBarDynamics.fromCore(core, spec['m1'], spec['m2'], spec['m3'], spec['k'], spec['c'])
+    if spec['freeLength'] is not None:
+        dynamics.freeLength = spec['freeLength']
+    theta0 = core.InputLink.angle if spec['theta0'] is None else math.radians(spec['theta0'])
+    if spec['format'] == 'traj':
+        # stream chunk by chunk, memory stays constant however long the run
+        fileName = os.path.join(outDir, spec['name'] + '_sim.traj')
+        chunks = dynamics.simulateChunks(theta0, spec['omega0'], tMax=spec['tMax'], fps=spec['fps'],
+                                         method=spec['method'])
+        y = np.array([[theta0], [spec['omega0']]])
+        with TrajectoryWriter(fileName) as writer:
+            for t, y in chunks:
+                writer.append(trajectoryColumns(dynamics, t, y[0], y[1]))
+            writer.meta = trajectoryMeta(dynamics, fps=spec['fps'])
+        return fileName, {'frames': writer.count, 'thetaEnd': float(np.degrees(y[0, -1])), 'omegaEnd': float(y[1, -1])}
+    sol = dynamics.simulate(theta0, spec['omega0'], tMax=spec['tMax'], fps=spec['fps'], method=spec['method'])
+    if not sol.success:
+        raise RuntimeError(sol.message)
+    fileName = os.path.join(outDir, spec['name'] + '_sim.npz')
+    saveTrajectory(fileName, trajectoryColumns(dynamics, sol.t, sol.y[0], sol.y[1]),
+                   trajectoryMeta(dynamics, fps=spec['fps']))
+    summary = {'nfev': int(sol.nfev), 'thetaEnd': float(np.degrees(sol.y[0, -1])), 'omegaEnd': float(sol.y[1, -1])}
+    return fileName, summary
+
+
+def runSpec(spec, outDir, index=0):
+    """
+    Run one spec.  Failures are reported in the result rather than raised, so one bad spec does not stop a batch.
+    Module level so it can be sent to a process pool.
+    :return: a result dict with name, ok, files, elapsed and the summaries of the runs (or the error)
+    """
+    start = time.perf_counter()
+    result = {'name': spec.get('name', 'spec{}'.format(index)), 'ok': True, 'files': []}
+    try:
+        spec = completeSpec(spec, index)
+        core = buildCore(spec)
+        result['lengths'] = [core.InputLink.length, core.DragLink.length, core.OutputLink.length]
+        if spec['mode'] in ('sweep', 'both'):
+            fileName, result['sweep'] = runSweep(core, spec, outDir)
+            result['files'].append(fileName)
+        if spec['mode'] in ('simulate', 'both'):
+            fileName, result['simulate'] = runSimulation(core, spec, outDir)
+            result['files'].append(fileName)
+    except Exception as e:
+        result['ok'] = False
+        result['error'] = "{}: {}".format(type(e).__name__, e)
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+def runBatch(specs, outDir, jobs=None):
+    """
+    Run many specs, in parallel over jobs processes (all cores if None, in this process if 1).
+    :return: the result dicts in the order of specs
+    """
+    os.makedirs(outDir, exist_ok=True)
+    if jobs == 1 or len(specs) <= 1:
+        return [runSpec(spec, outDir, i) for i, spec in enumerate(specs)]
+    results = [None] * len(specs)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(runSpec, spec, outDir, i): i for i, spec in enumerate(specs)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+# endregion
+
+# region function calls
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless kinematic sweeps and dynamic simulations of four bar "
+                                                 "linkages.")
+    parser.add_argument('specs', nargs='*', help="JSON spec files (default: the linkage of the GUI)")
+    parser.add_argument('-o', '--out', default='fourbar_results', help="output directory")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--mode', choices=('sweep', 'simulate', 'both'), help="override the mode of every spec")
+    args = parser.parse_args(argv)
+
+    specs = [spec for path in args.specs for spec in loadSpecs(path)] if args.specs else [{'name': 'default'}]
+    if args.mode is not None:
+        specs = [dict(spec, mode=args.mode) for spec in specs]
+    names = [spec.get('name', 'spec{}'.format(i)) for i, spec in enumerate(specs)]
+    if len(set(names)) != len(names):
+        parser.error("spec names must be unique, they name the output files")
+
+    results = runBatch(specs, args.out, args.jobs)
+    with open(os.path.join(args.out, 'summary.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+    for result in results:
+        status = "ok" if result['ok'] else "FAILED " + result['error']
+        print("{:<20s} {:8.3f} s  {}".format(result['name'], result['elapsed'], status))
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+# endregion
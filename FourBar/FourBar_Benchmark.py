@@ -0,0 +1,296 @@
+# region imports
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+# endregion
+
+# region measurements
+"""
+Micro benchmarks of the hot paths of the four bar linkage.  Qt runs on the offscreen platform, so they run headless
+and give the same numbers with or without a display.
+
+Every benchmark returns a dict of named results; each result holds the time per call (s) as the median and best of a
+few repeats, and the memory allocated and released again within one call (bytes), measured separately with
+tracemalloc because tracing slows every allocation down.
+
+    python FourBar_Benchmark.py -o bench.json                   all benchmarks, results as JSON
+    python FourBar_Benchmark.py paint grid --scale 0.2          some of them, with fewer calls
+    python FourBar_Benchmark.py -b bench.json                   compare with an earlier run
+
+The JSON holds the Python, numpy and Qt versions and the platform with the results, so runs of different releases
+can be kept side by side and compared with --baseline.
+"""
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+def measure(fn, n=1000, repeat=5, warmup=50):
+    """
+    Time fn() and measure its transient allocations.
+    :param fn: called with no arguments
+    :param n: calls per repeat
+    :param repeat: number of timed repeats
+    :param warmup: untimed calls first, so caches and tables are built
+    :return: dict with n, median and best time per call (s) and transient bytes per call
+    """
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        times.append((time.perf_counter() - start) / n)
+    # the peak above the starting level of each call is what it allocated and dropped again (or kept)
+    calls = min(n, 200)
+    tracemalloc.start()
+    churn = 0
+    for _ in range(calls):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        churn += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return {'n': n, 'median': float(np.median(times)), 'best': min(times), 'bytesPerCall': churn / calls}
+
+
+def cycle(items):
+    """
+    A function that returns the items one after the other, round and round.
+    """
+    items = list(items)
+    state = {'i': 0}
+
+    def nextItem():
+        i = state['i']
+        state['i'] = i + 1 if i + 1 < len(items) else 0
+        return items[i]
+    return nextItem
+
+
+def buildController():
+    """
+    The controller, model and scene of the GUI without the main window:  a view and the widgets it writes to.
+    :return: the FourBarLinkage_Controller with its scene built
+    """
+    import PyQt5.QtWidgets as qtw
+    from FourBarLinkage_MVC import FourBarLinkage_Controller
+    app = qtw.QApplication.instance() or qtw.QApplication(sys.argv[:1])
+    widgets = [qtw.QGraphicsView(), qtw.QDoubleSpinBox(), qtw.QLabel(), qtw.QDoubleSpinBox(), qtw.QDoubleSpinBox(),
+               qtw.QDoubleSpinBox()]
+    for nud in widgets[1:2] + widgets[3:]:
+        nud.setRange(-1000.0, 1000.0)
+    controller = FourBarLinkage_Controller(widgets)
+    controller.setupGraphics()
+    controller.buildScene()
+    controller.app = app  # keep the application alive as long as the controller
+    return controller
+
+
+def dragPoints(controller, n=360, radius=None):
+    """
+    Mouse positions on a circle around the input pivot, as a drag of the input link would give them.
+    :return: list of (x, y)
+    """
+    core = controller.FBL_M.core
+    radius = 1.5 * core.InputLink.length if radius is None else radius
+    angles = np.linspace(0.0, 2.0 * math.pi, n, endpoint=False)
+    return list(zip((core.InputLink.stX + radius * np.cos(angles)).tolist(),
+                    (core.InputLink.stY - radius * np.sin(angles)).tolist()))
+# endregion
+
+# region benchmarks
+def benchSolver(n=5000, repeat=5):
+    """
+    The output angle solve of one drag step, in each solver mode of the core.
+    """
+    controller = buildController()
+    core = controller.FBL_M.core
+    angles = cycle(np.linspace(0.0, 2.0 * math.pi, 3600, endpoint=False).tolist())
+    results = {}
+    for solver in ('table', 'analytic', 'fsolve'):
+        core.solver = solver
+        results['solveOutputAngle.' + solver] = measure(lambda: core.solveOutputAngle(angles()),
+                                                        n if solver != 'fsolve' else max(1, n // 10), repeat)
+    core.solver = 'table'
+    return results
+
+
+def benchMoveLinkage(n=2000, repeat=5):
+    """
+    One drag step:  the core alone, the model with its graphics items brought up to date, the controller with its
+    widgets, and a whole frame, i.e. the controller step followed by a full render of the scene.
+    """
+    import PyQt5.QtCore as qtc
+    import PyQt5.QtGui as qtg
+    controller = buildController()
+    model = controller.FBL_M
+    points = dragPoints(controller)
+    core = model.core
+    nextXY = cycle(points)
+    nextPt = cycle(qtc.QPointF(x, y) for x, y in points)
+    results = {'core.moveLinkage': measure(lambda: core.moveLinkage(*nextXY()), n, repeat),
+               'model.moveLinkage': measure(lambda: model.moveLinkage(nextPt()), n, repeat),
+               'controller.moveLinkage': measure(lambda: controller.moveLinkage(nextPt()), n, repeat)}
+    scene = controller.FBL_V.scene
+    image = qtg.QImage(800, 800, qtg.QImage.Format_ARGB32_Premultiplied)
+    painter = qtg.QPainter(image)
+
+    def frame():
+        controller.moveLinkage(nextPt())
+        scene.render(painter)
+    results['frame'] = measure(frame, max(1, n // 10), repeat)
+    painter.end()
+    return results
+
+
+def benchPaint(n=200, repeat=5, tracerPoints=(1000, 10000, 100000)):
+    """
+    paint() of each kind of graphics item into an offscreen image, as the view calls it for an exposed item.
+    Tracers are filled with coupler curve points first.
+    """
+    import PyQt5.QtGui as qtg
+    import PyQt5.QtWidgets as qtw
+    from FourBarLinkage_Core import TracerCore
+    from FourBarLinkage_MVC import Tracer
+    controller = buildController()
+    model = controller.FBL_M
+    view = controller.FBL_V
+    items = {'RigidLink': model.DragLink, 'LinearSpring': model.Spring, 'DashPot': model.DashPot,
+             'RigidPivotPoint': model.Pivot0}
+    for points in tracerPoints:
+        # a few turns of the crank, so the curve is traced over and over like a long drag
+        pos = model.solvePositions(np.linspace(0.0, 2.0 * math.pi * max(1.0, points / 720.0), points))
+        core = TracerCore(capacity=points)
+        for x, y in zip(pos.xC.tolist(), pos.yC.tolist()):
+            core.append(x, y)
+        tracer = Tracer(pen=view.penTracer, core=core)
+        tracer.sync()
+        items['Tracer.{}k'.format(points // 1000)] = tracer
+
+    image = qtg.QImage(800, 800, qtg.QImage.Format_ARGB32_Premultiplied)
+    option = qtw.QStyleOptionGraphicsItem()
+    painter = qtg.QPainter(image)
+    painter.translate(400, 400)
+    results = {}
+    for name, item in items.items():
+        option.exposedRect = item.boundingRect()
+        calls = n if not name.startswith('Tracer') else max(1, n * 1000 // len(item.core))
+        results['paint.' + name] = measure(lambda: item.paint(painter, option, None), calls, repeat, warmup=5)
+    painter.end()
+    return results
+
+
+def benchGrid(n=200, repeat=5):
+    """
+    drawAGrid as BuildScene calls it, and the scene background it paints, rendered into an offscreen image.
+    """
+    import PyQt5.QtGui as qtg
+    controller = buildController()
+    view = controller.FBL_V
+    scene = view.scene
+    results = {'drawAGrid': measure(lambda: view.drawAGrid(DeltaX=10, DeltaY=10, Height=400, Width=400,
+                                                             Pen=view.penGridLines, Brush=view.brushGrid), n, repeat)}
+    image = qtg.QImage(800, 800, qtg.QImage.Format_ARGB32_Premultiplied)
+    painter = qtg.QPainter(image)
+    results['drawBackground'] = measure(lambda: scene.drawBackground(painter, scene.sceneRect()), n, repeat)
+    painter.end()
+    results['buildScene'] = measure(controller.buildScene, max(1, n // 10), repeat)
+    return results
+
+
+def benchSimulation(n=1, repeat=3, methods=('auto', 'RK45', 'Radau')):
+    """
+    The integration startSimulation hands to its worker thread:  5 s of motion sampled at 60 Hz, chunk by chunk,
+    from the linkage as it is built, for each integration method.
+    """
+    from FourBarLinkage_Dynamics import FourBarDynamics
+    controller = buildController()
+    model = controller.FBL_M
+    # the default masses, spring constant and damping of the main window
+    dynamics = FourBarDynamics.fromCore(model.core, 1.0, 1.0, 1.0, 50.0, 5.0)
+    theta0 = model.InputLink.angle
+    results = {}
+    for method in methods:
+        def run():
+            for _ in dynamics.simulateChunks(theta0, 0.0, tMax=5.0, fps=60, method=method):
+                pass
+        results['simulate.' + method] = measure(run, n, repeat, warmup=1)
+    return results
+
+
+BENCHMARKS = {'solver': benchSolver, 'moveLinkage': benchMoveLinkage, 'paint': benchPaint, 'grid': benchGrid,
+              'simulation': benchSimulation}
+# endregion
+
+# region function calls
+def runBenchmarks(names=None, scale=1.0):
+    """
+    Run benchmarks.
+    :param names: names in BENCHMARKS, all if None
+    :param scale: multiplies the number of calls of each benchmark
+    :return: dict with the versions, the platform and the results of each benchmark
+    """
+    import PyQt5.QtCore as qtc
+    names = list(BENCHMARKS) if not names else names
+    results = {}
+    for name in names:
+        bench = BENCHMARKS[name]
+        n = bench.__defaults__[0]
+        results[name] = bench(max(1, int(n * scale)))
+    return {'format': 1, 'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'qt': qtc.QT_VERSION_STR, 'pyqt': qtc.PYQT_VERSION_STR,
+            'machine': platform.machine(), 'system': platform.system(), 'qpa': os.environ.get('QT_QPA_PLATFORM'),
+            'scale': scale, 'results': results}
+
+
+def compareReports(report, baseline):
+    """
+    Ratios of the median times of report to those of an earlier baseline report, for the cases both have.
+    :return: dict of benchmark name -> case -> ratio (above 1 is slower)
+    """
+    ratios = {}
+    for name, results in report['results'].items():
+        for case, r in results.items():
+            old = baseline.get('results', {}).get(name, {}).get(case)
+            if old and old['median'] > 0:
+                ratios.setdefault(name, {})[case] = r['median'] / old['median']
+    return ratios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro benchmarks of the four bar linkage hot paths.")
+    parser.add_argument('names', nargs='*', help="benchmarks to run, of " + ", ".join(BENCHMARKS) + " (default: all)")
+    parser.add_argument('-o', '--out', help="write the results as JSON to this file")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply the number of calls per benchmark")
+    parser.add_argument('-b', '--baseline', help="compare with the results of an earlier run (JSON from --out)")
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error("unknown benchmarks: " + ", ".join(sorted(unknown)))
+
+    report = runBenchmarks(args.names, args.scale)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['baseline'] = {'file': args.baseline, 'ratios': compareReports(report, json.load(f))}
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    ratios = report.get('baseline', {}).get('ratios', {})
+    for name, results in report['results'].items():
+        for case, r in results.items():
+            line = "{:<32s} {:12.2f} us  {:10.0f} B/call".format(case, r['median'] * 1e6, r['bytesPerCall'])
+            if case in ratios.get(name, {}):
+                line += "  x{:0.2f}".format(ratios[name][case])
+            print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+# endregion
@@ -0,0 +1,282 @@
+# region imports
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import math
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import FourBarLinkage_Kinematics as kin
+from FourBarLinkage_Dynamics import FourBarDynamics
+from FourBar_Batch import DEFAULT_SPEC, BRANCHES
+# endregion
+
+# region sweep settings
+"""
+Design space exploration of the four bar linkage over a grid of link lengths (L1, L2, L3), spring constants (k) and
+damping coefficients (c).  For every grid point the sweep records:
+    grashof             Grashof class (FourBarLinkage_Kinematics.GRASHOF_NAMES gives the names)
+    assembled           whether the linkage can be assembled at the initial input angle theta1
+    validFraction       fraction of a full input revolution where the linkage can be assembled
+    muMin, muMax        range of the transmission angle over the revolution (deg)
+    couplerWidth/Height bounding box of the coupler curve of the coupler midpoint (Tracer2)
+    couplerArea         area enclosed by the coupler curve (only if the input link fully rotates)
+    couplerLength       length of the coupler curve
+    settlingTime        time for the free response from theta1 + offset to stay within tol of the equilibrium at
+                        theta1 (where the spring is free), NaN if it does not settle within tMax
+
+The grid points are split into chunks that are solved in a process pool.  Each finished chunk is written at once to
+the cache directory with one key per point (a hash of the point and the settings), so a sweep that is stopped and
+run again only solves the points that are not in the cache.  The results are aggregated into columns (one numpy array
+per quantity) in the order of the grid.
+"""
+PARAMETERS = ('L1', 'L2', 'L3', 'k', 'c')
+COLUMNS = ('grashof', 'assembled', 'validFraction', 'muMin', 'muMax', 'couplerWidth', 'couplerHeight',
+           'couplerArea', 'couplerLength', 'settlingTime')
+DEFAULT_SETTINGS = {key: DEFAULT_SPEC[key] for key in ('pivot0', 'pivot1', 'theta1', 'branch', 'm1', 'm2', 'm3',
+                                                       'step', 'tMax', 'fps', 'method')}
+DEFAULT_SETTINGS.update({'step': 1.0, 'offset': 10.0, 'tol': 0.02})
+
+
+def defaultParameters(spec=DEFAULT_SPEC):
+    """
+    The parameters of the linkage of a spec, as the batch runs and the GUI build it:  the link lengths from the pose
+    of the joints (|B - pivot0|, |C - B| and |C - pivot1|) and the spring and damping constants.
+    :return: dict of name in PARAMETERS -> value
+    """
+    p0, p1, B, C = spec['pivot0'], spec['pivot1'], spec['B'], spec['C']
+    return {'L1': math.dist(B, p0), 'L2': math.dist(C, B), 'L3': math.dist(C, p1), 'k': spec['k'], 'c': spec['c']}
+
+
+def pointKey(point, settings):
+    """
+    Cache key of a grid point:  a hash of the point and every setting that changes its results.
+    """
+    text = json.dumps([list(map(float, point)), sorted(settings.items())])
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def parseValues(text):
+    """
+    Parse a parameter on the command line:  'a:b:n' gives n values from a to b (inclusive), 'a,b,c' a list.
+    """
+    if ':' in text:
+        start, stop, num = text.split(':')
+        return np.linspace(float(start), float(stop), int(num))
+    return np.array([float(value) for value in text.split(',')])
+
+
+def makeGrid(L1, L2, L3, k, c):
+    """
+    All combinations of the parameter values.
+    :return: an (n, 5) array with the columns of PARAMETERS
+    """
+    return np.array(list(itertools.product(L1, L2, L3, k, c)), dtype=float).reshape(-1, len(PARAMETERS))
+# endregion
+
+# region point evaluation
+def settlingTime(t, theta, thetaEq, tol):
+    """
+    Time after which |theta - thetaEq| stays within tol times the initial deviation.
+    :return: the settling time (s) or NaN if theta is still outside the band at the end of t
+    """
+    band = tol * abs(theta[0] - thetaEq)
+    outside = np.nonzero(np.abs(theta - thetaEq) > band)[0]
+    if len(outside) == 0:
+        return 0.0
+    if outside[-1] == len(t) - 1:
+        return math.nan
+    return float(t[outside[-1] + 1])
+
+
+def evaluatePoint(point, settings):
+    """
+    Kinematic and dynamic figures of one grid point.
+    :param point: (L1, L2, L3, k, c)
+    :return: a tuple with the values of COLUMNS
+    """
+    L1, L2, L3, k, c = point
+    (p0x, p0y), (p1x, p1y) = settings['pivot0'], settings['pivot1']
+    branch = BRANCHES[settings['branch']]
+    grashof = kin.grashofClass(math.hypot(p1x - p0x, p1y - p0y), L1, L2, L3)
+
+    # kinematics over a full revolution
+    pos = kin.sweepPositions(L1, L2, L3, p0x, p0y, p1x, p1y, branch, step=settings['step'])
+    valid = pos.valid
+    nan = math.nan
+    if valid.any():
+        mu = np.degrees(kin.transmissionAngle(pos.theta2[valid], pos.theta3[valid]))
+        x, y = pos.tracerX[2][valid], pos.tracerY[2][valid]
+        width, height = float(np.ptp(x)), float(np.ptp(y))
+        segments = np.hypot(np.diff(x), np.diff(y))
+        if valid.all():
+            # closed curve: include the segment back to the start and use the shoelace formula for the area
+            segments = np.append(segments, math.hypot(x[0] - x[-1], y[0] - y[-1]))
+            area = 0.5 * abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))))
+        else:
+            area = nan
+        figures = [float(valid.mean()), float(mu.min()), float(mu.max()), width, height, area, float(segments.sum())]
+    else:
+        figures = [0.0, nan, nan, nan, nan, nan, nan]
+
+    # free response from an offset of the input angle
+    theta1 = math.radians(settings['theta1'])
+    assembled = kin.solveOutputAngle(theta1, L1, L2, L3, p0x, p0y, p1x, p1y, branch) is not None
+    settling = nan
+    if assembled:
+        dynamics = FourBarDynamics(L1, L2, L3, p0x, p0y, p1x, p1y, settings['m1'], settings['m2'], settings['m3'],
+                                   k, c, branch=branch)
+        dynamics.freeLength = float(dynamics.springGeometry(np.array([theta1]))[0][0])
+        theta0 = theta1 + math.radians(settings['offset'])
+        if kin.solveOutputAngle(theta0, L1, L2, L3, p0x, p0y, p1x, p1y, branch) is not None:
+            try:
+                sol = dynamics.simulate(theta0, 0.0, tMax=settings['tMax'], fps=settings['fps'],
+                                        method=settings['method'])
+                if sol.success and np.isfinite(sol.y[0]).all():
+                    settling = settlingTime(sol.t, sol.y[0], theta1, settings['tol'])
+            except (ValueError, FloatingPointError, ZeroDivisionError):
+                pass  # the free response runs into a position that cannot be assembled
+    return (grashof, assembled, *figures, settling)
+
+
+def evaluateChunk(points, settings):
+    """
+    Evaluate a chunk of grid points.  Module level so it can be sent to a process pool.
+    :param points: (n, 5) array of grid points
+    :return: a dict of columns (one array per name in COLUMNS)
+    """
+    rows = [evaluatePoint(point, settings) for point in points]
+    columns = {name: np.array(values) for name, values in zip(COLUMNS, zip(*rows))}
+    columns['grashof'] = columns['grashof'].astype(np.int8)
+    columns['assembled'] = columns['assembled'].astype(bool)
+    return columns
+# endregion
+
+# region sweep engine
+class ParameterSweep():
+    def __init__(self, grid, settings=None, cacheDir=None, chunkSize=32, jobs=None):
+        """
+        :param grid: (n, 5) array of grid points with the columns of PARAMETERS, see makeGrid
+        :param settings: dict overriding DEFAULT_SETTINGS (pivots, theta1, branch, masses, step, tMax, fps, method,
+                         offset, tol)
+        :param cacheDir: directory for the per point cache, None for no cache
+        :param chunkSize: number of grid points per work unit
+        :param jobs: worker processes (all cores if None, in this process if 1)
+        """
+        self.grid = np.asarray(grid, dtype=float).reshape(-1, len(PARAMETERS))
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.cacheDir = cacheDir
+        self.chunkSize = chunkSize
+        self.jobs = jobs
+        self.keys = [pointKey(point, self.settings) for point in self.grid]
+
+    def loadCache(self):
+        """
+        :return: dict of point key -> row (a tuple with the values of COLUMNS) of every point in the cache
+        """
+        cached = {}
+        if self.cacheDir is None:
+            return cached
+        for fileName in glob.glob(os.path.join(self.cacheDir, 'chunk_*.npz')):
+            with np.load(fileName) as data:
+                for i, key in enumerate(data['key']):
+                    cached[str(key)] = tuple(data[name][i] for name in COLUMNS)
+        return cached
+
+    def saveChunk(self, keys, columns):
+        """
+        Write the results of a chunk to the cache.  The file is written under a temporary name and renamed, so an
+        interrupted sweep never leaves a partial chunk behind.
+        """
+        if self.cacheDir is None:
+            return
+        os.makedirs(self.cacheDir, exist_ok=True)
+        fileName = os.path.join(self.cacheDir, 'chunk_{}.npz'.format(uuid.uuid4().hex))
+        np.savez(fileName + '.tmp.npz', key=np.array(keys), **columns)
+        os.replace(fileName + '.tmp.npz', fileName)
+
+    def run(self, progress=None):
+        """
+        Evaluate every grid point that is not cached yet.
+        :param progress: optional callable(done, total) called after each chunk
+        :return: dict of columns:  the parameters of PARAMETERS and the results of COLUMNS, one row per grid point
+        """
+        cached = self.loadCache()
+        todo = [i for i, key in enumerate(self.keys) if key not in cached]
+        chunks = [todo[i:i + self.chunkSize] for i in range(0, len(todo), self.chunkSize)]
+        done = len(self.grid) - len(todo)
+
+        def collect(chunk, columns):
+            nonlocal done
+            keys = [self.keys[i] for i in chunk]
+            self.saveChunk(keys, columns)
+            for j, key in enumerate(keys):
+                cached[key] = tuple(columns[name][j] for name in COLUMNS)
+            done += len(chunk)
+            if progress is not None:
+                progress(done, len(self.grid))
+
+        if self.jobs == 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                collect(chunk, evaluateChunk(self.grid[chunk], self.settings))
+        else:
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                futures = {pool.submit(evaluateChunk, self.grid[chunk], self.settings): chunk for chunk in chunks}
+                for future in as_completed(futures):
+                    collect(futures[future], future.result())
+
+        results = {name: self.grid[:, i].copy() for i, name in enumerate(PARAMETERS)}
+        rows = [cached[key] for key in self.keys]
+        for name, values in zip(COLUMNS, zip(*rows)):
+            results[name] = np.array(values)
+        if len(rows) == 0:
+            results.update({name: np.array([]) for name in COLUMNS})
+        results['grashof'] = results['grashof'].astype(np.int8)
+        results['assembled'] = results['assembled'].astype(bool)
+        return results
+# endregion
+
+# region function calls
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep four bar linkages over link lengths, spring constants and "
+                                                 "damping.  Values are 'start:stop:num' or 'a,b,c'.")
+    defaults = {name: repr(float(value)) for name, value in defaultParameters().items()}
+    parser.add_argument('--L1', default=defaults['L1'], help="input link lengths")
+    parser.add_argument('--L2', default=defaults['L2'], help="coupler link lengths")
+    parser.add_argument('--L3', default=defaults['L3'], help="output link lengths")
+    parser.add_argument('--k', default=defaults['k'], help="spring constants (N/m)")
+    parser.add_argument('--c', default=defaults['c'], help="damping coefficients (N*s/m)")
+    parser.add_argument('--settings', help="JSON file overriding the sweep settings")
+    parser.add_argument('-o', '--out', default='sweep.npz', help="output file of the columns")
+    parser.add_argument('--cache', default=None, help="cache directory (default: <out>_cache)")
+    parser.add_argument('--no-cache', action='store_true', help="do not read or write the cache")
+    parser.add_argument('--chunk', type=int, default=32, help="grid points per work unit")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    settings = {}
+    if args.settings:
+        with open(args.settings) as f:
+            settings = json.load(f)
+    unknown = set(settings) - set(DEFAULT_SETTINGS)
+    if unknown:
+        parser.error("unknown settings: " + ", ".join(sorted(unknown)))
+    grid = makeGrid(*(parseValues(getattr(args, name)) for name in PARAMETERS))
+    cacheDir = None if args.no_cache else (args.cache or os.path.splitext(args.out)[0] + '_cache')
+
+    start = time.perf_counter()
+    sweep = ParameterSweep(grid, settings, cacheDir, args.chunk, args.jobs)
+    results = sweep.run(lambda done, total: print("\r{}/{} points".format(done, total), end='', flush=True))
+    np.savez(args.out, **results)
+    print("\n{} points in {:0.2f} s -> {}".format(len(grid), time.perf_counter() - start, args.out))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+# endregion